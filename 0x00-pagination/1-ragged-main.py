@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Main file: blank and ragged rows in the CSV file
+"""
+
+import os
+import tempfile
+
+Server = __import__('1-simple_pagination').Server
+
+HEADER = "Year of Birth,Gender,Ethnicity,Child's First Name,Count,Rank\n"
+ROWS = ["2016,FEMALE,ASIAN,Olivia,172,1\n",
+        "2016,FEMALE,ASIAN,Chloe,112,2\n",
+        "2016,FEMALE,ASIAN,Sophia,104,3\n"]
+
+
+def write(directory, name, lines):
+    """Write a CSV file with the header and `lines`"""
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(lines))
+    return path
+
+
+with tempfile.TemporaryDirectory() as directory:
+    # A blank line is read back as an empty row, by every backend
+    blank = write(directory, "blank.csv", ROWS[:1] + ["\n"] + ROWS[1:])
+    for backend in ("csv", "columnar", "mmap"):
+        print(backend, Server(backend, blank).get_page(1, 3))
+
+    # A row with a missing or an extra field is an error, not a shift
+    # of every later row
+    short = write(directory, "short.csv",
+                  ROWS[:1] + ["2016,FEMALE,ASIAN,Chloe,112\n"] + ROWS[2:])
+    wide = write(directory, "wide.csv",
+                 ROWS + ["2016,MALE,ASIAN,Liam,1,1,x\n"])
+    for path in (short, wide):
+        try:
+            Server("columnar", path).get_page(1, 3)
+        except ValueError as e:
+            print("ValueError: {}".format(
+                str(e).replace(directory + os.sep, "")))
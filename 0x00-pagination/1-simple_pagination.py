@@ -3,9 +3,12 @@
 Module for Server class and pagination helper function
 """
 
-import csv
 import math
-from typing import List, Tuple
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from dataset_loader import Dataset, shared_dataset
+from row_stream import iter_csv_rows, iter_dataset_rows
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -30,16 +33,17 @@ class Server:
 
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self) -> None:
+    def __init__(self, backend: str = "columnar",
+                 data_file: str = None) -> None:
+        """Choose the dataset backend and the CSV file to serve."""
+        self.backend = backend
+        self.data_file = data_file or self.DATA_FILE
         self.__dataset = None
 
-    def dataset(self) -> List[List]:
+    def dataset(self) -> Dataset:
         """Return cached dataset"""
         if self.__dataset is None:
-            with open(self.DATA_FILE, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+            self.__dataset = shared_dataset(self.data_file, self.backend)
         return self.__dataset
 
     def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
@@ -49,3 +53,44 @@ class Server:
 
         start_index, end_index = index_range(page, page_size)
         return self.dataset()[start_index:end_index]
+
+    def iter_rows(self, start: int = 0,
+                  stop: Optional[int] = None) -> Iterator[List]:
+        """
+        Stream rows `start` to `stop` without materializing the dataset.
+
+        Args:
+            start (int): Position of the first row.
+            stop (int): Position after the last row, None for the end.
+
+        Returns:
+            Iterator[List]: The rows, read in bounded-size chunks.
+        """
+        assert isinstance(start, int) and start >= 0
+        assert stop is None or (isinstance(stop, int) and stop >= start)
+
+        if self.__dataset is not None:
+            return iter_dataset_rows(self.__dataset, start, stop)
+        return iter_csv_rows(self.data_file, start, stop)
+
+    def iter_pages(self, page_size: int = 10) -> Iterator[List[List]]:
+        """
+        Stream every page, matching get_page(page, page_size).
+
+        Args:
+            page_size (int): Number of items per page.
+
+        Returns:
+            Iterator[List[List]]: Pages 1, 2, ... until the data runs out.
+        """
+        assert isinstance(page_size, int) and page_size > 0
+
+        rows = self.iter_rows()
+        page = 1
+        while True:
+            start_index, end_index = index_range(page, page_size)
+            data = list(islice(rows, end_index - start_index))
+            if not data:
+                return
+            yield data
+            page += 1
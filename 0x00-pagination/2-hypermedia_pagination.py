@@ -3,9 +3,14 @@
 Module for Server class and pagination helper function
 """
 
-import csv
 import math
-from typing import Any, Dict, List, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from dataset_loader import Dataset, shared_dataset
+from row_stream import iter_csv_rows, iter_dataset_rows
+from secondary_index import SecondaryIndexes
+from sort_orders import OrderBy, SortOrders
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -30,30 +35,110 @@ class Server:
 
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self) -> None:
+    def __init__(self, backend: str = "columnar",
+                 data_file: str = None) -> None:
+        """Choose the dataset backend and the CSV file to serve."""
+        self.backend = backend
+        self.data_file = data_file or self.DATA_FILE
         self.__dataset = None
+        self.__indexes = None
+        self.__sort_orders = None
 
-    def dataset(self) -> List[List]:
+    def dataset(self) -> Dataset:
         """Return cached dataset"""
         if self.__dataset is None:
-            with open(self.DATA_FILE, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                dataset = list(reader)
-            self.__dataset = dataset[1:]
+            self.__dataset = shared_dataset(self.data_file, self.backend)
         return self.__dataset
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
-        """Return appropriate page of the dataset"""
+    def indexes(self) -> SecondaryIndexes:
+        """Return cached secondary indexes over the dataset"""
+        if self.__indexes is None:
+            self.__indexes = SecondaryIndexes(self.dataset())
+        return self.__indexes
+
+    def sort_orders(self) -> SortOrders:
+        """Return cached sort orders over the dataset"""
+        if self.__sort_orders is None:
+            self.__sort_orders = SortOrders(self.dataset())
+        return self.__sort_orders
+
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 where: Optional[Mapping[str, Any]] = None,
+                 order_by: Optional[OrderBy] = None) -> List[List]:
+        """
+        Return appropriate page of the dataset.
+
+        `where` maps column names to the value (or list of values) a
+        row must hold, e.g. {"Year of Birth": 2016, "Gender": "MALE"};
+        matching rows are found through the secondary indexes.
+        `order_by` names the column(s) to sort by, "-" prefixed for
+        descending order, e.g. ["-Count", "Rank"].
+        """
         assert isinstance(page, int) and page > 0
         assert isinstance(page_size, int) and page_size > 0
 
         start_index, end_index = index_range(page, page_size)
-        return self.dataset()[start_index:end_index]
+        positions = self.indexes().lookup(where) if where else None
+        if order_by:
+            if positions is None:
+                positions = self.sort_orders().permutation(order_by)
+            else:
+                positions = self.sort_orders().sort(positions, order_by)
+        if positions is None:
+            return self.dataset()[start_index:end_index]
+        dataset = self.dataset()
+        return [dataset[position]
+                for position in positions[start_index:end_index]]
+
+    def iter_rows(self, start: int = 0,
+                  stop: Optional[int] = None) -> Iterator[List]:
+        """
+        Stream rows `start` to `stop` without materializing the dataset.
+
+        Args:
+            start (int): Position of the first row.
+            stop (int): Position after the last row, None for the end.
+
+        Returns:
+            Iterator[List]: The rows, read in bounded-size chunks.
+        """
+        assert isinstance(start, int) and start >= 0
+        assert stop is None or (isinstance(stop, int) and stop >= start)
+
+        if self.__dataset is not None:
+            return iter_dataset_rows(self.__dataset, start, stop)
+        return iter_csv_rows(self.data_file, start, stop)
+
+    def iter_pages(self, page_size: int = 10) -> Iterator[List[List]]:
+        """
+        Stream every page, matching get_page(page, page_size).
+
+        Args:
+            page_size (int): Number of items per page.
+
+        Returns:
+            Iterator[List[List]]: Pages 1, 2, ... until the data runs out.
+        """
+        assert isinstance(page_size, int) and page_size > 0
+
+        rows = self.iter_rows()
+        page = 1
+        while True:
+            start_index, end_index = index_range(page, page_size)
+            data = list(islice(rows, end_index - start_index))
+            if not data:
+                return
+            yield data
+            page += 1
 
-    def get_hyper(self, page: int = 1, page_size: int = 10) -> Dict[str, Any]:
-        """Return paginated data with metadata."""
-        data = self.get_page(page, page_size)
-        total_pages = math.ceil(len(self.dataset()) / page_size)
+    def get_hyper(self, page: int = 1, page_size: int = 10,
+                  where: Optional[Mapping[str, Any]] = None,
+                  order_by: Optional[OrderBy] = None) -> Dict[str, Any]:
+        """Return paginated data with metadata, filtered and sorted."""
+        data = self.get_page(page, page_size, where, order_by)
+        total = len(self.indexes().lookup(where)) if where \
+            else len(self.dataset())
+        total_pages = math.ceil(total / page_size)
 
         return {
             "page_size": len(data),
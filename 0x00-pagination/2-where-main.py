@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Main file: filtered pages through the secondary indexes
+"""
+
+Server = __import__('2-hypermedia_pagination').Server
+
+server = Server()
+
+print(server.get_page(1, 3, where={"Year of Birth": 2016,
+                                   "Child's First Name": "Olivia"}))
+print("---")
+# total_pages counts matching rows only
+res = server.get_hyper(2, 5, where={"Gender": "FEMALE",
+                                    "Child's First Name": "Olivia"})
+print(res)
+print("---")
+# A list of values matches any of them
+names = ["Olivia", "Emma"]
+res = server.get_hyper(1, 100, where={"Child's First Name": names,
+                                      "Ethnicity": "HISPANIC"})
+print(res.get('page_size'), res.get('total_pages'))
+print("---")
+print(server.get_hyper(1, 10, where={"Child's First Name": "Nobody"}))
+try:
+    server.get_page(1, 10, where={"Colour": "blue"})
+except KeyError as e:
+    print("KeyError: {}".format(e.args[0]))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Main file: cursor walk with interleaved deletes and appends
+"""
+
+Server = __import__('3-hypermedia_del_pagination').Server
+
+server = Server()
+
+res = server.get_by_cursor(page_size=3)
+print(res)
+
+# Rows deleted ahead of the cursor are skipped; rows appended, or
+# inserted in a reused index, after the walk started are not returned
+server.delete(3)
+server.delete(4)
+server.insert(["2016", "FEMALE", "ASIAN", "Ada", "1", "1"], 4)
+server.insert(["2016", "MALE", "ASIAN", "Alan", "1", "1"])
+res = server.get_by_cursor(res.get('next_cursor'), 3)
+print(res)
+
+# A walk started now sees the inserted rows
+print(server.get_by_cursor(page_size=5).get('data'))
+
+# Walk to the end: every row live since the start is returned once
+seen = 0
+res = server.get_by_cursor(page_size=1000)
+while True:
+    seen += len(res.get('data'))
+    server.delete(next(server.indexed_dataset().keys()))
+    if res.get('next_cursor') is None:
+        break
+    res = server.get_by_cursor(res.get('next_cursor'), 1000)
+print("Rows walked: {}".format(seen))
+
+try:
+    server.get_by_cursor("not-a-cursor")
+except ValueError as e:
+    print(e)
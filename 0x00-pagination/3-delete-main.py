@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Main file: delete and insert on the deletion-resilient server
+"""
+
+Server = __import__('3-hypermedia_del_pagination').Server
+
+server = Server()
+
+res = server.get_hyper_index(3, 2)
+print(res)
+
+# Delete the next 1000 rows: the following page jumps straight over them
+for index in range(res.get('next_index'), res.get('next_index') + 1000):
+    server.delete(index)
+print("Nb items: {}".format(len(server.indexed_dataset())))
+print(server.get_hyper_index(res.get('next_index'), 2))
+
+try:
+    server.delete(5)
+except KeyError:
+    print("KeyError raised when deleting a deleted index")
+
+# Reuse a deleted index, then append after the last one
+print(server.insert(["2016", "FEMALE", "ASIAN", "Ada", "1", "1"], 5))
+print(server.insert(["2016", "MALE", "ASIAN", "Alan", "1", "1"]))
+print(server.get_hyper_index(3, 3))
+last = server.indexed_dataset().capacity - 1
+print(server.get_hyper_index(last - 1, 2))
@@ -3,8 +3,53 @@
 Deletion-resilient hypermedia pagination
 """
 
-import csv
-from typing import Dict, List
+import base64
+import binascii
+import struct
+from typing import Dict, List, Tuple
+
+from dataset_loader import Dataset, shared_dataset
+from live_index import IndexedDataset
+from sort_orders import OrderBy, SortOrders
+
+# Cursor layout: format version, snapshot version, next index
+CURSOR = struct.Struct(">BQQ")
+CURSOR_FORMAT = 1
+
+
+def encode_cursor(snapshot: int, index: int) -> str:
+    """
+    Encode an opaque pagination cursor.
+
+    Args:
+        snapshot (int): Dataset version the walk started from.
+        index (int): Index to resume from.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = CURSOR.pack(CURSOR_FORMAT, snapshot, index)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Args:
+        cursor (str): Cursor string.
+
+    Returns:
+        Tuple[int, int]: Snapshot version and index to resume from.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fmt, snapshot, index = CURSOR.unpack(raw)
+    except (binascii.Error, struct.error, TypeError, ValueError):
+        raise ValueError("invalid cursor: {!r}".format(cursor)) from None
+    if fmt != CURSOR_FORMAT:
+        raise ValueError("unsupported cursor format: {}".format(fmt))
+    return snapshot, index
 
 
 class Server:
@@ -12,35 +57,70 @@ class Server:
 
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
+    def __init__(self, backend: str = "columnar",
+                 data_file: str = None):
+        """Choose the dataset backend and the CSV file to serve."""
+        self.backend = backend
+        self.data_file = data_file or self.DATA_FILE
         self.__dataset = None
         self.__indexed_dataset = None
+        self.__sort_orders = None
 
-    def dataset(self) -> List[List]:
+    def dataset(self) -> Dataset:
         """Cached dataset"""
         if self.__dataset is None:
-            with open(self.DATA_FILE, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                dataset = list(reader)
-            self.__dataset = dataset[1:]
+            self.__dataset = shared_dataset(self.data_file, self.backend)
 
         return self.__dataset
 
-    def indexed_dataset(self) -> Dict[int, List]:
+    def indexed_dataset(self) -> IndexedDataset:
         """Dataset indexed by sorting position, starting at 0"""
         if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            self.__indexed_dataset = {i: dataset[i]
-                                      for i in range(len(dataset))}
+            self.__indexed_dataset = IndexedDataset(self.dataset())
         return self.__indexed_dataset
 
-    def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
+    def sort_orders(self) -> SortOrders:
+        """Sort orders of the live rows, rebuilt after any mutation"""
+        if self.__sort_orders is None:
+            self.__sort_orders = SortOrders(self.indexed_dataset())
+        return self.__sort_orders
+
+    def delete(self, index: int) -> None:
+        """
+        Deletes the row at the given index.
+
+        Args:
+            index (int): Index of a live row.
+        """
+        self.indexed_dataset().delete(index)
+
+    def insert(self, row: List, index: int = None) -> int:
+        """
+        Inserts a row in a deleted index, or after the last index.
+
+        Args:
+            row (List): Row to insert.
+            index (int): Deleted index to reuse, None to append.
+
+        Returns:
+            int: Index the row was stored at.
+        """
+        return self.indexed_dataset().insert(row, index)
+
+    def get_hyper_index(self, index: int = None, page_size: int = 10,
+                        order_by: OrderBy = None) -> Dict:
         """
         Returns paginated data starting from the given index.
 
+        Deleted indexes are skipped in O(log n) each, however many of
+        them were removed.
+
         Args:
             index (int): Starting index for pagination.
             page_size (int): Number of items per page.
+            order_by (OrderBy): Column(s) to sort by, "-" prefixed for
+                descending order. Indexes then count positions in that
+                order, which is recomputed after every delete/insert.
 
         Returns:
             dict: Paginated data and related information.
@@ -48,27 +128,22 @@ class Server:
         assert isinstance(index, int) and index >= 0
         assert isinstance(page_size, int) and page_size > 0
 
+        if order_by:
+            return self._get_ordered_index(index, page_size, order_by)
+
         indexed_data = self.indexed_dataset()
-        dataset_size = len(indexed_data)
+        dataset_size = indexed_data.capacity
 
         if index is None or index >= dataset_size:
             index = 0
 
-        data = []
-        current_index = index
-        items_added = 0
-
-        while items_added < page_size and current_index < dataset_size:
-            item = indexed_data.get(current_index)
-            if item:
-                if items_added == 0:
-                    start_index = current_index
+        # One extra row tells whether any live row follows this page
+        rows = indexed_data.live_rows(index, page_size + 1)
+        data = [row for _, row in rows[:page_size]]
 
-                data.append(item)
-                items_added += 1
-            current_index += 1
-
-        next_index = current_index if current_index < dataset_size else None
+        start_index = rows[0][0] if rows else index
+        next_index = rows[page_size - 1][0] + 1 if len(rows) > page_size \
+            else None
 
         return {
             "index": start_index,
@@ -76,3 +151,60 @@ class Server:
             "page_size": page_size,
             "next_index": next_index,
         }
+
+    def _get_ordered_index(self, index: int, page_size: int,
+                           order_by: OrderBy) -> Dict:
+        """get_hyper_index over a cached permutation of the live rows"""
+        indexed_data = self.indexed_dataset()
+        order = self.sort_orders().permutation(order_by)
+
+        if index >= len(order):
+            index = 0
+        end_index = index + page_size
+
+        return {
+            "index": index,
+            # Rows deleted since the permutation was taken are skipped
+            "data": [row for _, row in
+                     indexed_data.rows(order[index:end_index])],
+            "page_size": page_size,
+            "next_index": end_index if end_index < len(order) else None,
+        }
+
+    def get_by_cursor(self, cursor: str = None, page_size: int = 10) -> Dict:
+        """
+        Returns the page following an opaque cursor.
+
+        A walk started without a cursor is pinned to the current
+        dataset version: rows inserted later are not returned, and
+        since pages resume from an index rather than an offset, rows
+        deleted meanwhile cannot shift others into duplicates or gaps.
+
+        Args:
+            cursor (str): Cursor from a previous page, None to start.
+            page_size (int): Number of items per page.
+
+        Returns:
+            dict: Page data and the cursor of the next page.
+        """
+        assert isinstance(page_size, int) and page_size > 0
+
+        indexed_data = self.indexed_dataset()
+        if cursor is None:
+            snapshot, index = indexed_data.version, 0
+        else:
+            snapshot, index = decode_cursor(cursor)
+
+        # One extra row tells whether the walk goes on after this page
+        rows = indexed_data.live_rows(index, page_size + 1, snapshot)
+        more = len(rows) > page_size
+        data = [row for _, row in rows[:page_size]]
+        next_cursor = encode_cursor(snapshot, rows[page_size - 1][0] + 1) \
+            if more else None
+
+        return {
+            "cursor": cursor,
+            "data": data,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        }
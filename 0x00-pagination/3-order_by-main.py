@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Main file: sorted pages, rebuilt after delete() and insert()
+"""
+
+Server = __import__('3-hypermedia_del_pagination').Server
+
+server = Server()
+
+res = server.get_hyper_index(0, 3, order_by="-Count")
+print(res)
+
+# Deleting the top row drops the cached order: the next page starts
+# with what was the second row
+order = server.sort_orders().permutation("-Count")
+server.delete(order[0])
+print(server.get_hyper_index(0, 3, order_by="-Count"))
+
+# An inserted row takes its place in the order
+server.insert(["2016", "FEMALE", "ASIAN", "Ada", "1000", "1"])
+print(server.get_hyper_index(0, 2, order_by=["-Count", "Rank"]))
+print(server.get_hyper_index(0, 2, order_by=["Count", "Child's First Name"]))
+
+try:
+    server.get_hyper_index(0, 2, order_by="Colour")
+except KeyError as e:
+    print("KeyError: {}".format(e.args[0]))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the time a fresh process needs to serve its first page
+
+Each backend is timed in new interpreters so that nothing is cached
+in memory between runs; the operating system page cache stays warm.
+
+    python3 bench_cold_start.py [--scale N] [--repeat N] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(HERE, "Popular_Baby_Names.csv")
+
+# The original loader: every field as its own str object
+LIST_LOADER = """
+import csv
+with open(DATA_FILE, encoding="utf-8") as f:
+    dataset = list(csv.reader(f))[1:]
+dataset[0:10]
+"""
+
+SERVER_LOADER = """
+sys.path.insert(0, HERE)
+Server = __import__("1-simple_pagination").Server
+Server(backend=BACKEND, data_file=DATA_FILE).get_page(1, 10)
+"""
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{body}
+print(time.perf_counter() - start)
+"""
+
+# label -> (loader, backend)
+MODES = {
+    "csv list (original)": (LIST_LOADER, None),
+    "columnar from csv": (SERVER_LOADER, "csv"),
+    "columnar snapshot": (SERVER_LOADER, "columnar"),
+    "mmap + row index": (SERVER_LOADER, "mmap"),
+}
+
+
+def scaled_copy(source: str, scale: int, directory: str) -> str:
+    """Write `source` with its data rows repeated `scale` times"""
+    target = os.path.join(directory, "names_x{}.csv".format(scale))
+    with open(source, encoding="utf-8") as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith("\n"):
+        body += "\n"
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+    return target
+
+
+def time_mode(loader: str, backend: str, data_file: str,
+              repeat: int) -> List[float]:
+    """Run `loader` in `repeat` fresh interpreters and return the times"""
+    setup = "HERE = {!r}\nDATA_FILE = {!r}\nBACKEND = {!r}\n".format(
+        HERE, data_file, backend)
+    code = PROBE.format(body=setup + loader)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], check=True,
+                             capture_output=True, text=True).stdout
+        times.append(float(out))
+    return times
+
+
+def main() -> None:
+    """Time every mode and print a table, optionally saving JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=1,
+                        help="repeat the dataset rows N times")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="fresh processes per mode")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_cold_start_")
+    try:
+        data_file = scaled_copy(DATA_FILE, args.scale, workdir)
+        # Write the snapshot and the row index once, before timing
+        for backend in ("columnar", "mmap"):
+            time_mode(SERVER_LOADER, backend, data_file, 1)
+
+        results: Dict[str, Dict[str, float]] = {}
+        for label, (loader, backend) in MODES.items():
+            times = time_mode(loader, backend, data_file, args.repeat)
+            results[label] = {"median_s": statistics.median(times),
+                              "min_s": min(times)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results["csv list (original)"]["median_s"]
+    print("rows x{}, {} runs each".format(args.scale, args.repeat))
+    for label, result in results.items():
+        print("{:<22} {:>9.1f} ms  {:>6.1f}x".format(
+            label, result["median_s"] * 1000,
+            baseline / result["median_s"]))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scale": args.scale, "results": results}, f,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
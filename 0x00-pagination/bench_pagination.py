@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pagination Server variants
+
+Measures, for every dataset scale and backend:
+  - cold load, with and without the snapshot / row index on disk
+  - warm get_page and get_hyper for each page size
+  - warm get_hyper_index for each page size and deletion density
+
+Results go to a JSON file; --compare prints the ratio against an
+earlier run so regressions show up between commits.
+
+    python3 bench_pagination.py --scales 1,10,100 --json HEAD.json
+    python3 bench_pagination.py --json new.json --compare HEAD.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from bench_cold_start import DATA_FILE, scaled_copy
+from dataset_loader import clear_shared, load_dataset
+from mapped_dataset import index_path
+from snapshot import snapshot_path
+
+SimpleServer = __import__("1-simple_pagination").Server
+HyperServer = __import__("2-hypermedia_pagination").Server
+DeletionServer = __import__("3-hypermedia_del_pagination").Server
+
+BACKENDS = ("columnar", "csv", "mmap")
+PAGE_SIZES = (1, 10, 100, 1000, 10000)
+DELETION_DENSITIES = (0.0, 0.1, 0.5)
+SEED = 0
+
+
+def measure(operation: Callable[[], object],
+            min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Call `operation` repeatedly for at least `min_time` seconds.
+
+    Returns:
+    Dict[str, float]: Number of calls and mean / best time per call
+    """
+    times: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while not times or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+    return {"calls": len(times),
+            "mean_us": sum(times) / len(times) * 1e6,
+            "best_us": min(times) * 1e6}
+
+
+def bench_cold_load(data_file: str, backend: str) -> List[Dict]:
+    """Time load_dataset without, then with, its sidecar file"""
+    sidecars = {"columnar": snapshot_path, "mmap": index_path}
+    results = []
+    for state in ("build", "load"):
+        if state == "build":
+            if backend not in sidecars:
+                continue
+            sidecar = sidecars[backend](data_file)
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        start = time.perf_counter()
+        load_dataset(data_file, backend)
+        elapsed = time.perf_counter() - start
+        results.append({"op": "cold_" + state, "mean_us": elapsed * 1e6})
+    return results
+
+
+def bench_warm(data_file: str, backend: str, page_sizes: List[int],
+               densities: List[float], min_time: float) -> List[Dict]:
+    """Time get_page, get_hyper and get_hyper_index on warm servers"""
+    rng = random.Random(SEED)
+    simple = SimpleServer(backend=backend, data_file=data_file)
+    hyper = HyperServer(backend=backend, data_file=data_file)
+    size = len(simple.dataset())
+    hyper.dataset()
+    results = []
+
+    for page_size in page_sizes:
+        pages = max(size // page_size, 1)
+        for op, server in (("get_page", simple), ("get_hyper", hyper)):
+            method = getattr(server, op)
+            result = measure(
+                lambda: method(rng.randint(1, pages), page_size), min_time)
+            results.append(dict(result, op=op, page_size=page_size))
+
+    for density in densities:
+        server = DeletionServer(backend=backend, data_file=data_file)
+        for index in rng.sample(range(size), int(size * density)):
+            server.delete(index)
+        for page_size in page_sizes:
+            result = measure(
+                lambda: server.get_hyper_index(rng.randrange(size),
+                                               page_size), min_time)
+            results.append(dict(result, op="get_hyper_index",
+                                page_size=page_size, deleted=density))
+    return results
+
+
+def environment() -> Dict[str, Optional[str]]:
+    """Describe the machine and commit the results belong to"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True,
+            capture_output=True, text=True,
+            cwd=os.path.dirname(DATA_FILE)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def result_key(result: Dict) -> tuple:
+    """Identify the same measurement across runs"""
+    return tuple(result.get(field) for field in
+                 ("scale", "backend", "op", "page_size", "deleted"))
+
+
+def compare(results: List[Dict], baseline_file: str) -> None:
+    """Print each result's time relative to `baseline_file`"""
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    print("\nvs {} (>1.00 is slower)".format(baseline_file))
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old and old["mean_us"]:
+            print("{:<70} {:>6.2f}".format(
+                " ".join(str(v) for v in result_key(result)
+                         if v is not None),
+                result["mean_us"] / old["mean_us"]))
+
+
+def parse_list(text: str, cast: Callable = int) -> List:
+    """Parse a comma-separated command line list"""
+    return [cast(item) for item in text.split(",") if item]
+
+
+def main() -> None:
+    """Run the suite and print or save the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,10",
+                        help="dataset copies to synthesize, e.g. 10,1000")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--page-sizes",
+                        default=",".join(map(str, PAGE_SIZES)))
+    parser.add_argument("--deleted",
+                        default=",".join(map(str, DELETION_DENSITIES)),
+                        help="deletion densities for get_hyper_index")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds spent on each warm measurement")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="earlier results to compare to")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    workdir = tempfile.mkdtemp(prefix="bench_pagination_")
+    try:
+        for scale in parse_list(args.scales):
+            data_file = scaled_copy(DATA_FILE, scale, workdir)
+            for backend in args.backends.split(","):
+                found = bench_cold_load(data_file, backend)
+                found += bench_warm(data_file, backend,
+                                    parse_list(args.page_sizes),
+                                    parse_list(args.deleted, float),
+                                    args.min_time)
+                for result in found:
+                    result.update(scale=scale, backend=backend)
+                    print("{:<70} {:>12.1f} us".format(
+                        " ".join(str(v) for v in result_key(result)
+                                 if v is not None), result["mean_us"]))
+                results.extend(found)
+            clear_shared()
+            os.remove(data_file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results},
+                      f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Module for a columnar, array-backed copy of a CSV dataset
+"""
+
+import csv
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, islice
+from typing import Dict, Iterator, List, Sequence, Union
+
+INT = "int"
+CATEGORY = "category"
+TEXT = "text"
+
+# Year of Birth, Gender, Ethnicity, Child's First Name, Count, Rank
+BABY_NAMES_SCHEMA = (INT, CATEGORY, CATEGORY, TEXT, INT, INT)
+
+# Rows parsed per batch while loading
+LOAD_CHUNK = 4096
+
+# Unsigned typecodes, from the narrowest to the widest
+_WIDTHS = ("B", "H", "I", "Q")
+
+
+def _widen(values: array, largest: int) -> array:
+    """
+    Return `values`, or a wider copy of it, able to hold `largest`.
+
+    Parameters:
+    values (array): Unsigned integer array
+    largest (int): Biggest value about to be stored
+
+    Returns:
+    array: An array whose typecode fits `largest`
+    """
+    typecode = values.typecode
+    while largest >= 1 << (8 * array(typecode).itemsize):
+        typecode = _WIDTHS[_WIDTHS.index(typecode) + 1]
+    if typecode == values.typecode:
+        return values
+    return array(typecode, values)
+
+
+class IntColumn:
+    """Non-negative integers packed in an unsigned array."""
+
+    def __init__(self, values: Sequence[int] = None) -> None:
+        self.values = array("H") if values is None else values
+
+    def extend(self, cells: Sequence[str]) -> bool:
+        """Append `cells`; return False unless they are canonical ints."""
+        try:
+            numbers = list(map(int, cells))
+        except ValueError:
+            return False
+        if min(numbers) < 0 or list(map(str, numbers)) != list(cells):
+            return False
+        self.values = _widen(self.values, max(numbers, default=0))
+        self.values.extend(numbers)
+        return True
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.values[i])
+
+
+class CategoryColumn:
+    """Interned values stored as small integer codes."""
+
+    def __init__(self, categories: List[str] = None,
+                 codes: Sequence[int] = None) -> None:
+        self.categories: List[str] = categories or []
+        self.lookup: Dict[str, int] = {
+            category: code for code, category in enumerate(self.categories)}
+        self.codes = array("B") if codes is None else codes
+
+    def _code(self, cell: str) -> int:
+        code = self.lookup.get(cell)
+        if code is None:
+            code = self.lookup[cell] = len(self.categories)
+            self.categories.append(cell)
+        return code
+
+    def extend(self, cells: Sequence[str]) -> bool:
+        """Append `cells`, interning values not seen before."""
+        codes = [self._code(cell) for cell in cells]
+        self.codes = _widen(self.codes, len(self.categories) - 1)
+        self.codes.extend(codes)
+        return True
+
+    def __getitem__(self, i: int) -> str:
+        return self.categories[self.codes[i]]
+
+
+class TextColumn:
+    """Strings concatenated in one UTF-8 pool and addressed by offset."""
+
+    def __init__(self, pool: bytes = None,
+                 offsets: Sequence[int] = None) -> None:
+        self.pool = bytearray() if pool is None else pool
+        self.offsets = array("I", [0]) if offsets is None else offsets
+
+    def extend(self, cells: Sequence[str]) -> bool:
+        """Append `cells` to the string pool."""
+        encoded = [cell.encode("utf-8") for cell in cells]
+        ends = accumulate(map(len, encoded), initial=len(self.pool))
+        self.pool += b"".join(encoded)
+        self.offsets = _widen(self.offsets, len(self.pool))
+        self.offsets.extend(islice(ends, 1, None))
+        return True
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return str(self.pool[start:end], "utf-8")
+
+
+_COLUMN_TYPES = {INT: IntColumn, CATEGORY: CategoryColumn, TEXT: TextColumn}
+
+
+def _extend_columns(columns: List, chunk: List[List[str]],
+                    stored: int) -> None:
+    """
+    Append a chunk of full-width rows to `columns`.
+
+    Parameters:
+    columns (List): Columns to extend, replaced in place when an int
+        column turns out to hold text
+    chunk (List[List[str]]): Rows of one cell per column
+    stored (int): Rows already held by the columns
+    """
+    for i, cells in enumerate(zip(*chunk)):
+        if not columns[i].extend(cells):
+            # Not an int column after all: keep it as text
+            text = TextColumn()
+            text.extend([columns[i][j] for j in range(stored)])
+            text.extend(cells)
+            columns[i] = text
+
+
+class ColumnarDataset:
+    """
+    Read-only dataset stored column by column.
+
+    Rows are rebuilt as lists of strings only when they are read, so
+    slicing a page costs memory for that page alone.
+    """
+
+    def __init__(self, header: List[str], columns: List, size: int,
+                 buffer: object = None,
+                 blanks: Sequence[int] = None) -> None:
+        self.header = header
+        self.columns = columns
+        self.size = size
+        # Sorted positions of blank lines, read back as [] rows; the
+        # columns only hold the other rows
+        self.blanks = array("I") if blanks is None else blanks
+        # Keeps alive the mapping columns loaded from a snapshot point into
+        self.buffer = buffer
+
+    @classmethod
+    def from_csv(cls, path: str,
+                 schema: Sequence[str] = BABY_NAMES_SCHEMA
+                 ) -> "ColumnarDataset":
+        """
+        Load a CSV file whose first line is a header.
+
+        Blank lines are kept as empty rows, as csv.reader returns them.
+
+        Parameters:
+        path (str): CSV file to read
+        schema (Sequence[str]): Kind of each column (int, category, text)
+
+        Returns:
+        ColumnarDataset: The loaded dataset
+
+        Raises:
+        ValueError: A row does not have one field per schema column
+        """
+        columns = [_COLUMN_TYPES[kind]() for kind in schema]
+        blanks = array("I")
+        chunk: List[List[str]] = []
+        size = stored = 0
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            for row in reader:
+                if not row:
+                    blanks.append(size)
+                elif len(row) != len(schema):
+                    raise ValueError(
+                        "{}, line {}: expected {} fields, got {}".format(
+                            path, reader.line_num, len(schema), len(row)))
+                else:
+                    chunk.append(row)
+                    if len(chunk) == LOAD_CHUNK:
+                        _extend_columns(columns, chunk, stored)
+                        stored += len(chunk)
+                        chunk = []
+                size += 1
+        if chunk:
+            _extend_columns(columns, chunk, stored)
+        for column in columns:
+            if isinstance(column, TextColumn):
+                column.pool = bytes(column.pool)
+        return cls(header, columns, size, blanks=blanks)
+
+    def row(self, i: int) -> List[str]:
+        """Rebuild the row at position `i`"""
+        if self.blanks:
+            before = bisect_right(self.blanks, i)
+            if before and self.blanks[before - 1] == i:
+                return []
+            i -= before
+        return [column[i] for column in self.columns]
+
+    def column(self, index: int) -> Iterator[str]:
+        """Yield every value of column `index`, in row order"""
+        column = self.columns[index]
+        if isinstance(column, CategoryColumn):
+            values = map(column.categories.__getitem__, column.codes)
+        else:
+            values = (column[i]
+                      for i in range(self.size - len(self.blanks)))
+        return self._with_blanks(values) if self.blanks else values
+
+    def _with_blanks(self, values: Iterator[str]) -> Iterator[str]:
+        """Yield `values`, with "" at the position of each blank row"""
+        blanks = iter(self.blanks)
+        blank = next(blanks, None)
+        for position in range(self.size):
+            if position == blank:
+                blank = next(blanks, None)
+                yield ""
+            else:
+                yield next(values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[List[str]]:
+        return (self.row(i) for i in range(self.size))
+
+    def __getitem__(self, key: Union[int, slice]
+                    ) -> Union[List[str], List[List[str]]]:
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.size))]
+        if key < 0:
+            key += self.size
+        if not 0 <= key < self.size:
+            raise IndexError("dataset index out of range")
+        return self.row(key)
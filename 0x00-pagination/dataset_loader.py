@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Module for loading a pagination dataset with a chosen backend
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Tuple, Union
+
+from columnar_dataset import ColumnarDataset
+from mapped_dataset import MappedCsvDataset
+from snapshot import load_snapshot, write_snapshot
+
+Dataset = Union[ColumnarDataset, MappedCsvDataset]
+
+
+def load_columnar(path: str) -> ColumnarDataset:
+    """
+    Load `path` into typed columns, through its snapshot if possible.
+
+    A snapshot written from the current version of the file is
+    mapped directly; otherwise the CSV is parsed and the snapshot is
+    (re)written for the next process. A read-only data directory only
+    costs the snapshot, not the load.
+
+    Parameters:
+    path (str): CSV file to load
+
+    Returns:
+    ColumnarDataset: The loaded dataset
+    """
+    dataset = load_snapshot(path)
+    if dataset is None:
+        dataset = ColumnarDataset.from_csv(path)
+        try:
+            write_snapshot(dataset, path)
+        except OSError:
+            pass
+    return dataset
+
+
+# backend name -> loader taking the CSV path
+BACKENDS: Dict[str, Callable[[str], Dataset]] = {
+    "columnar": load_columnar,
+    "csv": ColumnarDataset.from_csv,
+    "mmap": MappedCsvDataset,
+}
+
+
+def load_dataset(path: str, backend: str = "columnar") -> Dataset:
+    """
+    Load the CSV file at `path`.
+
+    Parameters:
+    path (str): CSV file to load
+    backend (str): "columnar" loads typed columns from a snapshot,
+        parsing the file only when the snapshot is stale, "csv" always
+        parses the file and "mmap" maps it and parses only the rows
+        that are read
+
+    Returns:
+    Dataset: A sequence of rows supporting len() and slicing
+    """
+    if backend not in BACKENDS:
+        raise ValueError("unknown dataset backend: {!r}".format(backend))
+    return BACKENDS[backend](path)
+
+
+# (absolute path, backend, size, mtime_ns) -> loaded dataset
+_shared: Dict[Tuple[str, str, int, int], Dataset] = {}
+# key -> lock held by the thread loading it
+_loading: Dict[Tuple[str, str, int, int], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def shared_dataset(path: str, backend: str = "columnar") -> Dataset:
+    """
+    Return the process-wide copy of `path`, loading it at most once.
+
+    Copies are keyed by file, backend, size and mtime, so an updated
+    file is loaded again and replaces the stale copy. Concurrent
+    callers asking for a file being loaded wait for that load instead
+    of starting their own. Loaded datasets are read-only and safe to
+    share between threads.
+
+    Parameters:
+    path (str): CSV file to load
+    backend (str): Backend passed to load_dataset
+
+    Returns:
+    Dataset: The shared dataset
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), backend, stat.st_size, stat.st_mtime_ns)
+    dataset = _shared.get(key)
+    if dataset is not None:
+        return dataset
+
+    with _registry_lock:
+        lock = _loading.setdefault(key, threading.Lock())
+    with lock:
+        dataset = _shared.get(key)
+        if dataset is None:
+            dataset = load_dataset(path, backend)
+            with _registry_lock:
+                for stale in [other for other in _shared
+                              if other[:2] == key[:2]]:
+                    del _shared[stale]
+                _shared[key] = dataset
+                _loading.pop(key, None)
+    return dataset
+
+
+def clear_shared() -> None:
+    """Forget every shared dataset, e.g. between benchmark runs"""
+    with _registry_lock:
+        _shared.clear()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Module for deletion-aware indexing of a dataset
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Slots scanned linearly before jumping over dead ones with the tree
+SCAN_WINDOW = 64
+
+
+class LiveIndex:
+    """
+    Fenwick tree over a bitmap of live slots.
+
+    Deleting or reviving a slot, counting the live slots before a
+    position and finding the k-th live slot are all O(log n).
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self.size = size
+        self.live = size
+        self._bitmap = bytearray(b"\x01") * size
+        # Every slot is live, so node i covers exactly lowbit(i) slots
+        self._tree = array("q", (i & -i for i in range(size + 1)))
+        self._tree[0] = 0
+
+    def _rebuild(self, capacity: int) -> None:
+        """Reallocate the tree for `capacity` slots, in O(capacity)"""
+        self._bitmap.extend(bytes(capacity - len(self._bitmap)))
+        tree = array("q", [0])
+        tree.extend(self._bitmap)
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add(self, position: int, delta: int) -> None:
+        i = position + 1
+        tree = self._tree
+        capacity = len(tree) - 1
+        while i <= capacity:
+            tree[i] += delta
+            i += i & -i
+
+    def is_live(self, position: int) -> bool:
+        """Return True if `position` holds a live slot"""
+        return 0 <= position < self.size and self._bitmap[position] == 1
+
+    def delete(self, position: int) -> None:
+        """Mark `position` dead"""
+        if not self.is_live(position):
+            raise KeyError(position)
+        self._bitmap[position] = 0
+        self._add(position, -1)
+        self.live -= 1
+
+    def insert(self, position: int) -> None:
+        """Mark `position` live, growing the index past its end if needed"""
+        if self.is_live(position) or position < 0:
+            raise KeyError(position)
+        if position >= len(self._bitmap):
+            self._rebuild(max(position + 1, 2 * len(self._bitmap)))
+        self.size = max(self.size, position + 1)
+        self._bitmap[position] = 1
+        self._add(position, 1)
+        self.live += 1
+
+    def rank(self, position: int) -> int:
+        """Return the number of live slots before `position`"""
+        i = min(position, len(self._tree) - 1)
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def select(self, k: int) -> int:
+        """Return the position of the k-th live slot, counting from 0"""
+        if not 0 <= k < self.live:
+            raise IndexError("live slot out of range")
+        tree = self._tree
+        capacity = len(tree) - 1
+        position = 0
+        remaining = k + 1
+        step = 1 << capacity.bit_length()
+        while step:
+            probe = position + step
+            if probe <= capacity and tree[probe] < remaining:
+                position = probe
+                remaining -= tree[probe]
+            step >>= 1
+        return position
+
+    def next_live(self, start: int, count: int) -> List[int]:
+        """
+        Return up to `count` live positions at or after `start`.
+
+        Short gaps are skipped with a bitmap scan and long runs of
+        dead slots with rank/select, so each position found costs at
+        most O(log n) however many slots were deleted.
+
+        Args:
+            start (int): Position to search from.
+            count (int): Maximum number of positions to return.
+
+        Returns:
+            List[int]: Live positions, in ascending order.
+        """
+        found: List[int] = []
+        position = max(start, 0)
+        bitmap = self._bitmap
+        while len(found) < count and position < self.size:
+            window = min(position + SCAN_WINDOW, self.size)
+            hit = bitmap.find(1, position, window)
+            if hit < 0:
+                before = self.rank(window)
+                if before >= self.live:
+                    break
+                hit = self.select(before)
+            found.append(hit)
+            position = hit + 1
+        return found
+
+    def __iter__(self) -> Iterator[int]:
+        position = 0
+        while True:
+            chunk = self.next_live(position, SCAN_WINDOW)
+            if not chunk:
+                return
+            yield from chunk
+            position = chunk[-1] + 1
+
+
+class IndexedDataset:
+    """
+    Rows keyed by their original position in the dataset.
+
+    Behaves like the `{position: row}` dict it replaces, but keeps
+    track of deleted positions in a LiveIndex so that pages can skip
+    them without probing one key at a time.
+    """
+
+    def __init__(self, rows: Sequence[List]) -> None:
+        self._rows = rows
+        self._replaced: Dict[int, List] = {}
+        # position -> version at which its current row was inserted
+        self._inserted_at: Dict[int, int] = {}
+        self._index = LiveIndex(len(rows))
+        self._lock = threading.RLock()
+        self.version = 0
+
+    @property
+    def header(self) -> List[str]:
+        """Column names of the underlying dataset"""
+        return self._rows.header
+
+    @property
+    def capacity(self) -> int:
+        """One past the highest position ever used"""
+        return self._index.size
+
+    def __len__(self) -> int:
+        return self._index.live
+
+    def __contains__(self, position: object) -> bool:
+        return isinstance(position, int) and self._index.is_live(position)
+
+    def __getitem__(self, position: int) -> List:
+        if position not in self:
+            raise KeyError(position)
+        return self._row(position)
+
+    def _row(self, position: int) -> List:
+        """Row stored at the live `position`"""
+        row = self._replaced.get(position)
+        return self._rows[position] if row is None else row
+
+    def __delitem__(self, position: int) -> None:
+        self.delete(position)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._index)
+
+    def column(self, index: int) -> Iterator[str]:
+        """Yield column `index` of every live row, in position order"""
+        return (self[position][index] for position in self)
+
+    def columns(self, indexes: Sequence[int]
+                ) -> Tuple[List[int], List[List[str]]]:
+        """
+        Read some columns of every live row under one lock.
+
+        Returns:
+            Tuple[List[int], List[List[str]]]: Live positions, and the
+                values of each column in that order.
+        """
+        with self._lock:
+            positions = list(self._index)
+            rows = [self._row(position) for position in positions]
+        # Short and blank rows read "", as the datasets' column()
+        return positions, [[row[index] if index < len(row) else ""
+                            for row in rows] for index in indexes]
+
+    def get(self, position: int, default: Optional[List] = None
+            ) -> Optional[List]:
+        """Return the row at `position`, or `default` if it is deleted"""
+        return self[position] if position in self else default
+
+    def keys(self) -> Iterator[int]:
+        """Live positions, in ascending order"""
+        return iter(self._index)
+
+    def inserted_at(self, position: int) -> int:
+        """Return the version that inserted `position`, 0 for original rows"""
+        return self._inserted_at.get(position, 0)
+
+    def delete(self, position: int) -> None:
+        """Delete the row at `position`; its key is never reused implicitly"""
+        with self._lock:
+            self._index.delete(position)
+            self._replaced.pop(position, None)
+            self._inserted_at.pop(position, None)
+            self.version += 1
+
+    def insert(self, row: List, position: Optional[int] = None) -> int:
+        """
+        Insert `row`, either in a deleted slot or after the last one.
+
+        Args:
+            row (List): Row to insert.
+            position (int): Deleted slot to reuse, None to append.
+
+        Returns:
+            int: The position the row was stored at.
+        """
+        with self._lock:
+            if position is None:
+                position = self.capacity
+            self._index.insert(position)
+            self.version += 1
+            self._replaced[position] = row
+            self._inserted_at[position] = self.version
+        return position
+
+    def next_live(self, start: int, count: int) -> List[int]:
+        """Return up to `count` live positions at or after `start`"""
+        with self._lock:
+            return self._index.next_live(start, count)
+
+    def live_rows(self, start: int, count: int,
+                  snapshot: Optional[int] = None) -> List[Tuple[int, List]]:
+        """
+        Return up to `count` live rows at or after `start`.
+
+        Positions and rows are read under one lock, so a concurrent
+        delete cannot remove a row between finding and reading it.
+
+        Args:
+            start (int): Position to search from.
+            count (int): Maximum number of rows to return.
+            snapshot (int): Skip rows inserted after this version,
+                None to return every live row.
+
+        Returns:
+            List[Tuple[int, List]]: (position, row) pairs, in position
+                order.
+        """
+        found: List[Tuple[int, List]] = []
+        with self._lock:
+            while len(found) < count:
+                batch = self._index.next_live(start, count - len(found))
+                if not batch:
+                    break
+                start = batch[-1] + 1
+                found.extend((position, self._row(position))
+                             for position in batch
+                             if snapshot is None or
+                             self.inserted_at(position) <= snapshot)
+        return found
+
+    def rows(self, positions: Iterable[int]) -> List[Tuple[int, List]]:
+        """Return the (position, row) pairs of the live `positions`"""
+        with self._lock:
+            return [(position, self._row(position))
+                    for position in positions if position in self]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Module for a memory-mapped CSV dataset with a row-offset index
+"""
+
+import csv
+import mmap
+import os
+import re
+import struct
+from array import array
+from typing import Iterator, List, Sequence, Tuple, Union
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"CSVIDX01"
+# magic, source size, source mtime (ns), number of rows
+INDEX_HEADER = struct.Struct("<8sQQQ")
+
+# Rows parsed per batch when iterating
+ITER_CHUNK = 4096
+
+_NEWLINE = re.compile(b"\n")
+
+
+def index_path(path: str) -> str:
+    """Return the sidecar index file used for `path`"""
+    return path + INDEX_SUFFIX
+
+
+def _source_stamp(path: str) -> Tuple[int, int]:
+    """Return the (size, mtime_ns) pair an index is valid for"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_index(path: str) -> array:
+    """
+    Scan `path` and write its sidecar index of row byte offsets.
+
+    The offsets are returned even if the index cannot be written.
+
+    The first line is the header and is not indexed. Offsets are the
+    start of every data row followed by the end of the last one, so
+    row `i` spans `offsets[i]:offsets[i + 1]`. Records must not
+    contain quoted line breaks.
+
+    Parameters:
+    path (str): CSV file to index
+
+    Returns:
+    array: The row offsets
+    """
+    size, mtime_ns = _source_stamp(path)
+    offsets = array("Q")
+    if size:
+        with open(path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets.extend(m.end() for m in _NEWLINE.finditer(mm))
+        if not offsets or offsets[-1] != size:
+            offsets.append(size)
+    rows = max(len(offsets) - 1, 0)
+
+    tmp = "{}.{}.tmp".format(index_path(path), os.getpid())
+    try:
+        with open(tmp, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, size, mtime_ns, rows))
+            offsets.tofile(f)
+        os.replace(tmp, index_path(path))
+    except OSError:
+        # e.g. a read-only data directory: serve the offsets from
+        # memory, and scan again next time
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return offsets
+
+
+class MappedCsvDataset:
+    """
+    Read-only view of a CSV file that parses rows on demand.
+
+    Both the data file and its index are memory-mapped, so opening a
+    dataset does not depend on its size and every process reading
+    the same file shares the operating system page cache.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self._data = self._map(self._file)
+        self._index_file, self._index = None, None
+        self.offsets = self._load_index()
+        self.size = max(len(self.offsets) - 1, 0)
+        self.header = self._parse(self._data[:self.offsets[0]])[0] \
+            if len(self.offsets) else []
+
+    @staticmethod
+    def _map(f) -> Union[mmap.mmap, bytes]:
+        """Map `f` read-only; empty files cannot be mapped"""
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self) -> Sequence[int]:
+        """Map the sidecar index, rebuilding it when stale or missing"""
+        try:
+            f = open(index_path(self.path), "rb")
+        except FileNotFoundError:
+            return build_index(self.path)
+        index = self._map(f)
+        if len(index) >= INDEX_HEADER.size:
+            magic, size, mtime_ns, rows = INDEX_HEADER.unpack_from(index)
+            expected = INDEX_HEADER.size + 8 * (rows + 1)
+            if (magic == INDEX_MAGIC and len(index) == expected and
+                    (size, mtime_ns) == _source_stamp(self.path)):
+                self._index_file, self._index = f, index
+                return memoryview(index)[INDEX_HEADER.size:].cast("Q")
+            index.close()
+        f.close()
+        return build_index(self.path)
+
+    @staticmethod
+    def _parse(raw: bytes) -> List[List[str]]:
+        """Parse a run of complete CSV lines"""
+        return list(csv.reader(raw.decode("utf-8").splitlines()))
+
+    def rows(self, start: int, end: int) -> List[List[str]]:
+        """
+        Parse rows `start` (inclusive) to `end` (exclusive).
+
+        Parameters:
+        start (int): First row position
+        end (int): Position after the last row
+
+        Returns:
+        List[List[str]]: The parsed rows
+        """
+        start, end = max(start, 0), min(end, self.size)
+        if start >= end:
+            return []
+        return self._parse(self._data[self.offsets[start]:self.offsets[end]])
+
+    def close(self) -> None:
+        """Release the mappings and file handles"""
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        for mapped in (self._index, self._data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for f in (self._index_file, self._file):
+            if f is not None:
+                f.close()
+
+    def column(self, index: int) -> Iterator[str]:
+        """Yield every value of column `index`, in row order; rows too
+        short to have it, blank ones included, yield ""
+        """
+        return (row[index] if index < len(row) else "" for row in self)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for start in range(0, self.size, ITER_CHUNK):
+            yield from self.rows(start, start + ITER_CHUNK)
+
+    def __getitem__(self, key: Union[int, slice]
+                    ) -> Union[List[str], List[List[str]]]:
+        if isinstance(key, slice):
+            start, end, step = key.indices(self.size)
+            if step == 1:
+                return self.rows(start, end)
+            return [self[i] for i in range(start, end, step)]
+        if key < 0:
+            key += self.size
+        if not 0 <= key < self.size:
+            raise IndexError("dataset index out of range")
+        return self.rows(key, key + 1)[0]
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Module for streaming dataset rows with bounded memory
+"""
+
+import csv
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence
+
+# Rows held in memory at once while streaming
+STREAM_CHUNK = 1024
+
+
+def _chunked(rows: Iterator[List[str]],
+             chunk_size: int) -> Iterator[List[str]]:
+    """Pull `rows` `chunk_size` at a time and yield them one by one"""
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from chunk
+
+
+def iter_csv_rows(path: str, start: int = 0, stop: Optional[int] = None,
+                  chunk_size: int = STREAM_CHUNK) -> Iterator[List[str]]:
+    """
+    Stream data rows `start` to `stop` of a CSV file with a header.
+
+    Parameters:
+    path (str): CSV file to read
+    start (int): Position of the first row
+    stop (Optional[int]): Position after the last row, None for the end
+    chunk_size (int): Rows read per batch
+
+    Returns:
+    Iterator[List[str]]: The rows, in file order
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from _chunked(islice(reader, start, stop), chunk_size)
+
+
+def iter_dataset_rows(dataset: Sequence[List[str]], start: int = 0,
+                      stop: Optional[int] = None,
+                      chunk_size: int = STREAM_CHUNK
+                      ) -> Iterator[List[str]]:
+    """
+    Stream rows `start` to `stop` of an already loaded dataset.
+
+    Rows are sliced `chunk_size` at a time, so lazy datasets only
+    rebuild one chunk of rows at once.
+
+    Returns:
+    Iterator[List[str]]: The rows, in dataset order
+    """
+    stop = len(dataset) if stop is None else min(stop, len(dataset))
+    for chunk_start in range(start, stop, chunk_size):
+        yield from dataset[chunk_start:min(chunk_start + chunk_size, stop)]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Module for secondary indexes over a dataset's columns
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# Columns a dashboard filters on
+INDEXED_COLUMNS = ("Year of Birth", "Gender", "Ethnicity",
+                   "Child's First Name")
+
+# Distinct filters whose matches are kept
+LOOKUP_CACHE_SIZE = 64
+
+_EMPTY = array("I")
+
+
+def intersect(positions: Sequence[Sequence[int]]) -> array:
+    """
+    Intersect sorted position arrays.
+
+    Each position of the shortest array is searched in the others
+    with a bisect that resumes where the previous one stopped, so the
+    cost is O(m log n) for a shortest array of length m.
+
+    Parameters:
+    positions (Sequence[Sequence[int]]): Sorted arrays to intersect
+
+    Returns:
+    array: Positions found in every array, in ascending order
+    """
+    ordered = sorted(positions, key=len)
+    if not ordered:
+        return array("I")
+    result = array("I", ordered[0])
+    for other in ordered[1:]:
+        kept = array("I")
+        lo = 0
+        for position in result:
+            lo = bisect_left(other, position, lo)
+            if lo == len(other):
+                break
+            if other[lo] == position:
+                kept.append(position)
+        result = kept
+    return result
+
+
+class SecondaryIndexes:
+    """
+    Sorted row positions for every value of the filtered columns.
+
+    Each column is indexed the first time it is filtered on; the
+    default indexed columns can be built up front with build().
+    """
+
+    def __init__(self, dataset: Sequence[List[str]]) -> None:
+        self.dataset = dataset
+        self.header = list(dataset.header)
+        self._indexes: Dict[str, Dict[str, array]] = {}
+        self._lookups: Dict[Tuple, array] = {}
+        # Guards evictions from _lookups against concurrent requests
+        self._lock = threading.Lock()
+
+    def build(self, columns: Iterable[str] = INDEXED_COLUMNS) -> None:
+        """Index `columns` now rather than on first use"""
+        for column in columns:
+            self.index(column)
+
+    def index(self, column: str) -> Dict[str, array]:
+        """Return the value -> positions index of `column`"""
+        index = self._indexes.get(column)
+        if index is None:
+            if column not in self.header:
+                raise KeyError("unknown column: {!r}".format(column))
+            index = {}
+            values = self.dataset.column(self.header.index(column))
+            for position, value in enumerate(values):
+                positions = index.get(value)
+                if positions is None:
+                    positions = index[value] = array("I")
+                positions.append(position)
+            self._indexes[column] = index
+        return index
+
+    def positions(self, column: str, value: Any) -> Sequence[int]:
+        """
+        Return the positions where `column` equals `value`.
+
+        `value` may also be a list, tuple or set, matching any of them.
+        """
+        index = self.index(column)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            merged = set()
+            for item in value:
+                merged.update(index.get(str(item), _EMPTY))
+            return array("I", sorted(merged))
+        return index.get(str(value), _EMPTY)
+
+    def lookup(self, where: Mapping[str, Any]) -> Sequence[int]:
+        """
+        Return the sorted positions of the rows matching every filter.
+
+        Parameters:
+        where (Mapping[str, Any]): Column name -> value(s) to match
+
+        Returns:
+        Sequence[int]: Matching row positions
+        """
+        key = tuple(sorted(
+            (column, tuple(sorted(map(str, value)))
+             if isinstance(value, (list, tuple, set, frozenset))
+             else str(value))
+            for column, value in where.items()))
+        found = self._lookups.get(key)
+        if found is None:
+            found = intersect([self.positions(column, value)
+                               for column, value in where.items()])
+            with self._lock:
+                if len(self._lookups) >= LOOKUP_CACHE_SIZE:
+                    del self._lookups[next(iter(self._lookups))]
+                self._lookups[key] = found
+        return found
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Module for the binary snapshot format of a ColumnarDataset
+
+Layout (header integers are little-endian):
+
+    header   magic, source size, source mtime (ns), rows,
+             payload CRC-32, metadata length
+    metadata JSON: column names, column kinds, category strings
+             and where each column's arrays, and the positions of
+             blank rows, sit in the payload
+    payload  typed column arrays and string heaps in native byte
+             order, each aligned to 8 bytes
+
+Loading maps the file and casts memoryviews over the payload, so no
+column is copied or parsed.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional
+
+from columnar_dataset import (CategoryColumn, ColumnarDataset, IntColumn,
+                              TextColumn)
+
+SNAPSHOT_SUFFIX = ".snap"
+SNAPSHOT_MAGIC = b"BNSNAP02"
+# magic, source size, source mtime (ns), rows, payload crc32, meta length
+SNAPSHOT_HEADER = struct.Struct("<8sQQQII")
+ALIGNMENT = 8
+
+
+def snapshot_path(path: str) -> str:
+    """Return the snapshot file used for the CSV file `path`"""
+    return path + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(dataset: ColumnarDataset, source: str,
+                   path: Optional[str] = None) -> str:
+    """
+    Write `dataset`, loaded from the CSV file `source`, as a snapshot.
+
+    Parameters:
+    dataset (ColumnarDataset): Dataset to save
+    source (str): CSV file the dataset was loaded from
+    path (Optional[str]): Snapshot file, next to `source` by default
+
+    Returns:
+    str: Path of the snapshot written
+    """
+    path = path or snapshot_path(source)
+    payload = bytearray()
+    columns: List[Dict] = []
+
+    def blob(data: bytes) -> List[int]:
+        payload.extend(bytes(-len(payload) % ALIGNMENT))
+        start = len(payload)
+        payload.extend(data)
+        return [start, len(data)]
+
+    for column in dataset.columns:
+        if isinstance(column, IntColumn):
+            columns.append({"kind": "int",
+                            "typecode": column.values.typecode,
+                            "values": blob(column.values.tobytes())})
+        elif isinstance(column, CategoryColumn):
+            columns.append({"kind": "category",
+                            "categories": column.categories,
+                            "typecode": column.codes.typecode,
+                            "codes": blob(column.codes.tobytes())})
+        else:
+            columns.append({"kind": "text",
+                            "typecode": column.offsets.typecode,
+                            "offsets": blob(column.offsets.tobytes()),
+                            "pool": blob(bytes(column.pool))})
+
+    blanks = {"typecode": "I",
+              "positions": blob(array("I", dataset.blanks).tobytes())}
+    meta = json.dumps({"header": dataset.header, "columns": columns,
+                       "blanks": blanks,
+                       "byteorder": sys.byteorder}).encode("utf-8")
+    meta += b" " * (-(SNAPSHOT_HEADER.size + len(meta)) % ALIGNMENT)
+    stat = os.stat(source)
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, stat.st_size, stat.st_mtime_ns, len(dataset),
+        zlib.crc32(payload), len(meta))
+
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(meta)
+        f.write(payload)
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(source: str,
+                  path: Optional[str] = None) -> Optional[ColumnarDataset]:
+    """
+    Map the snapshot of the CSV file `source`.
+
+    Parameters:
+    source (str): CSV file the snapshot must have been written from
+    path (Optional[str]): Snapshot file, next to `source` by default
+
+    Returns:
+    Optional[ColumnarDataset]: The dataset, or None if the snapshot is
+        missing, was written from another version of `source`, or is
+        corrupt
+    """
+    path = path or snapshot_path(source)
+    try:
+        stat = os.stat(source)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    payload = None
+    try:
+        magic, size, mtime_ns, rows, crc, meta_length = \
+            SNAPSHOT_HEADER.unpack_from(mm)
+        if (magic != SNAPSHOT_MAGIC or
+                (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns)):
+            raise ValueError("stale snapshot")
+        start = SNAPSHOT_HEADER.size + meta_length
+        meta = json.loads(bytes(mm[SNAPSHOT_HEADER.size:start]))
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError("snapshot written on another byte order")
+        payload = memoryview(mm)[start:]
+        if zlib.crc32(payload) != crc:
+            raise ValueError("corrupt snapshot")
+    except (ValueError, KeyError, struct.error):
+        if payload is not None:
+            payload.release()
+        mm.close()
+        return None
+
+    def view(where: List[int], typecode: str = "B") -> memoryview:
+        offset, length = where
+        return payload[offset:offset + length].cast(typecode)
+
+    columns = []
+    for column in meta["columns"]:
+        if column["kind"] == "int":
+            columns.append(IntColumn(view(column["values"],
+                                          column["typecode"])))
+        elif column["kind"] == "category":
+            columns.append(CategoryColumn(column["categories"],
+                                          view(column["codes"],
+                                               column["typecode"])))
+        else:
+            columns.append(TextColumn(view(column["pool"]),
+                                      view(column["offsets"],
+                                           column["typecode"])))
+    blanks = view(meta["blanks"]["positions"], meta["blanks"]["typecode"])
+    return ColumnarDataset(meta["header"], columns, rows, buffer=mm,
+                           blanks=blanks)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Module for cached sort orders over a dataset
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from live_index import IndexedDataset
+
+OrderBy = Union[str, Sequence[str]]
+
+# (column, descending) pairs, most significant first
+SortKey = Tuple[Tuple[str, bool], ...]
+
+
+def parse_order_by(order_by: OrderBy) -> SortKey:
+    """
+    Normalize an order_by argument.
+
+    Each term is a column name, prefixed with "-" to sort it in
+    descending order, e.g. ["-Count", "Child's First Name"].
+
+    Parameters:
+    order_by (OrderBy): One term or a sequence of terms
+
+    Returns:
+    SortKey: (column, descending) pairs
+    """
+    terms = [order_by] if isinstance(order_by, str) else list(order_by)
+    assert terms and all(isinstance(term, str) and term.lstrip("-")
+                         for term in terms)
+    return tuple((term.lstrip("-"), term.startswith("-")) for term in terms)
+
+
+def _sort_values(values: List[str]) -> List:
+    """Compare a column numerically if every value is an integer"""
+    if all(value.isascii() and value.isdigit() for value in values):
+        return [int(value) for value in values]
+    return values
+
+
+class SortOrders:
+    """
+    Lazily built permutations of a dataset, one per sort key.
+
+    A permutation lists row keys in sorted order, so a sorted page is
+    a slice of it. When the source has a `version` (an
+    IndexedDataset), every cached permutation is dropped as soon as
+    the version changes.
+    """
+
+    def __init__(self, source: Union[Sequence[List[str]], IndexedDataset]
+                 ) -> None:
+        self.source = source
+        self.header = list(source.header)
+        self._version = getattr(source, "version", None)
+        self._orders: Dict[SortKey, array] = {}
+        self._ranks: Dict[SortKey, array] = {}
+
+    def invalidate(self) -> None:
+        """Drop every cached permutation"""
+        self._orders.clear()
+        self._ranks.clear()
+        self._version = getattr(self.source, "version", None)
+
+    def _columns(self, indexes: Sequence[int]
+                 ) -> Tuple[Sequence[int], List[List[str]]]:
+        """Row keys of the source and the values of some columns"""
+        if isinstance(self.source, IndexedDataset):
+            # Consistent even while rows are deleted concurrently
+            return self.source.columns(indexes)
+        return (range(len(self.source)),
+                [list(self.source.column(index)) for index in indexes])
+
+    def permutation(self, order_by: OrderBy) -> Sequence[int]:
+        """
+        Return the row keys of the source sorted by `order_by`.
+
+        Parameters:
+        order_by (OrderBy): Sort terms, see parse_order_by
+
+        Returns:
+        Sequence[int]: Row keys in sorted order
+        """
+        if getattr(self.source, "version", None) != self._version:
+            self.invalidate()
+        sort_key = parse_order_by(order_by)
+        order = self._orders.get(sort_key)
+        if order is None:
+            for column, _ in sort_key:
+                if column not in self.header:
+                    raise KeyError("unknown column: {!r}".format(column))
+            keys, columns = self._columns(
+                [self.header.index(column) for column, _ in sort_key])
+            slots = list(range(len(keys)))
+            # Stable sorts, least significant term first
+            for (_, descending), values in zip(reversed(sort_key),
+                                               reversed(columns)):
+                values = _sort_values(values)
+                slots.sort(key=values.__getitem__, reverse=descending)
+            order = array("I", (keys[slot] for slot in slots))
+            self._orders[sort_key] = order
+        return order
+
+    def sort(self, keys: Iterable[int], order_by: OrderBy) -> List[int]:
+        """Sort a subset of row keys, e.g. filter matches, by `order_by`"""
+        order = self.permutation(order_by)
+        sort_key = parse_order_by(order_by)
+        ranks = self._ranks.get(sort_key)
+        if ranks is None:
+            ranks = array("I", [0]) * (max(order, default=-1) + 1)
+            for rank, key in enumerate(order):
+                ranks[key] = rank
+            self._ranks[sort_key] = ranks
+        return sorted(keys, key=ranks.__getitem__)
@@ -13,11 +13,14 @@ class BasicCache(BaseCaching):
         - caching system without limit
     """
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache."""
         if key and item:
-            self.cache_data[key] = item
+            self._store(key, item, ttl)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key."""
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
         return self.cache_data.get(key) if key else None
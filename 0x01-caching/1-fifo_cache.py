@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 """ FIFOCache module. """
 
-from collections import deque
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
 
-from base_caching import BaseCaching
+from base_caching import BaseCaching, Items, item_pairs
 
 
 class FIFOCache(BaseCaching):
@@ -13,24 +13,58 @@ class FIFOCache(BaseCaching):
         - caching system using FIFO algorithm.
     """
 
-    def __init__(self) -> None:
-        """Initialization the cache and queue."""
-        super().__init__()
-        # A deque to keep track of the order of items
-        self.queue = deque()
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialization the cache, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        # OrderedDict keeps the items in the order they were first added
+        self.cache_data = OrderedDict()
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache using FIFO algorithm."""
         if key and item:
-            self.cache_data[key] = item
-            self.queue.append(key)
-            # If the cache is full
-            if len(self.queue) > BaseCaching.MAX_ITEMS:
-                # Remove the oldest item from the cache (FIFO)
-                discarded_key = self.queue.popleft()
-                del self.cache_data[discarded_key]
-                print(f"DISCARD: {discarded_key}")
+            # Updating an item keeps its place in the queue
+            self._store(key, item, ttl)
+            self._evict(protect=key)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key."""
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
         return self.cache_data.get(key) if key else None
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys` in one pass."""
+        if self._expires:
+            self.expire()
+        data = self.cache_data
+        return {key: data[key] for key in keys if key in data}
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair, evicting once per run of new keys."""
+        data = self.cache_data
+        last = None
+        with self._batch() as evicted:
+            for key, item in item_pairs(items):
+                if key and item:
+                    if key in data:
+                        # One put at a time may have evicted the key
+                        # already; settle that before the update
+                        self._evict(protect=last)
+                        self._store(key, item, ttl)
+                        self._evict(protect=key)
+                    else:
+                        self._store(key, item, ttl)
+                    last = key
+            # New keys queue up in the same order as with one put at a
+            # time, so evicting at the end discards the same keys
+            self._evict(protect=last)
+        return evicted
+
+    def _victim(self, protect: Any) -> Any:
+        """Remove the oldest item from the cache (FIFO)."""
+        for k in self.cache_data:
+            if k != protect:
+                return k
+        return protect
@@ -1,62 +1,184 @@
 #!/usr/bin/env python3
 """ LFUCache module """
 
-from collections import defaultdict
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional
 
 from base_caching import BaseCaching
 
 
+class _Entry:
+    """ A cached key, linked into the list of its frequency node """
+
+    __slots__ = ("key", "node", "prev", "next")
+
+    def __init__(self, key: Any) -> None:
+        self.key = key
+        self.node: Optional["_FrequencyNode"] = None
+        self.prev: Optional["_Entry"] = None
+        self.next: Optional["_Entry"] = None
+
+
+class _FrequencyNode:
+    """ Keys sharing one usage count, oldest first """
+
+    __slots__ = ("frequency", "head", "tail", "prev", "next")
+
+    def __init__(self, frequency: int) -> None:
+        self.frequency = frequency
+        # Oldest and newest entries of the node
+        self.head: Optional[_Entry] = None
+        self.tail: Optional[_Entry] = None
+        self.prev: "_FrequencyNode" = self
+        self.next: "_FrequencyNode" = self
+
+    def insert_after(self, frequency: int) -> "_FrequencyNode":
+        """Link a new node for `frequency` right after this one."""
+        node = _FrequencyNode(frequency)
+        node.prev, node.next = self, self.next
+        self.next.prev = node
+        self.next = node
+        return node
+
+    def unlink(self) -> None:
+        """Remove this node from the frequency list."""
+        self.prev.next = self.next
+        self.next.prev = self.prev
+
+    def append(self, entry: _Entry) -> None:
+        """Link `entry` as the newest of this node."""
+        entry.node = self
+        entry.prev = tail = self.tail
+        entry.next = None
+        if tail is None:
+            self.head = entry
+        else:
+            tail.next = entry
+        self.tail = entry
+
+    def remove(self, entry: _Entry) -> None:
+        """Unlink `entry` from this node."""
+        prev, following = entry.prev, entry.next
+        if prev is None:
+            self.head = following
+        else:
+            prev.next = following
+        if following is None:
+            self.tail = prev
+        else:
+            following.prev = prev
+
+
 class LFUCache(BaseCaching):
     """
     LFUCache defines:
         - caching system using LFU algorithm.
+
+    Keys live in a doubly linked list of frequency nodes kept in
+    ascending usage order, so get, put and eviction are all O(1).
+    Each node links its keys' entries directly, oldest first: one
+    small slotted object per key rather than a key-to-node dict and
+    an OrderedDict per node.
     """
 
-    def __init__(self) -> None:
-        """Initialize LFU algorithm."""
-        super().__init__()
-        # A defaultdict to keep track of the usage count of items
-        self.usage_count = defaultdict(int)
-        # A list to keep track of the order of items
-        self.key_order = []
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize LFU algorithm, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        # Sentinel of the circular list of frequency nodes
+        self.frequencies = _FrequencyNode(0)
+        # The entry of each key, which knows its frequency node
+        self.entries: Dict[Any, _Entry] = {}
+
+    def _increment(self, key: Any, uses: int = 1) -> None:
+        """Move `key` to the node of its usage count plus `uses`."""
+        entry = self.entries[key]
+        node = entry.node
+        frequency = node.frequency + uses
+        target = node.next
+        if target.frequency != frequency:
+            # Walk to the last node below `frequency` (the sentinel,
+            # at frequency 0, ends the list)
+            previous = node
+            while (target is not self.frequencies and
+                   target.frequency < frequency):
+                previous, target = target, target.next
+            if target.frequency != frequency:
+                if previous is node and node.head is node.tail:
+                    # Sole key of its node: bump the node itself
+                    node.frequency = frequency
+                    return
+                target = previous.insert_after(frequency)
+        node.remove(entry)
+        target.append(entry)
+        if node.head is None:
+            node.unlink()
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache using LFU algorithm."""
         if key is None or item is None:
             return
 
+        if self._expires:
+            # An expired key comes back as a new one
+            self._live(key)
         if key in self.cache_data:
-            self.cache_data[key] = item
-            self.usage_count[key] += 1
-        else:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # Find the least frequently used item(s)
-                min_cnt = min(self.usage_count.values())
-                least_frequent_keys = [
-                    k for k in self.key_order if self.usage_count[k] == min_cnt
-                ]
-
-                discard_key = least_frequent_keys[0]
-
-                # - Remove the item from the cache
-                # - Remove the item from the usage count
-                # - Remove the item from the key order
-                self.cache_data.pop(discard_key)
-                self.usage_count.pop(discard_key)
-                self.key_order.remove(discard_key)
-                print(f"DISCARD: {discard_key}")
-
-            # - Add the new item to the cache
-            # - Increment the usage count of the new item
-            # - Add the new key to the key order
-            self.cache_data[key] = item
-            self.usage_count[key] += 1
-            self.key_order.append(key)
+            self._store(key, item, ttl)
+            self._increment(key)
+            self._evict(protect=key)
+            return
+
+        first = self.frequencies.next
+        if first.frequency != 1:
+            first = self.frequencies.insert_after(1)
+        entry = self.entries[key] = _Entry(key)
+        first.append(entry)
+        self._store(key, item, ttl)
+        self._evict(protect=key)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key."""
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
         if key in self.cache_data:
-            self.usage_count[key] += 1
+            self._increment(key)
             return self.cache_data[key]
         return None
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys`, counting their uses in bulk.
+
+        A key asked for n times moves up n usage counts at once. Keys
+        move in the order of their last occurrence in `keys`, which is
+        when sequential gets would leave each one in its final node.
+        """
+        if self._expires:
+            self.expire()
+        data = self.cache_data
+        uses: Dict[Any, int] = {}
+        for key in keys:
+            if key in data:
+                # Re-inserted, so that uses ends in last-occurrence order
+                uses[key] = uses.pop(key, 0) + 1
+        for key, count in uses.items():
+            self._increment(key, count)
+        return {key: data[key] for key in uses}
+
+    def _victim(self, protect: Any) -> Any:
+        """The least frequent node is first; its oldest key goes."""
+        node = self.frequencies.next
+        while node is not self.frequencies:
+            entry = node.head
+            while entry is not None:
+                if entry.key != protect:
+                    return entry.key
+                entry = entry.next
+            node = node.next
+        return protect
+
+    def _forget(self, key: Any) -> None:
+        """Remove `key` from its frequency node."""
+        entry = self.entries.pop(key)
+        node = entry.node
+        node.remove(entry)
+        if node.head is None:
+            node.unlink()
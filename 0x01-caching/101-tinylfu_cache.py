@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+""" TinyLFUCache module """
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from base_caching import BaseCaching
+
+# Multiplier of the 64-bit Fibonacci hash spreading the keys
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+# Halving table applied to every counter byte when the sketch ages
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+class CountMinSketch:
+    """
+    Approximate access counts of recently seen keys
+
+    Four rows of 4-bit counters (a byte each, saturating at 15); a
+    key's count is the minimum of its counter in every row, so it is
+    never underestimated. After `sample_size` increments all the
+    counters are halved, so old popularity fades away.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int) -> None:
+        """Size the rows for a cache of `capacity` entries."""
+        bits = 4
+        while 1 << bits < capacity:
+            bits += 1
+        self.width = 1 << bits
+        self.shift = 64 - bits
+        self.table = bytearray(self.width * 4)
+        self.sample_size = 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key: Any) -> Tuple[int, int, int, int]:
+        """Counter index of `key` in each of the four rows"""
+        # Double hashing: row i uses h1 + i * h2, from one 64-bit mix
+        spread = (hash(key) * _GOLDEN) & _MASK64
+        width = self.width
+        mask = width - 1
+        h1 = spread >> self.shift
+        h2 = (spread >> 20) | 1
+        return (h1, width + ((h1 + h2) & mask),
+                2 * width + ((h1 + 2 * h2) & mask),
+                3 * width + ((h1 + 3 * h2) & mask))
+
+    def increment(self, key: Any) -> None:
+        """Count one access to `key`."""
+        table = self.table
+        a, b, c, d = self._indexes(key)
+        count = min(table[a], table[b], table[c], table[d])
+        if count < self.MAX_COUNT:
+            # Conservative update: only the counters at the minimum grow
+            for index in (a, b, c, d):
+                if table[index] == count:
+                    table[index] = count + 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = table.translate(_HALVE)
+            self.additions //= 2
+
+    def frequency(self, key: Any) -> int:
+        """Estimated recent accesses to `key`"""
+        table = self.table
+        a, b, c, d = self._indexes(key)
+        return min(table[a], table[b], table[c], table[d])
+
+
+class TinyLFUCache(BaseCaching):
+    """
+    TinyLFUCache defines:
+        - caching system using the W-TinyLFU algorithm.
+
+    New keys enter a small LRU window. A key leaving the window is only
+    admitted to the main cache if the sketch has seen it more often
+    than the key the main cache would evict for it, so a one-off scan
+    cannot flush popular keys. The main cache is a segmented LRU: keys
+    hit again move from probation to the protected segment.
+    """
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize W-TinyLFU, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        self.cache_data = {}
+        self.window_size = max(int(self.max_items * self.WINDOW_RATIO), 1)
+        main_size = max(self.max_items - self.window_size, 0)
+        self.protected_size = int(main_size * self.PROTECTED_RATIO)
+        # Segments, least recently used key first
+        self.window: OrderedDict = OrderedDict()
+        self.probation: OrderedDict = OrderedDict()
+        self.protected: OrderedDict = OrderedDict()
+        self.sketch = CountMinSketch(self.max_items)
+        # Key that just left the window and awaits admission
+        self._candidate: Any = None
+
+    def _touch(self, key: Any) -> None:
+        """Record a hit on a resident key."""
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        else:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_size:
+                # Demote the protected LRU key back to probation
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
+        """Add an item in the cache using W-TinyLFU algorithm."""
+        if key is None or item is None:
+            return
+        self.sketch.increment(key)
+        if self._expires:
+            self._live(key)
+        if key in self.cache_data:
+            self._store(key, item, ttl)
+            self._touch(key)
+            self._evict(protect=key)
+            return
+
+        self._store(key, item, ttl)
+        self.window[key] = None
+        if len(self.window) > self.window_size:
+            candidate, _ = self.window.popitem(last=False)
+            self.probation[candidate] = None
+            self._candidate = candidate
+        self._evict(protect=key)
+        self._candidate = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get an item by key, unless it expired."""
+        if key is None:
+            return None
+        self.sketch.increment(key)
+        if self._expires and not self._live(key):
+            return None
+        if key in self.cache_data:
+            self._touch(key)
+            return self.cache_data[key]
+        return None
+
+    def _victim(self, protect: Any) -> Any:
+        """Loser of the candidate against the probation LRU key."""
+        candidate = self._candidate
+        victim = None
+        for k in self.probation:
+            if k != candidate and k != protect:
+                victim = k
+                break
+        if candidate is not None and candidate != protect:
+            if (victim is None or self.sketch.frequency(candidate) <=
+                    self.sketch.frequency(victim)):
+                return candidate
+            return victim
+        if victim is not None:
+            return victim
+        for segment in (self.protected, self.window):
+            for k in segment:
+                if k != protect:
+                    return k
+        return protect
+
+    def _forget(self, key: Any) -> None:
+        """Remove `key` from its segment."""
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                del segment[key]
+                break
+        if key == self._candidate:
+            self._candidate = None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" ARCCache module """
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+from base_caching import BaseCaching
+
+
+class ARCCache(BaseCaching):
+    """
+    ARCCache defines:
+        - caching system using the Adaptive Replacement Cache algorithm.
+
+    Resident keys are split between t1 (seen once recently) and t2 (seen
+    at least twice). Evicted keys are remembered, without their items,
+    in the ghost lists b1 and b2. A put of a key found in b1 means t1
+    was too small, one found in b2 that t2 was, and the target size `p`
+    of t1 moves accordingly, so the cache adapts between recency and
+    frequency without tuning.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize ARC algorithm, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        self.cache_data = {}
+        # Least recently used key first in every list
+        self.t1: OrderedDict = OrderedDict()
+        self.t2: OrderedDict = OrderedDict()
+        self.b1: OrderedDict = OrderedDict()
+        self.b2: OrderedDict = OrderedDict()
+        # Target size of t1
+        self.p = 0.0
+        # Whether the key being put was found in b2
+        self._from_b2 = False
+
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
+        """Add an item in the cache using ARC algorithm."""
+        if key is None or item is None:
+            return
+        if self._expires:
+            self._live(key)
+        if key in self.cache_data:
+            self._store(key, item, ttl)
+            self._hit(key)
+            self._evict(protect=key)
+            return
+
+        if key in self.b1:
+            # t1 was too small for this key: grow its target
+            step = max(len(self.b2) / len(self.b1), 1)
+            self.p = min(self.p + step, self.max_items)
+            del self.b1[key]
+            self.t2[key] = None
+        elif key in self.b2:
+            # t2 was too small for this key: shrink t1's target
+            step = max(len(self.b1) / len(self.b2), 1)
+            self.p = max(self.p - step, 0)
+            del self.b2[key]
+            self.t2[key] = None
+            self._from_b2 = True
+        else:
+            self.t1[key] = None
+        self._store(key, item, ttl)
+        self._evict(protect=key)
+        self._from_b2 = False
+        self._trim_ghosts()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
+        if key in self.cache_data:
+            self._hit(key)
+            return self.cache_data[key]
+        return None
+
+    def _hit(self, key: Any) -> None:
+        """A resident key seen again becomes the most recent of t2."""
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def _trim_ghosts(self) -> None:
+        """Keep t1 + b1 and the whole directory within their bounds."""
+        size = self.max_items
+        while self.b1 and len(self.t1) + len(self.b1) > size:
+            self.b1.popitem(last=False)
+        while self.b2 and (len(self.t1) + len(self.t2) + len(self.b1) +
+                           len(self.b2) > 2 * size):
+            self.b2.popitem(last=False)
+
+    def _victim(self, protect: Any) -> Any:
+        """LRU key of t1 while t1 is above its target, else of t2."""
+        t1_size = len(self.t1) - (protect in self.t1)
+        prefer_t1 = t1_size > 0 and (
+            t1_size > self.p or (self._from_b2 and t1_size == self.p))
+        lists = (self.t1, self.t2) if prefer_t1 else (self.t2, self.t1)
+        for keys in lists:
+            for k in keys:
+                if k != protect:
+                    return k
+        return protect
+
+    def _discard(self, key: Any) -> None:
+        """Evict key, remembering it in the ghost list of its list."""
+        ghosts = self.b1 if key in self.t1 else self.b2
+        super()._discard(key)
+        ghosts[key] = None
+
+    def _forget(self, key: Any) -> None:
+        """Remove `key` from t1 or t2."""
+        if key in self.t1:
+            del self.t1[key]
+        else:
+            del self.t2[key]
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """ LIFOCache module """
 
+from collections import OrderedDict
 from typing import Any, Optional
 
 from base_caching import BaseCaching
@@ -12,25 +13,30 @@ class LIFOCache(BaseCaching):
         - caching system using LIFO algorithm.
     """
 
-    def __init__(self) -> None:
-        """Initialize LIFO algorithm"""
-        super().__init__()
-        # A list to keep track of the order of items
-        self.keys = []
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize LIFO algorithm, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        # OrderedDict to keep track of the order of items
+        self.cache_data = OrderedDict()
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache using LIFO algorithm."""
         if key and item:
-            self.cache_data[key] = item
-            if key in self.keys:
-                self.keys.remove(key)
-            self.keys.append(key)
-            if len(self.keys) > BaseCaching.MAX_ITEMS:
-                # Remove the most recently added item from the cache (LIFO)
-                discarded_key = self.keys.pop(-2)
-                del self.cache_data[discarded_key]
-                print(f"DISCARD: {discarded_key}")
+            self._store(key, item, ttl)
+            # Move the key to the end of the OrderedDict (last added)
+            self.cache_data.move_to_end(key)
+            self._evict(protect=key)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key."""
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
         return self.cache_data.get(key) if key else None
+
+    def _victim(self, protect: Any) -> Any:
+        """Remove the item added just before this one (LIFO)."""
+        for k in reversed(self.cache_data):
+            if k != protect:
+                return k
+        return protect
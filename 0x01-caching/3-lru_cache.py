@@ -2,9 +2,9 @@
 """ LRUCache module. """
 
 from collections import OrderedDict
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional
 
-from base_caching import BaseCaching
+from base_caching import BaseCaching, Items, item_pairs
 
 
 class LRUCache(BaseCaching):
@@ -13,27 +13,69 @@ class LRUCache(BaseCaching):
         - caching system using LRU algorithm.
     """
 
-    def __init__(self) -> None:
-        """Initialize LRU algorithm."""
-        super().__init__()
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize LRU algorithm, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
         # OrderedDict to keep track of the order of items
         self.cache_data = OrderedDict()
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache using LRU algorithm."""
         if key and item:
-            self.cache_data[key] = item
+            self._store(key, item, ttl)
             # Move the key to the end of the OrderedDict (most recently used)
             self.cache_data.move_to_end(key)
-            if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-                # Remove the least recently used item from the cache
-                discarded_key = next(iter(self.cache_data))
-                del self.cache_data[discarded_key]
-                print(f"DISCARD: {discarded_key}")
+            self._evict(protect=key)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key"""
+        """Get an item by key, unless it expired"""
+        if self._expires and not self._live(key):
+            return None
         if key in self.cache_data:
             self.cache_data.move_to_end(key)
             return self.cache_data.get(key)
         return None
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys`, reordering in one pass."""
+        if self._expires:
+            self.expire()
+        data = self.cache_data
+        move_to_end = data.move_to_end
+        found = {}
+        for key in keys:
+            if key in data:
+                move_to_end(key)
+                found[key] = data[key]
+        return found
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair, evicting once per run of new keys."""
+        data = self.cache_data
+        last = None
+        with self._batch() as evicted:
+            for key, item in item_pairs(items):
+                if key and item:
+                    if key in data:
+                        # One put at a time may have evicted the key
+                        # already; settle that before the update
+                        self._evict(protect=last)
+                        self._store(key, item, ttl)
+                        data.move_to_end(key)
+                        self._evict(protect=key)
+                    else:
+                        self._store(key, item, ttl)
+                    last = key
+            # New keys queue up in the same order as with one put at a
+            # time, so evicting at the end discards the same keys
+            self._evict(protect=last)
+        return evicted
+
+    def _victim(self, protect: Any) -> Any:
+        """Remove the least recently used item from the cache."""
+        for k in self.cache_data:
+            if k != protect:
+                return k
+        return protect
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """ MRUCache module. """
 
+from collections import OrderedDict
 from typing import Any, Optional
 
 from base_caching import BaseCaching
@@ -12,31 +13,34 @@ class MRUCache(BaseCaching):
         - caching system using MRU algorithm.
     """
 
-    def __init__(self) -> None:
-        """Initialize MRU algorithm."""
-        super().__init__()
-        # A list to keep track of the order of items
-        self.keys = []
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize MRU algorithm, see BaseCaching for the limits."""
+        super().__init__(**kwargs)
+        # OrderedDict to keep track of the order of items
+        self.cache_data = OrderedDict()
 
-    def put(self, key: str, item: Any) -> None:
+    def put(self, key: str, item: Any,
+            ttl: Optional[float] = None) -> None:
         """Add an item in the cache using MRU algorithm."""
         if key and item:
-            if key in self.cache_data:
-                self.keys.remove(key)
-            elif len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # Remove the most recently used item from the cache
-                discarded_key = self.keys.pop()
-                del self.cache_data[discarded_key]
-                print(f"DISCARD: {discarded_key}")
-
-            self.cache_data[key] = item
-            self.keys.append(key)
+            self._store(key, item, ttl)
+            # Move the key to the end of the OrderedDict (most recently used)
+            self.cache_data.move_to_end(key)
+            self._evict(protect=key)
 
     def get(self, key: str) -> Optional[Any]:
-        """Get an item by key."""
+        """Get an item by key, unless it expired."""
+        if self._expires and not self._live(key):
+            return None
         if key in self.cache_data:
-            # Move the key to the end of the list (most recently used)
-            self.keys.remove(key)
-            self.keys.append(key)
+            # Move the key to the end of the OrderedDict (most recently used)
+            self.cache_data.move_to_end(key)
             return self.cache_data.get(key)
         return None
+
+    def _victim(self, protect: Any) -> Any:
+        """Remove the most recently used item, other than the new one."""
+        for k in reversed(self.cache_data):
+            if k != protect:
+                return k
+        return protect
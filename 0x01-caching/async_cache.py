@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Awaitable read-through cache over the BaseCaching policies
+
+    stock = AsyncCache(LRUCache(max_items=1000, listener=None),
+                       ttl=5, stale_ttl=30)
+
+    async def current_stock(item_id):
+        return await stock.get_or_load(item_id, fetch_stock_from_redis)
+
+A miss runs the loader; the calls that miss on the same key meanwhile
+wait for that one load instead of starting their own (single flight).
+With stale_ttl, an entry older than ttl is still served for that many
+more seconds while one background load refreshes it, so hot keys
+never make a caller wait on the loader.
+"""
+
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from single_flight import SingleFlight
+
+# loader(key) returns the value, or an awaitable of it
+Loader = Callable[[Any], Union[Any, Awaitable[Any]]]
+
+
+class AsyncCache:
+    """
+    AsyncCache defines:
+        - get_or_load, loading each missing key once however many
+          callers wait for it
+        - optional stale-while-revalidate refresh of expired entries
+    """
+
+    def __init__(self, cache: Any, ttl: Optional[float] = None,
+                 stale_ttl: Optional[float] = None) -> None:
+        """Serve loaded values from `cache`, any BaseCaching policy or
+        thread-safe wrapper of one.
+
+        ttl: seconds a loaded value is fresh, forever by default
+        stale_ttl: seconds a value older than ttl is still served
+            while it is reloaded in the background; by default it is
+            reloaded before the caller gets it
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.loads = 0
+        self.refreshes = 0
+        self._flights = SingleFlight()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a value by key, fresh or stale, without loading it."""
+        entry = self.cache.get(key)
+        return None if entry is None else entry[0]
+
+    def put(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        """Add a value, fresh for ttl seconds, self.ttl by default."""
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is None:
+            self.cache.put(key, (value, None))
+            return
+        # The policy drops the entry once it is too stale to serve
+        self.cache.put(key, (value, time.monotonic() + ttl),
+                       ttl + (self.stale_ttl or 0))
+
+    async def get_or_load(self, key: Any, loader: Loader,
+                          ttl: Optional[float] = None) -> Any:
+        """Get a value by key, awaiting loader(key) on a miss.
+
+        Concurrent misses on one key share a single load; an exception
+        it raises reaches all of them and nothing is cached. A caller
+        cancelled while waiting does not cancel the load for the
+        others.
+        """
+        # Values are boxed with their freshness deadline, so that None,
+        # 0 or "" are cached too: the policies ignore falsy items. They
+        # ignore falsy keys as well, which are loaded on every call
+        entry = self.cache.get(key)
+        if entry is not None:
+            value, fresh_until = entry
+            if fresh_until is None or time.monotonic() < fresh_until:
+                return value
+            if self.stale_ttl:
+                self._flights.start(
+                    key, lambda: self._load(key, loader, ttl, True))
+                return value
+        return await self._flights.run(
+            key, lambda: self._load(key, loader, ttl, False))
+
+    async def _load(self, key: Any, loader: Loader, ttl: Optional[float],
+                    refresh: bool) -> Any:
+        """Call the loader and cache what it returns."""
+        value = loader(key)
+        if inspect.isawaitable(value):
+            value = await value
+        self.put(key, value, ttl)
+        if refresh:
+            self.refreshes += 1
+        else:
+            self.loads += 1
+        return value
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the cache with the loads and background
+        refreshes run, None unless the cache collects statistics
+        """
+        stats = self.cache.stats()
+        if stats is not None:
+            stats.update(loads=self.loads, refreshes=self.refreshes)
+        return stats
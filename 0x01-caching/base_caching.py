@@ -1,27 +1,103 @@
 #!/usr/bin/python3
 """ BaseCaching module
 """
+import heapq
+import itertools
+import sys
+import time
+from contextlib import contextmanager
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Mapping,
+                    Optional, Tuple, Union)
+
+from cache_stats import CacheStats
+
+Weigher = Callable[[Any, Any], int]
+# listener(key, item, reason) is called for every entry leaving the cache
+Listener = Callable[[Any, Any, str], None]
+
+# put_many accepts a mapping or (key, item) pairs
+Items = Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]
+
+# Reasons an entry leaves the cache
+EVICTED = "evicted"
+EXPIRED = "expired"
+
+
+def print_discard(key: Any, item: Any, reason: str) -> None:
+    """ Default listener: report evictions on stdout
+    """
+    if reason == EVICTED:
+        print(f"DISCARD: {key}")
+
+
+def item_pairs(items: Items) -> Iterable[Tuple[Any, Any]]:
+    """ (key, item) pairs of a mapping or of an iterable of pairs
+    """
+    return items.items() if isinstance(items, Mapping) else items
+
+
+def default_weigher(key: Any, item: Any) -> int:
+    """ Approximate memory used by a cache entry, in bytes
+    """
+    return sys.getsizeof(key) + sys.getsizeof(item)
+
 
 class BaseCaching():
     """ BaseCaching defines:
       - constants of your caching system
       - where your data are stored (in a dictionary)
+      - the entry and byte limits a cache evicts down to
+      - when entries expire, if they were given a time to live
+      - who is told about removed entries, and optional statistics
     """
     MAX_ITEMS = 4
 
-    def __init__(self):
+    def __init__(self, max_items: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 weigher: Optional[Weigher] = None,
+                 default_ttl: Optional[float] = None,
+                 listener: Optional[Listener] = print_discard,
+                 stats: bool = False):
         """ Initiliaze
+
+        max_items: entries kept at most, MAX_ITEMS by default
+        max_bytes: total weight kept at most, unbounded by default
+        weigher: returns the weight of (key, item), sys.getsizeof
+            of both by default
+        default_ttl: seconds an entry lives when put without a ttl,
+            forever by default
+        listener: called with (key, item, reason) for every entry
+            evicted or expired, prints DISCARD lines by default;
+            None for no notifications
+        stats: collect statistics, see enable_stats
         """
         self.cache_data = {}
+        self.max_items = self.MAX_ITEMS if max_items is None else max_items
+        self.max_bytes = max_bytes
+        self.weigher = weigher or default_weigher
+        self.current_bytes = 0
+        self._weights: Dict[Any, int] = {}
+        self.default_ttl = default_ttl
+        self.clock: Callable[[], float] = time.monotonic
+        # Deadline of every expiring key, and a min-heap of
+        # (deadline, tiebreak, key) that may hold outdated entries
+        self._expires: Dict[Any, float] = {}
+        self._expiry_heap: List[Tuple[float, int, Any]] = []
+        self._expiry_order = itertools.count()
+        self.listeners: List[Listener] = [listener] if listener else []
+        self.statistics: Optional[CacheStats] = None
+        if stats:
+            self.enable_stats()
 
     def print_cache(self):
         """ Print the cache
         """
+        self.expire()
         print("Current cache:")
         for key in sorted(self.cache_data.keys()):
             print("{}: {}".format(key, self.cache_data.get(key)))
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Add an item in the cache
         """
         raise NotImplementedError("put must be implemented in your cache class")
@@ -30,3 +106,181 @@ class BaseCaching():
         """ Get an item by key
         """
         raise NotImplementedError("get must be implemented in your cache class")
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """ Items of the cached keys among keys, others left out
+
+        Same effect as calling get on each key in turn; policies
+        override it with a faster path.
+        """
+        get = type(self).get
+        found = {}
+        for key in keys:
+            item = get(self, key)
+            if item is not None:
+                found[key] = item
+        return found
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """ Add every (key, item) of a mapping or iterable of pairs
+
+        Same effect as calling put on each pair in turn, except that
+        the entries evicted are returned instead of printed.
+        """
+        put = type(self).put
+        with self._batch() as evicted:
+            for key, item in item_pairs(items):
+                put(self, key, item, ttl)
+        return evicted
+
+    @contextmanager
+    def _batch(self) -> Iterator[Dict[Any, Any]]:
+        """ Collect the entries evicted meanwhile into the dict
+        yielded, keeping them from the DISCARD printer
+        """
+        evicted: Dict[Any, Any] = {}
+
+        def collect(key: Any, item: Any, reason: str) -> None:
+            if reason == EVICTED:
+                evicted[key] = item
+
+        listeners = self.listeners
+        self.listeners = [collect] + [listener for listener in listeners
+                                      if listener is not print_discard]
+        try:
+            yield evicted
+        finally:
+            self.listeners = listeners
+
+    def enable_stats(self) -> None:
+        """ Count hits, misses, insertions, updates and removals and
+        time every get, put, get_many and put_many, until disable_stats
+
+        The instrumented methods are set on this instance only, so a
+        cache without stats runs the class methods untouched.
+        """
+        if self.statistics is not None:
+            return
+        self.statistics = CacheStats()
+        self.listeners.append(self.statistics.record_removal)
+        self.get = self.statistics.timed_get(self, self.get)
+        self.put = self.statistics.timed_put(self, self.put)
+        self.get_many = self.statistics.timed_get_many(self, self.get_many)
+        self.put_many = self.statistics.timed_put_many(self, self.put_many)
+
+    def disable_stats(self) -> None:
+        """ Stop collecting statistics and drop those collected
+        """
+        if self.statistics is None:
+            return
+        self.listeners.remove(self.statistics.record_removal)
+        del self.get, self.put, self.get_many, self.put_many
+        self.statistics = None
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """ Snapshot of the statistics, None unless they are enabled
+        """
+        if self.statistics is None:
+            return None
+        return self.statistics.snapshot()
+
+    def expire(self) -> int:
+        """ Remove every entry whose time to live has passed
+
+        Only the heap of deadlines is walked, never cache_data.
+        Returns the number of entries removed.
+        """
+        heap = self._expiry_heap
+        now = self.clock()
+        removed = 0
+        while heap and heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(heap)
+            # Outdated entry: the key was removed or put again since
+            if self._expires.get(key) == deadline:
+                self._remove(key, EXPIRED)
+                removed += 1
+        return removed
+
+    def _store(self, key: Any, item: Any,
+               ttl: Optional[float] = None) -> None:
+        """ Set cache_data[key], keeping the byte count and the
+        deadlines up to date
+        """
+        self.cache_data[key] = item
+        if self.max_bytes is not None:
+            weight = self.weigher(key, item)
+            self.current_bytes += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl is not None:
+            deadline = self.clock() + ttl
+            self._expires[key] = deadline
+            heap = self._expiry_heap
+            heapq.heappush(heap, (deadline, next(self._expiry_order), key))
+            if len(heap) > 2 * len(self._expires) + 64:
+                # Drop the outdated entries once they dominate the heap
+                heap[:] = [entry for entry in heap
+                           if self._expires.get(entry[2]) == entry[0]]
+                heapq.heapify(heap)
+        elif self._expires:
+            self._expires.pop(key, None)
+
+    def _live(self, key: Any) -> bool:
+        """ True if key is cached and not expired; an expired key is
+        removed on the way
+        """
+        if key not in self.cache_data:
+            return False
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= self.clock():
+            self._remove(key, EXPIRED)
+            return False
+        return True
+
+    def _over_capacity(self) -> bool:
+        """ True while the entry limit or the byte budget is exceeded
+        """
+        return (len(self.cache_data) > self.max_items or
+                (self.max_bytes is not None and
+                 self.current_bytes > self.max_bytes))
+
+    def _evict(self, protect: Any = None) -> None:
+        """ Discard victims of the policy until back within limits
+
+        protect: key just stored, only discarded if it does not fit
+            on its own
+        """
+        if self._expires and self._over_capacity():
+            # Expired entries go first, before any live victim
+            self.expire()
+        while self.cache_data and self._over_capacity():
+            self._discard(self._victim(protect))
+
+    def _discard(self, key: Any) -> None:
+        """ Evict key from the cache
+        """
+        self._remove(key, EVICTED)
+
+    def _remove(self, key: Any, reason: str) -> None:
+        """ Remove key from the cache and all its bookkeeping, then
+        tell the listeners why
+        """
+        self._forget(key)
+        item = self.cache_data.pop(key)
+        self.current_bytes -= self._weights.pop(key, 0)
+        if self._expires:
+            self._expires.pop(key, None)
+        for listener in self.listeners:
+            listener(key, item, reason)
+
+    def _victim(self, protect: Any) -> Any:
+        """ Key the policy evicts next, other than protect if possible
+        """
+        raise NotImplementedError(
+            "_victim must be implemented in your cache class")
+
+    def _forget(self, key: Any) -> None:
+        """ Drop key from the policy's own bookkeeping
+        """
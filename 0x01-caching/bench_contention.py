@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Throughput of the thread-safe caches as the thread count grows
+
+Every thread runs the same get/put mix over a shared key space; the
+table shows total operations per second for a single global lock
+(ThreadSafeCache) and for lock striping (ShardedCache).
+
+    ./bench_contention.py [--threads 1,2,4,8] [--policy lru] [--shards 16]
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from concurrent_cache import ShardedCache, ThreadSafeCache
+from policies import POLICIES, load_policy
+
+THREADS = (1, 2, 4, 8, 16)
+CAPACITY = 10000
+KEYS = 20000
+OPERATIONS = 50000
+SEED = 0
+
+
+def run_threads(cache, threads: int, operations: int) -> float:
+    """
+    Run `threads` workers, each doing `operations` gets and puts.
+
+    Returns:
+    float: Operations per second over all the workers
+    """
+    # Draw the keys up front so the workers only time the cache
+    workloads = []
+    for index in range(threads):
+        rng = random.Random(SEED + index)
+        workloads.append([(rng.random() < 0.8, rng.randrange(KEYS))
+                          for _ in range(operations)])
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(workload: List) -> None:
+        get, put = cache.get, cache.put
+        barrier.wait()
+        for is_get, key in workload:
+            if is_get:
+                get(key)
+            else:
+                put(key, key)
+
+    workers = [threading.Thread(target=worker, args=(workload,))
+               for workload in workloads]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def variants(policy: type, shards: int) -> Dict[str, Callable]:
+    """Factories for the caches being compared"""
+    return {
+        "global lock": lambda: ThreadSafeCache(
+            policy(max_items=CAPACITY, listener=None)),
+        "sharded": lambda: ShardedCache(policy, shards=shards,
+                                        max_items=CAPACITY, listener=None),
+    }
+
+
+def main() -> None:
+    """Print operations per second for each variant and thread count"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", default=",".join(map(str, THREADS)))
+    parser.add_argument("--policy", default="lru", choices=POLICIES)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=OPERATIONS,
+                        help="operations per thread")
+    args = parser.parse_args()
+
+    policy = load_policy(args.policy)
+    print("{:<12} {:>8} {:>14}".format("cache", "threads", "ops/s"))
+    for label, factory in variants(policy, args.shards).items():
+        for threads in [int(n) for n in args.threads.split(",")]:
+            ops = run_threads(factory(), threads, args.operations)
+            print("{:<12} {:>8} {:>14,.0f}".format(label, threads, ops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Memory each cache policy spends per entry, measured with tracemalloc
+
+Keys and items are allocated before tracing starts, so the figure is
+the bookkeeping of the cache alone: its dicts, lists and nodes. A
+plain dict of the same entries is the floor any Python cache pays
+for cache_data.
+
+    ./bench_memory.py [--entries 1000000] [--policies lru,lfu]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import Callable, Dict
+
+import native_cache
+from policies import POLICIES, load_policy
+
+ENTRIES = 1000000
+
+
+def bytes_per_entry(factory: Callable, entries: int) -> float:
+    """
+    Bytes allocated by a cache from `factory` filled with `entries`.
+
+    Returns:
+    float: Traced bytes still allocated, divided by `entries`
+    """
+    # Large ints, so that no key is a cached small int
+    keys = list(range(1 << 40, (1 << 40) + entries))
+    item = object()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        cache = factory(entries)
+        put = cache.put
+        for key in keys:
+            put(key, item)
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return allocated / entries
+
+
+class _DictCache:
+    """ Plain dict baseline, with put() like the policies """
+
+    def __init__(self, entries: int) -> None:
+        self.cache_data: Dict = {}
+        self.put = self.cache_data.__setitem__
+
+
+def main() -> None:
+    """Print bytes per entry for every policy"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=ENTRIES)
+    parser.add_argument("--policies", default=",".join(POLICIES))
+    args = parser.parse_args()
+
+    factories: Dict[str, Callable] = {"dict": _DictCache}
+    for name in args.policies.split(","):
+        policy = load_policy(name)
+        factories[name] = (lambda entries, policy=policy:
+                           policy(max_items=entries, listener=None))
+    if native_cache.NATIVE:
+        for name in ("LFUCache", "LRUCache"):
+            policy = getattr(native_cache, name)
+            factories["c-" + name[:3].lower()] = (
+                lambda entries, policy=policy:
+                policy(max_items=entries, listener=None))
+
+    print("{:<8} {:>10} {:>12}".format("policy", "entries", "bytes/entry"))
+    for name, factory in factories.items():
+        print("{:<8} {:>10} {:>12.1f}".format(
+            name, args.entries, bytes_per_entry(factory, args.entries)))
+
+
+if __name__ == "__main__":
+    main()
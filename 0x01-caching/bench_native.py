@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Per-operation latency of the C LFU/LRU caches against the Python ones
+
+Runs the bench_scaling get/put mix on both implementations of each
+policy. Build the extension first (python3 setup.py build_ext
+--inplace); without it both columns time the pure-Python classes.
+
+    ./bench_native.py [--sizes 100,10000,1000000] [--operations 100000]
+"""
+
+import argparse
+from typing import List
+
+import native_cache
+from bench_scaling import bench
+from policies import load_policy
+
+SIZES = (100, 10000, 1000000)
+OPERATIONS = 100000
+
+
+def main() -> None:
+    """Print Python and native latency, and the speedup, per size"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--operations", type=int, default=OPERATIONS)
+    args = parser.parse_args()
+
+    if not native_cache.NATIVE:
+        print("_lfu_cache is not built: timing the Python caches twice")
+    sizes: List[int] = [int(size) for size in args.sizes.split(",")]
+    pairs = (("lfu", native_cache.LFUCache), ("lru", native_cache.LRUCache))
+    print("{:<6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+        "policy", "entries", "py get", "c get", "py put", "c put",
+        "speedup"))
+    for name, native in pairs:
+        python = load_policy(name)
+        for size in sizes:
+            slow = bench(python, size, args.operations)
+            fast = bench(native, size, args.operations)
+            speedup = ((slow["get_ns"] + slow["put_ns"]) /
+                       (fast["get_ns"] + fast["put_ns"]))
+            print("{:<6} {:>9} {:>9.0f} {:>9.0f} {:>9.0f} {:>9.0f} {:>7.1f}x"
+                  .format(name, size, slow["get_ns"], fast["get_ns"],
+                          slow["put_ns"], fast["put_ns"], speedup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Per-operation latency of the cache policies as capacity grows
+
+A policy whose get/put/evict is O(1) shows a flat line from 4 to
+10^6 entries; an O(n) step shows up as latency growing with size.
+
+    ./bench_scaling.py [--sizes 4,100,10000,1000000] [--policies lifo,mru]
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from policies import POLICIES, load_policy
+
+SIZES = (4, 100, 10000, 100000, 1000000)
+OPERATIONS = 100000
+SEED = 0
+
+
+def bench(policy: type, size: int, operations: int) -> Dict[str, float]:
+    """
+    Fill a cache of `size` entries, then time a get/put mix on it.
+
+    Half the operations are gets of resident keys, half are puts of
+    new keys, each of which evicts an entry.
+
+    Returns:
+    Dict[str, float]: Mean nanoseconds per get and per put
+    """
+    cache = policy(max_items=size, listener=None)
+    rng = random.Random(SEED)
+    for key in range(size):
+        cache.put(key, key)
+    resident = [rng.randrange(size) for _ in range(operations)]
+    fresh = range(size, size + operations)
+
+    get = cache.get
+    start = time.perf_counter()
+    for key in resident:
+        get(key)
+    get_ns = (time.perf_counter() - start) / operations * 1e9
+
+    put = cache.put
+    start = time.perf_counter()
+    for key in fresh:
+        put(key, key)
+    put_ns = (time.perf_counter() - start) / operations * 1e9
+    return {"get_ns": get_ns, "put_ns": put_ns}
+
+
+def main() -> None:
+    """Print per-op latency for every policy and size"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--policies", default=",".join(POLICIES))
+    parser.add_argument("--operations", type=int, default=OPERATIONS)
+    args = parser.parse_args()
+
+    sizes: List[int] = [int(size) for size in args.sizes.split(",")]
+    print("{:<8} {:>10} {:>10} {:>10}".format(
+        "policy", "entries", "get ns", "put ns"))
+    for name in args.policies.split(","):
+        policy = load_policy(name)
+        for size in sizes:
+            result = bench(policy, size, args.operations)
+            print("{:<8} {:>10} {:>10.0f} {:>10.0f}".format(
+                name, size, result["get_ns"], result["put_ns"]))
+
+
+if __name__ == "__main__":
+    main()
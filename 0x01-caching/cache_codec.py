@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Stable encoding of cache keys for storage outside the process
+
+Python's hash() of str and bytes changes with every process
+(PYTHONHASHSEED), so caches that share or persist entries key them by
+these bytes instead. Keys are str, bytes, int or any value that
+pickles deterministically, such as tuples of those.
+"""
+
+import pickle
+from typing import Any
+
+
+def encode_key(key: Any) -> bytes:
+    """Bytes identifying key the same way in every process"""
+    if isinstance(key, str):
+        return b"s" + key.encode("utf-8", "surrogatepass")
+    if isinstance(key, bytes):
+        return b"b" + key
+    if type(key) is int:
+        return b"i" + str(key).encode("ascii")
+    return b"p" + pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_key(data: bytes) -> Any:
+    """Key encoded by encode_key"""
+    kind, body = data[:1], data[1:]
+    if kind == b"s":
+        return body.decode("utf-8", "surrogatepass")
+    if kind == b"b":
+        return body
+    if kind == b"i":
+        return int(body)
+    return pickle.loads(body)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Counters and latency histograms for the BaseCaching policies
+
+A CacheStats is only created by BaseCaching.enable_stats(), which
+swaps instrumented get/put in on that one instance; a cache without
+stats runs the plain class methods and pays nothing.
+"""
+
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Latencies are counted in power-of-two nanosecond buckets
+BUCKETS = 64
+
+
+class LatencyHistogram:
+    """ Log2 histogram of operation latencies in nanoseconds """
+
+    def __init__(self) -> None:
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        """Count one operation that took `elapsed_ns`."""
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the operations counted by `other`."""
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound, in ns, of the bucket holding that fraction"""
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return (1 << bucket) - 1
+        return 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of the histogram as plain data"""
+        return {
+            "count": self.count,
+            "mean_ns": self.total_ns / self.count if self.count else 0.0,
+            "p50_ns": self.percentile(0.5),
+            "p99_ns": self.percentile(0.99),
+            "buckets": {(1 << bucket) - 1: count
+                        for bucket, count in enumerate(self.buckets)
+                        if count},
+        }
+
+
+class CacheStats:
+    """
+    CacheStats defines:
+        - hits, misses, insertions and updates seen by get and put
+        - removals by reason, fed by the cache's listeners
+        - get and put latency histograms
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.insertions = 0
+        self.updates = 0
+        self.removals: Dict[str, int] = {}
+        self.latency = {op: LatencyHistogram()
+                        for op in ("get", "put", "get_many", "put_many")}
+
+    def record_removal(self, key: Any, item: Any, reason: str) -> None:
+        """Listener counting every entry that leaves the cache."""
+        self.removals[reason] = self.removals.get(reason, 0) + 1
+
+    def timed_get(self, cache: Any, get: Callable) -> Callable:
+        """Wrap the bound `get` of `cache` to count and time it."""
+        histogram = self.latency["get"]
+
+        def get_with_stats(key: Any) -> Optional[Any]:
+            start = perf_counter_ns()
+            item = get(key)
+            histogram.record(perf_counter_ns() - start)
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return item
+        return get_with_stats
+
+    def timed_put(self, cache: Any, put: Callable) -> Callable:
+        """Wrap the bound `put` of `cache` to count and time it."""
+        histogram = self.latency["put"]
+
+        def put_with_stats(key: Any, item: Any,
+                           ttl: Optional[float] = None) -> None:
+            known = key in cache.cache_data
+            start = perf_counter_ns()
+            put(key, item, ttl)
+            histogram.record(perf_counter_ns() - start)
+            if known:
+                self.updates += 1
+            elif key in cache.cache_data:
+                self.insertions += 1
+        return put_with_stats
+
+    def timed_get_many(self, cache: Any, get_many: Callable) -> Callable:
+        """Wrap the bound `get_many` of `cache`; each key is a lookup."""
+        histogram = self.latency["get_many"]
+
+        def get_many_with_stats(keys: Iterable) -> Dict[Any, Any]:
+            keys = list(keys)
+            start = perf_counter_ns()
+            found = get_many(keys)
+            histogram.record(perf_counter_ns() - start)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found
+        return get_many_with_stats
+
+    def timed_put_many(self, cache: Any, put_many: Callable) -> Callable:
+        """Wrap the bound `put_many` of `cache`; each pair is a put."""
+        histogram = self.latency["put_many"]
+
+        def put_many_with_stats(items: Any,
+                                ttl: Optional[float] = None) -> Dict:
+            pairs = list(items.items() if hasattr(items, "items")
+                         else items)
+            known = {key for key, _ in pairs if key in cache.cache_data}
+            start = perf_counter_ns()
+            evicted = put_many(pairs, ttl)
+            histogram.record(perf_counter_ns() - start)
+            for key in {key for key, _ in pairs}:
+                if key in known:
+                    self.updates += 1
+                elif key in cache.cache_data or key in evicted:
+                    self.insertions += 1
+            return evicted
+        return put_many_with_stats
+
+    def merge(self, other: "CacheStats") -> None:
+        """Add the counts of `other`, e.g. another shard."""
+        self.hits += other.hits
+        self.misses += other.misses
+        self.insertions += other.insertions
+        self.updates += other.updates
+        for reason, count in other.removals.items():
+            self.removals[reason] = self.removals.get(reason, 0) + count
+        for op, histogram in other.latency.items():
+            self.latency[op].merge(histogram)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All the counters as plain data, safe to keep or serialize"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "insertions": self.insertions,
+            "updates": self.updates,
+            "removals": dict(self.removals),
+            "latency": {op: histogram.snapshot()
+                        for op, histogram in self.latency.items()},
+        }
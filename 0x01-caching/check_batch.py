@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check get_many / put_many of every policy against one key at a time
+
+Two caches of each policy run the same random workload, one through
+the batch calls and the other through get and put on each key in
+turn. After every step both must hold the same items and report the
+same hits and evictions, and at the end they must evict their
+remaining keys in the same order.
+
+    ./check_batch.py [--trials 300] [--policies lru,lfu]
+"""
+
+import argparse
+import random
+from typing import Any, Dict, List, Optional
+
+from base_caching import EVICTED, BaseCaching
+from policies import POLICIES, load_policy
+
+TRIALS = 300
+STEPS = 40
+KEYS = 15
+
+
+def eviction_order(cache: BaseCaching) -> List[Any]:
+    """Empty `cache` through its policy, returning the keys evicted"""
+    evicted: List[Any] = []
+    cache.listeners.append(
+        lambda key, item, reason: evicted.append(key)
+        if reason == EVICTED else None)
+    cache.max_items = 0
+    cache._evict()
+    return evicted
+
+
+def check(policy: type, seed: int) -> Optional[str]:
+    """
+    Run one random workload on a batch and a sequential cache.
+
+    Returns:
+    Optional[str]: The first difference found, None if there is none
+    """
+    rng = random.Random(seed)
+    options: Dict[str, Any] = {"max_items": rng.choice([1, 3, 8])}
+    if rng.random() < 0.4:
+        options.update(max_bytes=rng.randrange(20, 200),
+                       weigher=lambda key, item: len(item))
+    batch = policy(listener=None, **options)
+    sequential = policy(listener=None, **options)
+    evicted: List[Any] = []
+    sequential.listeners.append(
+        lambda key, item, reason: evicted.append(key)
+        if reason == EVICTED else None)
+
+    for step in range(STEPS):
+        if rng.random() < 0.5:
+            items = [(rng.randrange(KEYS), "x" * rng.randrange(30))
+                     for _ in range(rng.randrange(6))]
+            evicted.clear()
+            for key, item in items:
+                sequential.put(key, item)
+            # A key evicted, then put again, is not reported
+            expected = set(evicted) - set(sequential.cache_data)
+            found = set(batch.put_many(items)) - set(batch.cache_data)
+        else:
+            keys = [rng.randrange(KEYS) for _ in range(rng.randrange(6))]
+            expected = {}
+            for key in keys:
+                item = sequential.get(key)
+                if item is not None:
+                    expected[key] = item
+            found = batch.get_many(keys)
+        if found != expected:
+            return "step {}: batch call returned {}, expected {}".format(
+                step, found, expected)
+        if dict(batch.cache_data) != dict(sequential.cache_data):
+            return "step {}: batch cache holds {}, expected {}".format(
+                step, dict(batch.cache_data), dict(sequential.cache_data))
+
+    found, expected = eviction_order(batch), eviction_order(sequential)
+    if found != expected:
+        return "eviction order {}, expected {}".format(found, expected)
+    return None
+
+
+def main() -> None:
+    """Check every policy, exiting with an error on the first mismatch"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=TRIALS)
+    parser.add_argument("--policies", default=",".join(POLICIES))
+    args = parser.parse_args()
+
+    for name in args.policies.split(","):
+        policy = load_policy(name)
+        for seed in range(args.trials):
+            error = check(policy, seed)
+            if error is not None:
+                raise SystemExit("{} (seed {}): {}".format(name, seed, error))
+        print("{}: {} trials ok".format(name, args.trials))
+
+
+if __name__ == "__main__":
+    main()
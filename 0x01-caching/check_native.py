@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Check the C LFU/LRU caches against the Python ones they replace
+
+Each native cache and its Python counterpart run the same random
+workload of gets, puts and batch calls. They must return the same
+items, hold the same entries and notify the same evictions in the
+same order. Reference counts, cyclic garbage and argument errors of
+the extension are checked too. Skipped unless the extension is built
+(python3 setup.py build_ext --inplace).
+
+    ./check_native.py [--seeds 3] [--operations 20000]
+"""
+
+import argparse
+import gc
+import sys
+import weakref
+from random import Random
+from typing import Any, Callable, List, Optional
+
+import native_cache
+from policies import load_policy
+
+CAPACITIES = (0, 1, 2, 4, 50)
+SEEDS = 3
+OPERATIONS = 20000
+
+
+def differential(native: type, python: type, capacity: int, seed: int,
+                 operations: int) -> Optional[str]:
+    """
+    Run one random workload on a native and a Python cache.
+
+    Returns:
+    Optional[str]: The first difference found, None if there is none
+    """
+    rng = Random(seed)
+    keys = capacity * 3 + 3
+    notified: List[List] = [[], []]
+    caches = [cls(max_items=capacity,
+                  listener=lambda key, item, reason, seen=seen:
+                  seen.append((key, item, reason)))
+              for cls, seen in zip((native, python), notified)]
+    fast, slow = caches
+    for step in range(operations):
+        op = rng.random()
+        if op < 0.5:
+            key = rng.randrange(keys)
+            found, expected = fast.get(key), slow.get(key)
+        elif op < 0.9:
+            key, item = rng.randrange(keys), rng.randrange(3)
+            found, expected = fast.put(key, item), slow.put(key, item)
+        elif op < 0.95:
+            batch = [rng.randrange(keys) for _ in range(5)]
+            found, expected = fast.get_many(batch), slow.get_many(batch)
+        else:
+            batch = [(rng.randrange(keys), rng.randrange(1, 4))
+                     for _ in range(5)]
+            found, expected = fast.put_many(batch), slow.put_many(batch)
+        if found != expected:
+            return "step {}: returned {!r}, expected {!r}".format(
+                step, found, expected)
+        if fast.cache_data != dict(slow.cache_data):
+            return "step {}: holds {}, expected {}".format(
+                step, fast.cache_data, dict(slow.cache_data))
+    if notified[0] != notified[1]:
+        return "evictions differ"
+    return None
+
+
+def expect(error: type, call: Callable[[], Any]) -> None:
+    """Fail unless call() raises `error`"""
+    try:
+        call()
+    except error:
+        return
+    raise SystemExit("{} not raised".format(error.__name__))
+
+
+def check_extension() -> None:
+    """Eviction order, reference counts, garbage and argument errors"""
+    LFUCache, LRUCache = native_cache.LFUCache, native_cache.LRUCache
+
+    cache = LFUCache(max_items=3, listener=None)
+    for key in "abc":
+        cache.put(key, 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    if cache.keys() != ["c", "b", "a"] or cache.frequency("a") != 3 \
+            or cache.frequency("z") != 0:
+        raise SystemExit("LFU order {}".format(cache.keys()))
+
+    # Every reference taken on a key or an item is given back
+    item, key = object(), "key-{}".format(7)
+    before = sys.getrefcount(item), sys.getrefcount(key)
+    cache = LRUCache(max_items=2, listener=None)
+    for i in range(1000):
+        cache.put(key, item)
+        cache.get(key)
+        cache.put(i, item)
+    cache.clear()
+    del cache
+    if (sys.getrefcount(item), sys.getrefcount(key)) != before:
+        raise SystemExit("reference leak")
+
+    # A cache holding itself is collected
+    class Item:
+        pass
+    item = Item()
+    cache = LFUCache(max_items=4, listener=None)
+    cache.put("self", cache)
+    cache.put("item", item)
+    ref = weakref.ref(item)
+    del item, cache
+    gc.collect()
+    if ref() is not None:
+        raise SystemExit("cycle not collected")
+
+    cache = LRUCache(max_items=2, listener=None)
+    expect(ValueError, lambda: cache.put("a", 1, 5))
+    expect(ValueError, lambda: cache.put("a", 1, ttl=5))
+    expect(ValueError, lambda: LRUCache(max_bytes=10))
+    expect(TypeError, lambda: cache.get([]))
+    expect(TypeError, lambda: cache.put("a", 1, foo=1))
+    cache.put("a", 1, ttl=None)
+
+    # A listener may put into the cache evicting to it
+    cache = LRUCache(max_items=1, listener=lambda key, item, reason:
+                     cache.put(key + "x", item) if len(key) < 5 else None)
+    for key in "abcdef":
+        cache.put(key, 1)
+    if len(cache) != 1:
+        raise SystemExit("reentrant put left {}".format(cache.items()))
+
+    # Errors raised comparing keys propagate
+    class Key:
+        def __hash__(self) -> int:
+            return 1
+
+        def __eq__(self, other: object) -> bool:
+            raise KeyError("boom")
+    cache = LFUCache(max_items=4, listener=None)
+    cache.put(Key(), 1)
+    expect(KeyError, lambda: cache.get(Key()))
+
+
+def main() -> None:
+    """Check both native caches, exiting with an error on a mismatch"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seeds", type=int, default=SEEDS)
+    parser.add_argument("--operations", type=int, default=OPERATIONS)
+    args = parser.parse_args()
+
+    if not native_cache.NATIVE:
+        print("_lfu_cache is not built: skipped")
+        return
+    for name in ("lfu", "lru"):
+        native = getattr(native_cache, name.upper() + "Cache")
+        for capacity in CAPACITIES:
+            for seed in range(args.seeds):
+                error = differential(native, load_policy(name), capacity,
+                                     seed, args.operations)
+                if error is not None:
+                    raise SystemExit("{} (max_items {}, seed {}): {}".format(
+                        name, capacity, seed, error))
+        print("{}: same as the Python cache".format(name))
+    check_extension()
+    print("extension checks ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Thread-safe caches built on the BaseCaching policies
+
+The policies mutate their bookkeeping on every get (LRU and MRU move
+the key, LFU moves it between frequency nodes), so even readers need
+exclusive access.
+
+  - ThreadSafeCache serializes one policy behind a single lock.
+  - ShardedCache splits the key space over N independent policies,
+    each with its own lock, so threads only contend when their keys
+    hash to the same shard.
+  - ExpirySweeper removes expired entries from either of them in the
+    background, so entries nobody reads again do not linger.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from base_caching import BaseCaching, Items, item_pairs
+from cache_stats import CacheStats
+from policies import load_policy
+
+
+def _policy_class(policy: Union[str, type]) -> type:
+    """Accept a policy class or its registered short name"""
+    return load_policy(policy) if isinstance(policy, str) else policy
+
+
+class ThreadSafeCache():
+    """
+    ThreadSafeCache defines:
+        - one cache policy guarded by a re-entrant lock
+    """
+
+    def __init__(self, cache: BaseCaching) -> None:
+        """Wrap `cache`; it must not be used directly afterwards."""
+        self.cache = cache
+        self.lock = threading.RLock()
+
+    @property
+    def cache_data(self) -> Dict[Any, Any]:
+        """Copy of the wrapped cache content"""
+        with self.lock:
+            return dict(self.cache.cache_data)
+
+    def put(self, key: Any, item: Any, ttl: Optional[float] = None) -> None:
+        """Add an item in the cache."""
+        with self.lock:
+            self.cache.put(key, item, ttl)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get an item by key."""
+        with self.lock:
+            return self.cache.get(key)
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys` under one lock hold."""
+        with self.lock:
+            return self.cache.get_many(keys)
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair under one lock hold; returns the evicted."""
+        with self.lock:
+            return self.cache.put_many(items, ttl)
+
+    def expire(self) -> int:
+        """Remove the expired entries, see BaseCaching.expire."""
+        with self.lock:
+            return self.cache.expire()
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the wrapped cache, see BaseCaching.stats."""
+        with self.lock:
+            return self.cache.stats()
+
+    def print_cache(self) -> None:
+        """Print the cache."""
+        with self.lock:
+            self.cache.print_cache()
+
+    def __len__(self) -> int:
+        return len(self.cache.cache_data)
+
+
+class ShardedCache():
+    """
+    ShardedCache defines:
+        - N caches of the same policy, each behind its own lock
+        - a key always lives in shard hash(key) % N
+
+    The limits are split evenly between the shards, so eviction follows
+    the policy within a shard only: a key may be evicted while another
+    shard still holds an older one.
+    """
+
+    def __init__(self, policy: Union[str, type], shards: int = 16,
+                 max_items: Optional[int] = None,
+                 max_bytes: Optional[int] = None, **kwargs: Any) -> None:
+        """
+        Create the shards.
+
+        Parameters:
+        policy (str | type): Policy class, or its name in POLICIES
+        shards (int): Number of shards, at most max_items
+        max_items, max_bytes: Limits of the whole cache
+        kwargs: Passed on to every shard, e.g. weigher or stats
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        policy = _policy_class(policy)
+        if max_items is None:
+            max_items = BaseCaching.MAX_ITEMS
+        shards = max(min(shards, max_items), 1)
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self.shards: List[BaseCaching] = []
+        for index in range(shards):
+            # Spread the remainder so the shard limits add up exactly
+            items = max_items // shards + (index < max_items % shards)
+            budget = None
+            if max_bytes is not None:
+                budget = max_bytes // shards + (index < max_bytes % shards)
+            self.shards.append(policy(max_items=items, max_bytes=budget,
+                                      **kwargs))
+        self.locks = [threading.RLock() for _ in self.shards]
+
+    def shard_index(self, key: Any) -> int:
+        """Index of the shard `key` belongs to"""
+        return hash(key) % len(self.shards)
+
+    @property
+    def cache_data(self) -> Dict[Any, Any]:
+        """Copy of the content of every shard"""
+        data: Dict[Any, Any] = {}
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                data.update(shard.cache_data)
+        return data
+
+    def put(self, key: Any, item: Any, ttl: Optional[float] = None) -> None:
+        """Add an item in the shard of `key`."""
+        index = self.shard_index(key)
+        with self.locks[index]:
+            self.shards[index].put(key, item, ttl)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get an item by key from its shard."""
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].get(key)
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys`, locking each shard once."""
+        batches: Dict[int, List[Any]] = {}
+        for key in keys:
+            batches.setdefault(self.shard_index(key), []).append(key)
+        found: Dict[Any, Any] = {}
+        for index, batch in batches.items():
+            with self.locks[index]:
+                found.update(self.shards[index].get_many(batch))
+        return found
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair, locking each shard once; returns the evicted."""
+        batches: Dict[int, List[Any]] = {}
+        for key, item in item_pairs(items):
+            batches.setdefault(self.shard_index(key), []).append((key, item))
+        evicted: Dict[Any, Any] = {}
+        for index, batch in batches.items():
+            with self.locks[index]:
+                evicted.update(self.shards[index].put_many(batch, ttl))
+        return evicted
+
+    def expire(self) -> int:
+        """Remove the expired entries, one shard at a time."""
+        removed = 0
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                removed += shard.expire()
+        return removed
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics summed over the shards, None unless enabled."""
+        total = CacheStats()
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                if shard.statistics is None:
+                    return None
+                total.merge(shard.statistics)
+        return total.snapshot()
+
+    def print_cache(self) -> None:
+        """Print the content of every shard, sorted by key."""
+        self.expire()
+        data = self.cache_data
+        print("Current cache:")
+        for key in sorted(data.keys()):
+            print("{}: {}".format(key, data.get(key)))
+
+    def __len__(self) -> int:
+        return sum(len(shard.cache_data) for shard in self.shards)
+
+
+class ExpirySweeper(threading.Thread):
+    """
+    ExpirySweeper defines:
+        - a daemon thread calling cache.expire() every `interval` seconds
+
+    The cache must be a ThreadSafeCache or a ShardedCache; a bare policy
+    has no lock to keep the sweeper out of a concurrent put or get.
+    """
+
+    def __init__(self, cache: Union[ThreadSafeCache, ShardedCache],
+                 interval: float = 1.0) -> None:
+        """Prepare the sweeper; call start() to run it."""
+        super().__init__(name="cache-expiry-sweeper", daemon=True)
+        self.cache = cache
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """Sweep until stop() is called."""
+        while not self._stopped.wait(self.interval):
+            self.cache.expire()
+
+    def stop(self) -> None:
+        """Stop sweeping and wait for the thread to finish."""
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
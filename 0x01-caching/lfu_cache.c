@@ -1,326 +1,1081 @@
-#include <stdio.h>
-#include <stdlib.h>
-#include <string.h>
+/*
+ * _lfu_cache - LFU and LRU caches as CPython extension types
+ *
+ * Entries live in an open addressing hash table keyed by the Python
+ * hash of their key, and in a doubly linked list that gives the
+ * eviction order:
+ *   - LRUCache: one list, least recently used entry first;
+ *   - LFUCache: a list per usage count ("bucket"), oldest entry first,
+ *     the buckets themselves linked in ascending usage count.
+ * get, put and eviction are all O(1).
+ *
+ * Build in place with: python3 setup.py build_ext --inplace
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <structmember.h>
 
 #define MAX_ITEMS 4
+#define MIN_SLOTS 8
 
 /**
- * struct CacheItem - Structure for a cache item.
- * @key: The key associated with the cache item.
- * @item: The item stored in the cache.
- * @usage_count: The usage count of the cache item.
- * @next: Pointer to the next cache item.
+ * struct Entry - One cached key and its item.
+ * @key: The key, a strong reference.
+ * @item: The item, a strong reference.
+ * @hash: The hash of the key.
+ * @prev: Previous entry in its list, towards the next victim.
+ * @next: Next entry in its list.
+ * @bucket: Usage count bucket holding the entry (LFU only).
  */
-typedef struct CacheItem
+typedef struct Entry
 {
-	char *key;
-	void *item;
-	int usage_count;
-	struct CacheItem *next;
-} CacheItem;
+	PyObject *key;
+	PyObject *item;
+	Py_hash_t hash;
+	struct Entry *prev;
+	struct Entry *next;
+	struct Bucket *bucket;
+} Entry;
 
 /**
- * struct LFUCache - Structure for the LFU cache.
- * @head: Pointer to the head of the linked list of cache items.
- * @size: The current size of the cache.
+ * struct Bucket - Entries sharing one usage count, oldest first.
+ * @frequency: The usage count.
+ * @head: Oldest entry.
+ * @tail: Newest entry.
+ * @prev: Bucket of the next lower usage count.
+ * @next: Bucket of the next higher usage count.
  */
-typedef struct LFUCache
+typedef struct Bucket
 {
-	CacheItem *head;
-	int size;
-} LFUCache;
+	unsigned long long frequency;
+	Entry *head;
+	Entry *tail;
+	struct Bucket *prev;
+	struct Bucket *next;
+} Bucket;
 
 /**
- * create_cache_item - Creates a new cache item.
- * @key: The key associated with the cache item.
- * @item: The item to store in the cache.
- *
- * Return: Pointer to the newly created cache item.
+ * struct Cache - State shared by both cache types.
+ * @slots: Hash table of entries; NULL, TOMBSTONE or an entry.
+ * @mask: Number of slots minus one, the slots being a power of two.
+ * @used: Slots holding an entry or a tombstone.
+ * @size: Entries in the cache.
+ * @max_items: Entries kept at most.
+ * @mutations: Bumped on every change, to detect reentrant changes.
+ * @listener: Called with (key, item, "evicted") on eviction, or None.
+ * @head: LRU: least recently used entry.
+ * @tail: LRU: most recently used entry.
+ * @buckets: LFU: sentinel of the circular list of buckets.
+ * @spare: LFU: an unused bucket kept to avoid malloc/free churn.
+ * @lfu: Whether the cache evicts by usage count rather than recency.
  */
-CacheItem *create_cache_item(const char *key, void *item)
+typedef struct
 {
-	CacheItem *new_item = (CacheItem *)malloc(sizeof(CacheItem));
+	PyObject_HEAD
+	Entry **slots;
+	Py_ssize_t mask;
+	Py_ssize_t used;
+	Py_ssize_t size;
+	Py_ssize_t max_items;
+	unsigned long mutations;
+	PyObject *listener;
+	Entry *head;
+	Entry *tail;
+	Bucket buckets;
+	Bucket *spare;
+	int lfu;
+} Cache;
+
+static char tombstone_marker;
+#define TOMBSTONE ((Entry *)&tombstone_marker)
+#define IS_ENTRY(e) ((e) != NULL && (e) != TOMBSTONE)
 
-	if (new_item == NULL)
+static PyObject *str_evicted;
+static PyTypeObject LFUCacheType;
+static PyTypeObject LRUCacheType;
+
+/**
+ * list_append - Links an entry at the tail of a list.
+ * @head: Head of the list.
+ * @tail: Tail of the list.
+ * @e: The entry.
+ */
+static void list_append(Entry **head, Entry **tail, Entry *e)
+{
+	e->prev = *tail;
+	e->next = NULL;
+	if (*tail != NULL)
+		(*tail)->next = e;
+	else
+		*head = e;
+	*tail = e;
+}
+
+/**
+ * list_unlink - Removes an entry from a list.
+ * @head: Head of the list.
+ * @tail: Tail of the list.
+ * @e: The entry.
+ */
+static void list_unlink(Entry **head, Entry **tail, Entry *e)
+{
+	if (e->prev != NULL)
+		e->prev->next = e->next;
+	else
+		*head = e->next;
+	if (e->next != NULL)
+		e->next->prev = e->prev;
+	else
+		*tail = e->prev;
+	e->prev = e->next = NULL;
+}
+
+/**
+ * bucket_reserve - Makes sure a spare bucket is available.
+ * @self: The cache.
+ *
+ * Return: 0 on success, -1 with MemoryError set on failure.
+ */
+static int bucket_reserve(Cache *self)
+{
+	if (self->spare == NULL)
 	{
-		return (NULL);
+		self->spare = PyMem_Malloc(sizeof(Bucket));
+		if (self->spare == NULL)
+		{
+			PyErr_NoMemory();
+			return (-1);
+		}
 	}
-	new_item->key = strdup(key);
-	new_item->item = item;
-	new_item->usage_count = 1;
-	new_item->next = NULL;
-	return (new_item);
+	return (0);
 }
 
 /**
- * init_cache - Initializes the LFU cache.
+ * bucket_insert_after - Links the spare bucket after another.
+ * @self: The cache, with a spare bucket reserved.
+ * @b: The bucket to insert after.
+ * @frequency: Usage count of the new bucket.
  *
- * Return: Pointer to the initialized LFU cache.
+ * Return: The new, empty bucket.
  */
-LFUCache *init_cache(void)
+static Bucket *bucket_insert_after(Cache *self, Bucket *b,
+				   unsigned long long frequency)
 {
-	LFUCache *cache = (LFUCache *)malloc(sizeof(LFUCache));
+	Bucket *n = self->spare;
 
-	if (cache == NULL)
-	{
-		return (NULL);
-	}
-	cache->head = NULL;
-	cache->size = 0;
-	return (cache);
+	self->spare = NULL;
+	n->frequency = frequency;
+	n->head = n->tail = NULL;
+	n->prev = b;
+	n->next = b->next;
+	b->next->prev = n;
+	b->next = n;
+	return (n);
+}
+
+/**
+ * bucket_free - Unlinks an empty bucket and keeps or frees it.
+ * @self: The cache.
+ * @b: The bucket.
+ */
+static void bucket_free(Cache *self, Bucket *b)
+{
+	b->prev->next = b->next;
+	b->next->prev = b->prev;
+	if (self->spare == NULL)
+		self->spare = b;
+	else
+		PyMem_Free(b);
 }
 
 /**
- * find_lfu_item - Finds the least frequently used item in the cache.
- * @cache: The LFU cache.
+ * table_find - Looks a key up in the hash table.
+ * @self: The cache.
+ * @key: The key.
+ * @hash: Hash of the key.
+ * @found: Set to the entry of the key, or NULL if absent.
  *
- * Return: Pointer to the least frequently used cache item.
+ * Return: 0 on success, -1 with an exception set on failure.
  */
-CacheItem *find_lfu_item(LFUCache *cache)
+static int table_find(Cache *self, PyObject *key, Py_hash_t hash,
+		      Entry **found)
 {
-	CacheItem *current = cache->head;
-	CacheItem *lfu_item = current;
+	size_t perturb = (size_t)hash;
+	size_t i = (size_t)hash & (size_t)self->mask;
+	unsigned long mutations;
+	Entry *e;
+	PyObject *other;
+	int cmp;
 
-	while (current != NULL)
+	for (;;)
 	{
-		if (current->usage_count < lfu_item->usage_count)
+		e = self->slots[i];
+		if (e == NULL)
+			break;
+		if (e != TOMBSTONE && e->hash == hash)
 		{
-			lfu_item = current;
+			if (e->key == key)
+				break;
+			/* __eq__ may run any code, even code using this cache */
+			mutations = self->mutations;
+			other = e->key;
+			Py_INCREF(other);
+			cmp = PyObject_RichCompareBool(other, key, Py_EQ);
+			Py_DECREF(other);
+			if (cmp < 0)
+				return (-1);
+			if (self->mutations != mutations)
+			{
+				PyErr_SetString(PyExc_RuntimeError,
+						"cache changed during key comparison");
+				return (-1);
+			}
+			if (cmp)
+				break;
 		}
-		current = current->next;
+		perturb >>= 5;
+		i = (i * 5 + perturb + 1) & (size_t)self->mask;
 	}
-	return (lfu_item);
+	*found = e;
+	return (0);
 }
 
 /**
- * find_cache_item - Finds an item in the cache by key.
- * @cache: The LFU cache.
- * @key: The key associated with the cache item.
+ * table_slot - Finds the slot of an entry, or a slot for a new one.
+ * @self: The cache.
+ * @hash: Hash of the entry's key.
+ * @e: The entry to find, or NULL for the first free slot.
  *
- * Return: Pointer to the cache item if found, NULL otherwise.
+ * Return: Index of the slot.
  */
-CacheItem *find_cache_item(LFUCache *cache, const char *key)
+static size_t table_slot(Cache *self, Py_hash_t hash, Entry *e)
 {
-	CacheItem *current = cache->head;
+	size_t perturb = (size_t)hash;
+	size_t i = (size_t)hash & (size_t)self->mask;
+	Entry *slot;
 
-	while (current != NULL)
+	for (;;)
 	{
-		if (strcmp(current->key, key) == 0)
-		{
-			return (current);
-		}
-		current = current->next;
+		slot = self->slots[i];
+		if (e == NULL ? !IS_ENTRY(slot) : slot == e)
+			return (i);
+		perturb >>= 5;
+		i = (i * 5 + perturb + 1) & (size_t)self->mask;
 	}
-	return (NULL);
 }
 
 /**
- * add_cache_item - Adds a new item to the cache.
- * @cache: The LFU cache.
- * @key: The key associated with the cache item.
- * @item: The item to store in the cache.
+ * table_reserve - Makes sure one more entry fits below 2/3 load.
+ * @self: The cache.
  *
- * Return: 0 on success, -1 on failure.
+ * Return: 0 on success, -1 with MemoryError set on failure.
  */
-int add_cache_item(LFUCache *cache, const char *key, void *item)
+static int table_reserve(Cache *self)
 {
-	CacheItem *new_item;
+	Py_ssize_t n = MIN_SLOTS, i, old_n = self->mask + 1;
+	Entry **old = self->slots, **slots;
 
-	/* If the cache is full, remove the least frequently used item */
-	if (cache->size >= MAX_ITEMS)
+	if ((self->used + 1) * 3 < old_n * 2)
+		return (0);
+	/* Rehash; sized on live entries, so tombstones are dropped */
+	while (n * 2 <= (self->size + 1) * 3)
+		n <<= 1;
+	slots = PyMem_Calloc(n, sizeof(Entry *));
+	if (slots == NULL)
 	{
-		CacheItem *lfu_item = find_lfu_item(cache);
+		PyErr_NoMemory();
+		return (-1);
+	}
+	self->slots = slots;
+	self->mask = n - 1;
+	self->used = self->size;
+	for (i = 0; i < old_n; i++)
+		if (IS_ENTRY(old[i]))
+			slots[table_slot(self, old[i]->hash, NULL)] = old[i];
+	PyMem_Free(old);
+	return (0);
+}
+
+/**
+ * cache_unlink - Removes an entry from the table and its list.
+ * @self: The cache.
+ * @e: The entry; the caller owns it and its references afterwards.
+ */
+static void cache_unlink(Cache *self, Entry *e)
+{
+	Bucket *b = e->bucket;
+
+	self->slots[table_slot(self, e->hash, e)] = TOMBSTONE;
+	self->size--;
+	self->mutations++;
+	if (b != NULL)
+	{
+		list_unlink(&b->head, &b->tail, e);
+		if (b->head == NULL)
+			bucket_free(self, b);
+	}
+	else
+	{
+		list_unlink(&self->head, &self->tail, e);
+	}
+}
 
-		printf("DISCARD: %s\n", lfu_item->key);
+/**
+ * cache_drop_all - Empties the cache without telling the listener.
+ * @self: The cache.
+ * @reallocate: Whether to give the cache a new, empty table.
+ *
+ * Return: 0 on success, -1 with MemoryError set on failure.
+ */
+static int cache_drop_all(Cache *self, int reallocate)
+{
+	Entry **old = self->slots;
+	Py_ssize_t i, old_n = self->mask + 1;
+	int status = 0;
 
-		/* Remove the LFU item from the list */
-		if (lfu_item == cache->head)
+	/* Detach everything first: the DECREFs below may run any code */
+	while (self->buckets.next != &self->buckets)
+		bucket_free(self, self->buckets.next);
+	self->head = self->tail = NULL;
+	self->slots = NULL;
+	self->mask = -1;
+	self->used = self->size = 0;
+	self->mutations++;
+	if (reallocate)
+	{
+		self->slots = PyMem_Calloc(MIN_SLOTS, sizeof(Entry *));
+		if (self->slots == NULL)
 		{
-			cache->head = lfu_item->next;
+			PyErr_NoMemory();
+			status = -1;
 		}
 		else
 		{
-			CacheItem *current = cache->head;
+			self->mask = MIN_SLOTS - 1;
+		}
+	}
+	for (i = 0; old != NULL && i < old_n; i++)
+	{
+		if (IS_ENTRY(old[i]))
+		{
+			Py_DECREF(old[i]->key);
+			Py_DECREF(old[i]->item);
+			PyMem_Free(old[i]);
+		}
+	}
+	PyMem_Free(old);
+	return (status);
+}
 
-			while (current != NULL && current->next != lfu_item)
-			{
-				current = current->next;
-			}
-			if (current != NULL)
-			{
-				current->next = lfu_item->next;
-			}
+/**
+ * cache_notify - Tells the listener an entry was evicted.
+ * @self: The cache.
+ * @key: The evicted key, a reference the function steals.
+ * @item: The evicted item, a reference the function steals.
+ *
+ * Return: 0 on success, -1 if the listener raised.
+ */
+static int cache_notify(Cache *self, PyObject *key, PyObject *item)
+{
+	PyObject *result;
+	int status = 0;
+
+	if (self->listener != Py_None)
+	{
+		result = PyObject_CallFunctionObjArgs(self->listener, key, item,
+						      str_evicted, NULL);
+		status = result == NULL ? -1 : 0;
+		Py_XDECREF(result);
+	}
+	Py_DECREF(key);
+	Py_DECREF(item);
+	return (status);
+}
+
+/**
+ * cache_lookup - Finds the entry of a key.
+ * @self: The cache.
+ * @key: The key.
+ * @hash: Set to the hash of the key.
+ * @found: Set to the entry, or NULL if the key is not cached.
+ *
+ * Return: 0 on success, -1 with an exception set on failure.
+ */
+static int cache_lookup(Cache *self, PyObject *key, Py_hash_t *hash,
+			Entry **found)
+{
+	if (self->slots == NULL)
+	{
+		PyErr_SetString(PyExc_RuntimeError, "cache is not initialized");
+		return (-1);
+	}
+	*hash = PyObject_Hash(key);
+	if (*hash == -1)
+		return (-1);
+	return (table_find(self, key, *hash, found));
+}
+
+/**
+ * lfu_increment - Moves an entry to the bucket of the next usage count.
+ * @self: The cache.
+ * @e: The entry.
+ *
+ * Return: 0 on success, -1 with MemoryError set on failure.
+ */
+static int lfu_increment(Cache *self, Entry *e)
+{
+	Bucket *b = e->bucket, *target = b->next;
+	unsigned long long frequency = b->frequency + 1;
+
+	if (target == &self->buckets || target->frequency != frequency)
+	{
+		if (b->head == b->tail)
+		{
+			/* Sole entry of its bucket: bump the bucket itself */
+			b->frequency = frequency;
+			return (0);
 		}
-		free(lfu_item->key);
-		free(lfu_item);
-		cache->size--;
+		if (bucket_reserve(self) < 0)
+			return (-1);
+		target = bucket_insert_after(self, b, frequency);
 	}
+	list_unlink(&b->head, &b->tail, e);
+	list_append(&target->head, &target->tail, e);
+	e->bucket = target;
+	if (b->head == NULL)
+		bucket_free(self, b);
+	return (0);
+}
+
+/**
+ * cache_add - Stores a new key, evicting the victim if the cache is full.
+ * @self: The cache.
+ * @key: The key, absent from the cache.
+ * @hash: Hash of the key.
+ * @item: The item.
+ *
+ * Return: 0 on success, -1 with an exception set on failure.
+ */
+static int cache_add(Cache *self, PyObject *key, Py_hash_t hash,
+		     PyObject *item)
+{
+	Entry *e, *victim = NULL;
+	Bucket *first;
+	size_t slot;
 
-	/* Add the new item to the cache */
-	new_item = create_cache_item(key, item);
-	if (new_item == NULL)
+	Py_INCREF(key);
+	Py_INCREF(item);
+	if (self->max_items <= 0)
+		return (cache_notify(self, key, item));
+	/* Get all the memory first, so that a failure changes nothing */
+	e = PyMem_Malloc(sizeof(Entry));
+	if (e == NULL || table_reserve(self) < 0 ||
+	    (self->lfu && bucket_reserve(self) < 0))
 	{
+		if (e == NULL)
+			PyErr_NoMemory();
+		PyMem_Free(e);
+		Py_DECREF(key);
+		Py_DECREF(item);
 		return (-1);
 	}
-	new_item->next = cache->head;
-	cache->head = new_item;
-	cache->size++;
+	if (self->size >= self->max_items)
+	{
+		/* Oldest of the lowest bucket, or least recently used */
+		victim = self->lfu ? self->buckets.next->head : self->head;
+		cache_unlink(self, victim);
+	}
+	e->key = key;
+	e->item = item;
+	e->hash = hash;
+	e->bucket = NULL;
+	slot = table_slot(self, hash, NULL);
+	if (self->slots[slot] == NULL)
+		self->used++;
+	self->slots[slot] = e;
+	self->size++;
+	self->mutations++;
+	if (self->lfu)
+	{
+		first = self->buckets.next;
+		if (first == &self->buckets || first->frequency != 1)
+			first = bucket_insert_after(self, &self->buckets, 1);
+		e->bucket = first;
+		list_append(&first->head, &first->tail, e);
+	}
+	else
+	{
+		list_append(&self->head, &self->tail, e);
+	}
+	if (victim == NULL)
+		return (0);
+	/* Callbacks only once the cache is consistent again */
+	key = victim->key;
+	item = victim->item;
+	PyMem_Free(victim);
+	return (cache_notify(self, key, item));
+}
 
+/**
+ * parse_put - Unpacks the (key, item, ttl=None) arguments of put.
+ * @args: Positional then keyword argument values.
+ * @nargs: Number of positional arguments.
+ * @kwnames: Names of the keyword arguments, or NULL.
+ *
+ * Return: 0 on success, -1 with an exception set on failure.
+ */
+static int parse_put(PyObject *const *args, Py_ssize_t nargs,
+		     PyObject *kwnames)
+{
+	Py_ssize_t i, nkw = kwnames == NULL ? 0 : PyTuple_GET_SIZE(kwnames);
+	PyObject *ttl = nargs == 3 ? args[2] : Py_None;
+
+	if (nargs < 2 || nargs + nkw > 3)
+	{
+		PyErr_SetString(PyExc_TypeError,
+				"put() takes a key, an item and an optional ttl");
+		return (-1);
+	}
+	for (i = 0; i < nkw; i++)
+	{
+		if (PyUnicode_CompareWithASCIIString(
+			    PyTuple_GET_ITEM(kwnames, i), "ttl") != 0)
+		{
+			PyErr_Format(PyExc_TypeError,
+				     "put() got an unexpected keyword argument '%U'",
+				     PyTuple_GET_ITEM(kwnames, i));
+			return (-1);
+		}
+		ttl = args[nargs + i];
+	}
+	if (ttl != Py_None)
+	{
+		PyErr_SetString(PyExc_ValueError,
+				"ttl is only supported by the pure-Python caches");
+		return (-1);
+	}
 	return (0);
 }
 
 /**
- * put_cache - Adds an item to the cache using the LFU algorithm.
- * @cache: The LFU cache.
- * @key: The key associated with the cache item.
- * @item: The item to store in the cache.
+ * cache_update - Replaces the item of a cached key.
+ * @e: The entry.
+ * @item: The new item.
  */
-void put_cache(LFUCache *cache, const char *key, void *item)
+static void cache_update(Entry *e, PyObject *item)
 {
-	CacheItem *existing_item;
+	PyObject *old = e->item;
+
+	Py_INCREF(item);
+	e->item = item;
+	/* Last: freeing the old item may run any code */
+	Py_DECREF(old);
+}
 
-	/* Check if the item already exists in the cache */
-	existing_item = find_cache_item(cache, key);
-	if (existing_item != NULL)
+/**
+ * LFU_put - Adds an item, evicting the least frequently used one.
+ * @self: The cache.
+ * @args: key, item and an optional ttl, which must be None.
+ * @nargs: Number of positional arguments.
+ * @kwnames: Names of the keyword arguments, or NULL.
+ *
+ * Return: None, or NULL with an exception set.
+ */
+static PyObject *LFU_put(Cache *self, PyObject *const *args,
+			 Py_ssize_t nargs, PyObject *kwnames)
+{
+	PyObject *key, *item;
+	Py_hash_t hash;
+	Entry *e;
+
+	if (parse_put(args, nargs, kwnames) < 0)
+		return (NULL);
+	key = args[0];
+	item = args[1];
+	if (key == Py_None || item == Py_None)
+		Py_RETURN_NONE;
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (NULL);
+	if (e != NULL)
+	{
+		if (lfu_increment(self, e) < 0)
+			return (NULL);
+		cache_update(e, item);
+	}
+	else if (cache_add(self, key, hash, item) < 0)
 	{
-		existing_item->item = item;
-		existing_item->usage_count++;
-		return;
+		return (NULL);
 	}
+	Py_RETURN_NONE;
+}
+
+/**
+ * LRU_put - Adds an item, evicting the least recently used one.
+ * @self: The cache.
+ * @args: key, item and an optional ttl, which must be None.
+ * @nargs: Number of positional arguments.
+ * @kwnames: Names of the keyword arguments, or NULL.
+ *
+ * Return: None, or NULL with an exception set.
+ */
+static PyObject *LRU_put(Cache *self, PyObject *const *args,
+			 Py_ssize_t nargs, PyObject *kwnames)
+{
+	PyObject *key, *item;
+	Py_hash_t hash;
+	Entry *e;
+	int truth;
 
-	/* Add the new item to the cache */
-	if (add_cache_item(cache, key, item) == -1)
+	if (parse_put(args, nargs, kwnames) < 0)
+		return (NULL);
+	key = args[0];
+	item = args[1];
+	/* Same rule as LRUCache: falsy keys and items are ignored */
+	truth = PyObject_IsTrue(key);
+	if (truth > 0)
+		truth = PyObject_IsTrue(item);
+	if (truth <= 0)
+		return (truth < 0 ? NULL : Py_NewRef(Py_None));
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (NULL);
+	if (e != NULL)
+	{
+		list_unlink(&self->head, &self->tail, e);
+		list_append(&self->head, &self->tail, e);
+		cache_update(e, item);
+	}
+	else if (cache_add(self, key, hash, item) < 0)
 	{
-		fprintf(stderr, "Failed to add item to cache.\n");
+		return (NULL);
 	}
+	Py_RETURN_NONE;
+}
+
+/**
+ * LFU_get - Gets an item by key, counting one more use of it.
+ * @self: The cache.
+ * @key: The key.
+ *
+ * Return: The item, None if the key is not cached, NULL on error.
+ */
+static PyObject *LFU_get(Cache *self, PyObject *key)
+{
+	Py_hash_t hash;
+	Entry *e;
+
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (NULL);
+	if (e == NULL)
+		Py_RETURN_NONE;
+	if (lfu_increment(self, e) < 0)
+		return (NULL);
+	return (Py_NewRef(e->item));
+}
+
+/**
+ * LRU_get - Gets an item by key, making it the most recently used.
+ * @self: The cache.
+ * @key: The key.
+ *
+ * Return: The item, None if the key is not cached, NULL on error.
+ */
+static PyObject *LRU_get(Cache *self, PyObject *key)
+{
+	Py_hash_t hash;
+	Entry *e;
+
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (NULL);
+	if (e == NULL)
+		Py_RETURN_NONE;
+	list_unlink(&self->head, &self->tail, e);
+	list_append(&self->head, &self->tail, e);
+	return (Py_NewRef(e->item));
+}
+
+/**
+ * LFU_frequency - Number of uses counted for a key.
+ * @self: The cache.
+ * @key: The key.
+ *
+ * Return: The count, 0 if the key is not cached, NULL on error.
+ */
+static PyObject *LFU_frequency(Cache *self, PyObject *key)
+{
+	Py_hash_t hash;
+	Entry *e;
+
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (NULL);
+	return (PyLong_FromUnsignedLongLong(e == NULL ? 0 :
+					    e->bucket->frequency));
 }
 
 /**
- * get_cache - Gets an item from the cache by key.
- * @cache: The LFU cache.
- * @key: The key associated with the cache item.
+ * cache_list - Lists the entries in eviction order, next victim first.
+ * @self: The cache.
+ * @pairs: Whether to list (key, item) tuples rather than keys.
  *
- * Return: The item if found, NULL otherwise.
+ * Return: A new list, or NULL on error.
  */
-void *get_cache(LFUCache *cache, const char *key)
+static PyObject *cache_list(Cache *self, int pairs)
 {
-	CacheItem *current = cache->head;
+	PyObject *list = PyList_New(self->size), *value;
+	Bucket *b = self->buckets.next;
+	Entry *e = self->lfu ? NULL : self->head;
+	Py_ssize_t i = 0;
 
-	while (current != NULL)
+	if (list == NULL)
+		return (NULL);
+	for (;;)
 	{
-		if (strcmp(current->key, key) == 0)
+		/* LFU: walk the buckets from the lowest usage count */
+		while (e == NULL && self->lfu && b != &self->buckets)
+		{
+			e = b->head;
+			b = b->next;
+		}
+		if (e == NULL)
+			break;
+		if (pairs)
 		{
-			current->usage_count++;
-			return (current->item);
+			value = PyTuple_Pack(2, e->key, e->item);
+			if (value == NULL)
+			{
+				Py_DECREF(list);
+				return (NULL);
+			}
 		}
-		current = current->next;
+		else
+		{
+			value = Py_NewRef(e->key);
+		}
+		PyList_SET_ITEM(list, i++, value);
+		e = e->next;
 	}
-	return (NULL);
+	return (list);
+}
+
+/**
+ * Cache_items - items() method.
+ * @self: The cache.
+ * @unused: Unused.
+ *
+ * Return: List of (key, item) pairs, next victim first.
+ */
+static PyObject *Cache_items(Cache *self, PyObject *Py_UNUSED(unused))
+{
+	return (cache_list(self, 1));
+}
+
+/**
+ * Cache_keys - keys() method.
+ * @self: The cache.
+ * @unused: Unused.
+ *
+ * Return: List of the keys, next victim first.
+ */
+static PyObject *Cache_keys(Cache *self, PyObject *Py_UNUSED(unused))
+{
+	return (cache_list(self, 0));
+}
+
+/**
+ * Cache_clear - clear() method; the listener is not called.
+ * @self: The cache.
+ * @unused: Unused.
+ *
+ * Return: None, or NULL on error.
+ */
+static PyObject *Cache_clear(Cache *self, PyObject *Py_UNUSED(unused))
+{
+	if (cache_drop_all(self, 1) < 0)
+		return (NULL);
+	Py_RETURN_NONE;
+}
+
+/**
+ * Cache_len - len() of the cache.
+ * @self: The cache.
+ *
+ * Return: Number of entries.
+ */
+static Py_ssize_t Cache_len(Cache *self)
+{
+	return (self->size);
+}
+
+/**
+ * Cache_contains - `key in cache`, which does not count as a use.
+ * @self: The cache.
+ * @key: The key.
+ *
+ * Return: 1 if cached, 0 if not, -1 on error.
+ */
+static int Cache_contains(Cache *self, PyObject *key)
+{
+	Py_hash_t hash;
+	Entry *e;
+
+	if (cache_lookup(self, key, &hash, &e) < 0)
+		return (-1);
+	return (e != NULL);
 }
 
 /**
- * free_cache - Frees the LFU cache.
- * @cache: The LFU cache.
+ * Cache_get_listener - Getter of the listener attribute.
+ * @self: The cache.
+ * @closure: Unused.
+ *
+ * Return: The listener, or None.
  */
-void free_cache(LFUCache *cache)
+static PyObject *Cache_get_listener(Cache *self, void *closure)
 {
-	CacheItem *current = cache->head;
+	(void)closure;
+	return (Py_NewRef(self->listener));
+}
 
-	while (current != NULL)
+/**
+ * Cache_set_listener - Setter of the listener attribute.
+ * @self: The cache.
+ * @value: A callable, or None; deleting the attribute sets None.
+ * @closure: Unused.
+ *
+ * Return: 0 on success, -1 with TypeError set on failure.
+ */
+static int Cache_set_listener(Cache *self, PyObject *value, void *closure)
+{
+	(void)closure;
+	if (value == NULL)
+		value = Py_None;
+	if (value != Py_None && !PyCallable_Check(value))
 	{
-		CacheItem *temp = current;
+		PyErr_SetString(PyExc_TypeError, "listener must be callable or None");
+		return (-1);
+	}
+	Py_XSETREF(self->listener, Py_NewRef(value));
+	return (0);
+}
 
-		current = current->next;
-		free(temp->key);
-		free(temp);
+/**
+ * Cache_new - Allocates an empty cache of MAX_ITEMS entries.
+ * @type: LFUCache, LRUCache or a subclass.
+ * @args: Unused.
+ * @kwds: Unused.
+ *
+ * Return: The cache, or NULL on error.
+ */
+static PyObject *Cache_new(PyTypeObject *type, PyObject *args,
+			   PyObject *kwds)
+{
+	Cache *self = (Cache *)type->tp_alloc(type, 0);
+
+	(void)args;
+	(void)kwds;
+	if (self == NULL)
+		return (NULL);
+	self->buckets.prev = self->buckets.next = &self->buckets;
+	self->max_items = MAX_ITEMS;
+	self->listener = Py_NewRef(Py_None);
+	self->lfu = PyType_IsSubtype(type, &LFUCacheType);
+	self->mask = -1;
+	if (cache_drop_all(self, 1) < 0)
+	{
+		Py_DECREF(self);
+		return (NULL);
 	}
-	free(cache);
+	return ((PyObject *)self);
 }
 
 /**
- * print_cache - Prints the current state of the cache.
- * @cache: The LFU cache.
+ * Cache_init - __init__(max_items=None, max_bytes=None, listener=None).
+ * @self: The cache, emptied if it was in use.
+ * @args: Positional arguments.
+ * @kwds: Keyword arguments.
+ *
+ * Return: 0 on success, -1 on error.
  */
-void print_cache(LFUCache *cache)
+static int Cache_init(Cache *self, PyObject *args, PyObject *kwds)
 {
-	CacheItem *current = cache->head;
+	static char *kwlist[] = {"max_items", "max_bytes", "listener", NULL};
+	PyObject *max_items = Py_None, *max_bytes = Py_None;
+	PyObject *listener = Py_None;
+	Py_ssize_t n = MAX_ITEMS;
 
-	printf("Current cache:\n");
-	while (current != NULL)
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OOO", kwlist,
+					 &max_items, &max_bytes, &listener))
+		return (-1);
+	if (max_bytes != Py_None)
+	{
+		PyErr_SetString(PyExc_ValueError,
+				"max_bytes is only supported by the pure-Python caches");
+		return (-1);
+	}
+	if (max_items != Py_None)
 	{
-		printf(
-				"%s: %s (usage count: %d)\n", current->key,
-				(char *)current->item, current->usage_count
-				);
-		current = current->next;
+		n = PyLong_AsSsize_t(max_items);
+		if (n == -1 && PyErr_Occurred())
+			return (-1);
 	}
+	if (Cache_set_listener(self, listener, NULL) < 0)
+		return (-1);
+	self->max_items = n;
+	return (self->size ? cache_drop_all(self, 1) : 0);
 }
 
 /**
- * main - Entry point for the LFU cache example usage.
+ * Cache_traverse - Visits the references held, for the cycle collector.
+ * @self: The cache.
+ * @visit: Visitor.
+ * @arg: Visitor argument.
  *
- * Return: 0 on success, 1 on failure.
+ * Return: 0, or what the visitor returned.
  */
-int main(void)
+static int Cache_traverse(Cache *self, visitproc visit, void *arg)
 {
-	LFUCache *cache = init_cache();
+	Py_ssize_t i;
 
-	if (cache == NULL)
+	Py_VISIT(self->listener);
+	for (i = 0; self->slots != NULL && i <= self->mask; i++)
 	{
-		fprintf(stderr, "Failed to initialize cache.\n");
-		return (1);
+		if (IS_ENTRY(self->slots[i]))
+		{
+			Py_VISIT(self->slots[i]->key);
+			Py_VISIT(self->slots[i]->item);
+		}
 	}
+	return (0);
+}
 
-	/* Test 1: Add items to the cache and print the cache */
-	put_cache(cache, "A", "Hello");
-	put_cache(cache, "B", "World");
-	put_cache(cache, "C", "Holberton");
-	put_cache(cache, "D", "School");
-	printf("Test 1: After adding items A, B, C, D:\n");
-	print_cache(cache);
-
-	/* Test 2: Access an item and print the cache */
-	printf("Test 2: Access item B: %s\n", (char *)get_cache(cache, "B"));
-	print_cache(cache);
-
-	/* Test 3: Add more items to the cache to trigger LFU eviction */
-	put_cache(cache, "E", "Battery");
-	printf("Test 3: After adding item E:\n");
-	print_cache(cache);
-
-	/* Test 4: Update an item and print the cache */
-	put_cache(cache, "C", "Street");
-	printf("Test 4: After updating item C:\n");
-	print_cache(cache);
-
-	/* Test 5: Access items and print the cache */
-	printf("Test 5: Access items A, B, C:\n");
-	printf("Item A: %s\n", (char *)get_cache(cache, "A"));
-	printf("Item B: %s\n", (char *)get_cache(cache, "B"));
-	printf("Item C: %s\n", (char *)get_cache(cache, "C"));
-	print_cache(cache);
-
-	/* Test 6: Add more items to the cache to trigger LFU eviction */
-	put_cache(cache, "F", "Mission");
-	put_cache(cache, "G", "San Francisco");
-	put_cache(cache, "H", "H");
-	put_cache(cache, "I", "I");
-	printf("Test 6: After adding items F, G, H, I:\n");
-	print_cache(cache);
-
-	/* Test 7: Access items and print the cache */
-	printf("Test 7: Access items I, H:\n");
-	printf("Item I: %s\n", (char *)get_cache(cache, "I"));
-	printf("Item H: %s\n", (char *)get_cache(cache, "H"));
-	print_cache(cache);
-
-	/* Test 8: Add more items to the cache to trigger LFU eviction */
-	put_cache(cache, "J", "J");
-	put_cache(cache, "K", "K");
-	printf("Test 8: After adding items J, K:\n");
-	print_cache(cache);
-
-	/* Free the cache */
-	free_cache(cache);
+/**
+ * Cache_tp_clear - Drops the references held, to break cycles.
+ * @self: The cache.
+ *
+ * Return: 0.
+ */
+static int Cache_tp_clear(Cache *self)
+{
+	Py_CLEAR(self->listener);
+	self->listener = Py_NewRef(Py_None);
+	if (cache_drop_all(self, 1) < 0)
+		PyErr_Clear();
 	return (0);
 }
+
+/**
+ * Cache_dealloc - Frees the cache and releases its references.
+ * @self: The cache.
+ */
+static void Cache_dealloc(Cache *self)
+{
+	PyObject_GC_UnTrack(self);
+	cache_drop_all(self, 0);
+	PyMem_Free(self->spare);
+	self->spare = NULL;
+	Py_CLEAR(self->listener);
+	Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyMemberDef Cache_members[] = {
+	{"max_items", T_PYSSIZET, offsetof(Cache, max_items), READONLY,
+	 "Entries kept at most."},
+	{NULL, 0, 0, 0, NULL}
+};
+
+static PyGetSetDef Cache_getset[] = {
+	{"listener", (getter)Cache_get_listener, (setter)Cache_set_listener,
+	 "Called with (key, item, \"evicted\") on eviction, or None.", NULL},
+	{NULL, NULL, NULL, NULL, NULL}
+};
+
+static PySequenceMethods Cache_as_sequence = {
+	.sq_length = (lenfunc)Cache_len,
+	.sq_contains = (objobjproc)Cache_contains,
+};
+
+#define CACHE_METHODS(prefix) \
+	{"put", (PyCFunction)(void (*)(void))prefix##_put, \
+	 METH_FASTCALL | METH_KEYWORDS, \
+	 "put(key, item, ttl=None)\n--\n\nAdd an item, evicting if full."}, \
+	{"get", (PyCFunction)prefix##_get, METH_O, \
+	 "get(key)\n--\n\nGet an item by key, or None."}, \
+	{"items", (PyCFunction)Cache_items, METH_NOARGS, \
+	 "items()\n--\n\n(key, item) pairs, next victim first."}, \
+	{"keys", (PyCFunction)Cache_keys, METH_NOARGS, \
+	 "keys()\n--\n\nKeys, next victim first."}, \
+	{"clear", (PyCFunction)Cache_clear, METH_NOARGS, \
+	 "clear()\n--\n\nDrop every entry, without calling the listener."}
+
+static PyMethodDef LFU_methods[] = {
+	CACHE_METHODS(LFU),
+	{"frequency", (PyCFunction)LFU_frequency, METH_O,
+	 "frequency(key)\n--\n\nUses counted for a key, 0 if not cached."},
+	{NULL, NULL, 0, NULL}
+};
+
+static PyMethodDef LRU_methods[] = {
+	CACHE_METHODS(LRU),
+	{NULL, NULL, 0, NULL}
+};
+
+#define CACHE_TYPE(name, methods, doc) { \
+	PyVarObject_HEAD_INIT(NULL, 0) \
+	.tp_name = "_lfu_cache." name, \
+	.tp_doc = doc, \
+	.tp_basicsize = sizeof(Cache), \
+	.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | \
+		    Py_TPFLAGS_HAVE_GC, \
+	.tp_new = Cache_new, \
+	.tp_init = (initproc)Cache_init, \
+	.tp_dealloc = (destructor)Cache_dealloc, \
+	.tp_traverse = (traverseproc)Cache_traverse, \
+	.tp_clear = (inquiry)Cache_tp_clear, \
+	.tp_methods = methods, \
+	.tp_members = Cache_members, \
+	.tp_getset = Cache_getset, \
+	.tp_as_sequence = &Cache_as_sequence, \
+}
+
+static PyTypeObject LFUCacheType = CACHE_TYPE("LFUCache", LFU_methods,
+	"LFUCache(max_items=None, max_bytes=None, listener=None)\n--\n\n"
+	"Cache evicting the least frequently used entry, the oldest on ties.");
+
+static PyTypeObject LRUCacheType = CACHE_TYPE("LRUCache", LRU_methods,
+	"LRUCache(max_items=None, max_bytes=None, listener=None)\n--\n\n"
+	"Cache evicting the least recently used entry.");
+
+static struct PyModuleDef lfu_cache_module = {
+	PyModuleDef_HEAD_INIT,
+	.m_name = "_lfu_cache",
+	.m_doc = "LFU and LRU caches with O(1) get, put and eviction.",
+	.m_size = -1,
+};
+
+/**
+ * PyInit__lfu_cache - Creates the _lfu_cache module.
+ *
+ * Return: The module, or NULL on error.
+ */
+PyMODINIT_FUNC PyInit__lfu_cache(void)
+{
+	PyObject *module;
+
+	if (PyType_Ready(&LFUCacheType) < 0 || PyType_Ready(&LRUCacheType) < 0)
+		return (NULL);
+	str_evicted = PyUnicode_InternFromString("evicted");
+	if (str_evicted == NULL)
+		return (NULL);
+	module = PyModule_Create(&lfu_cache_module);
+	if (module == NULL)
+		return (NULL);
+	if (PyModule_AddIntConstant(module, "MAX_ITEMS", MAX_ITEMS) < 0 ||
+	    PyModule_AddObjectRef(module, "LFUCache",
+				  (PyObject *)&LFUCacheType) < 0 ||
+	    PyModule_AddObjectRef(module, "LRUCache",
+				  (PyObject *)&LRUCacheType) < 0)
+	{
+		Py_DECREF(module);
+		return (NULL);
+	}
+	return (module);
+}
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Memoization decorator backed by the BaseCaching policies
+
+    @cached(policy="lfu", max_items=1000, ttl=30)
+    def lookup(item_id):
+        ...
+
+Unlike functools.lru_cache, the cache can use any registered policy,
+expire results, bound its size in bytes and keep statistics. Calls
+that miss on the same arguments at the same time run the function
+once: the first caller computes, the others wait for its result
+(single flight), for plain and async functions alike.
+"""
+
+import functools
+import inspect
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from concurrent_cache import ShardedCache, ThreadSafeCache
+from policies import load_policy
+from single_flight import SingleFlight
+
+KeyFunction = Callable[..., Hashable]
+
+# Results kept by default, as for functools.lru_cache; BaseCaching's
+# own MAX_ITEMS of 4 is far too small to memoize with
+MAX_ITEMS = 128
+
+
+def make_key(args: Tuple, kwargs: Dict[str, Any],
+             typed: bool = False) -> Hashable:
+    """
+    Cache key of one call.
+
+    Keyword arguments are sorted, so f(a=1, b=2) and f(b=2, a=1) share
+    an entry. With `typed`, f(1) and f(1.0) are cached separately.
+    """
+    items = tuple(sorted(kwargs.items()))
+    key: Tuple = (args, items)
+    if typed:
+        key += (tuple(type(value) for value in args),
+                tuple(type(value) for _, value in items))
+    return key
+
+
+def cached(policy: str = "lru", max_items: int = MAX_ITEMS,
+           ttl: Optional[float] = None, typed: bool = False,
+           key: Optional[KeyFunction] = None, shards: Optional[int] = None,
+           stats: bool = False, **cache_kwargs: Any) -> Callable:
+    """
+    Decorate a function, or a coroutine function, to memoize its results.
+
+    Parameters:
+    policy (str): Name of the eviction policy in POLICIES
+    max_items (int): Results kept at most, 128 by default
+    ttl (float): Seconds a result stays valid, forever by default
+    typed (bool): Cache arguments of different types separately
+    key (callable): Computes the cache key from the call's arguments
+        instead of make_key; it must return a hashable value
+    shards (int): Use a ShardedCache with this many shards instead of
+        one cache behind a single lock
+    stats (bool): Collect statistics, returned by cache_info()
+    cache_kwargs: Other BaseCaching arguments, e.g. max_bytes
+
+    The wrapper gains cache_info(), cache_clear() and a `cache`
+    attribute. Arguments must be hashable, as for functools.lru_cache;
+    exceptions are never cached.
+    """
+    policy_class = load_policy(policy)
+    options = dict(cache_kwargs, max_items=max_items, default_ttl=ttl,
+                   stats=stats)
+    options.setdefault("listener", None)
+
+    def new_cache() -> Union[ThreadSafeCache, ShardedCache]:
+        if shards:
+            return ShardedCache(policy_class, shards=shards, **options)
+        return ThreadSafeCache(policy_class(**options))
+
+    def decorator(func: Callable) -> Callable:
+        key_of = key or (lambda *args, **kwargs:
+                         make_key(args, kwargs, typed))
+        if inspect.iscoroutinefunction(func):
+            wrapper = _async_wrapper(func, key_of)
+        else:
+            wrapper = _sync_wrapper(func, key_of)
+        wrapper.cache = new_cache()
+
+        def cache_info() -> Optional[Dict[str, Any]]:
+            """Statistics of the cache, None unless stats=True"""
+            return wrapper.cache.stats()
+
+        def cache_clear() -> None:
+            """Drop every cached result"""
+            wrapper.cache = new_cache()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+def _sync_wrapper(func: Callable, key_of: KeyFunction) -> Callable:
+    """Memoizing wrapper of a plain function, single flight per key"""
+    inflight: Dict[Hashable, Future] = {}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call_key = key_of(*args, **kwargs)
+        cache = wrapper.cache
+        # Results are stored boxed in a 1-tuple, so that None, 0 or ""
+        # are cached too: the policies ignore falsy or None items
+        hit = cache.get(call_key)
+        if hit is not None:
+            return hit[0]
+        with lock:
+            future = inflight.get(call_key)
+            leader = future is None
+            if leader:
+                # The previous leader may have finished meanwhile
+                hit = cache.get(call_key)
+                if hit is not None:
+                    return hit[0]
+                future = inflight[call_key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            value = func(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            cache.put(call_key, (value,))
+            future.set_result(value)
+            return value
+        finally:
+            with lock:
+                del inflight[call_key]
+    return wrapper
+
+
+def _async_wrapper(func: Callable, key_of: KeyFunction) -> Callable:
+    """Memoizing wrapper of a coroutine function, single flight per key"""
+    flights = SingleFlight()
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        call_key = key_of(*args, **kwargs)
+        cache = wrapper.cache
+        hit = cache.get(call_key)
+        if hit is not None:
+            return hit[0]
+
+        async def load() -> Any:
+            value = await func(*args, **kwargs)
+            cache.put(call_key, (value,))
+            return value
+        return await flights.run(call_key, load)
+    return wrapper
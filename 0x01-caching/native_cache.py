@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+LFU and LRU caches backed by the _lfu_cache C extension
+
+    from native_cache import LFUCache, LRUCache, NATIVE
+
+The classes evict exactly as 100-lfu_cache.LFUCache and
+3-lru_cache.LRUCache do and keep their get/put/get_many/put_many
+interface. When the extension is not built (see setup.py), they are
+those pure-Python classes, and NATIVE is False.
+
+The extension keeps only the entry limit: max_bytes, time to live and
+statistics need the pure-Python classes and raise ValueError here.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+from base_caching import Items, item_pairs, print_discard
+
+try:
+    import _lfu_cache
+except ImportError:
+    _lfu_cache = None
+
+NATIVE = _lfu_cache is not None
+
+
+class _NativeMixin:
+    """
+    _NativeMixin defines:
+        - the BaseCaching interface on top of an extension type
+    """
+    statistics = None
+
+    def __init__(self, max_items: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 listener: Any = print_discard,
+                 default_ttl: Optional[float] = None,
+                 stats: bool = False) -> None:
+        """Initialize the cache; only max_items and listener are kept."""
+        if default_ttl is not None or stats:
+            raise ValueError("ttl and stats are only supported by the "
+                             "pure-Python caches")
+        super().__init__(max_items=max_items, max_bytes=max_bytes,
+                         listener=listener)
+
+    @property
+    def cache_data(self) -> Dict[Any, Any]:
+        """Copy of the cached items, next victim first."""
+        return dict(self.items())
+
+    def print_cache(self) -> None:
+        """Print the cache."""
+        print("Current cache:")
+        for key, item in sorted(self.items()):
+            print("{}: {}".format(key, item))
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the cached items among `keys`, as get would one by one."""
+        get = self.get
+        found = {}
+        for key in keys:
+            item = get(key)
+            if item is not None:
+                found[key] = item
+        return found
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair; returns the entries evicted meanwhile."""
+        evicted: Dict[Any, Any] = {}
+        listener = self.listener
+
+        def collect(key: Any, item: Any, reason: str) -> None:
+            evicted[key] = item
+            if listener is not None and listener is not print_discard:
+                listener(key, item, reason)
+
+        put = self.put
+        self.listener = collect
+        try:
+            for key, item in item_pairs(items):
+                put(key, item, ttl)
+        finally:
+            self.listener = listener
+        return evicted
+
+    def expire(self) -> int:
+        """Entries never expire here; nothing to remove."""
+        return 0
+
+    def stats(self) -> None:
+        """Statistics need the pure-Python caches."""
+        return None
+
+
+if NATIVE:
+    class LFUCache(_NativeMixin, _lfu_cache.LFUCache):
+        """
+        LFUCache defines:
+            - caching system using LFU algorithm, in C
+        """
+
+    class LRUCache(_NativeMixin, _lfu_cache.LRUCache):
+        """
+        LRUCache defines:
+            - caching system using LRU algorithm, in C
+        """
+else:
+    LFUCache = __import__('100-lfu_cache').LFUCache
+    LRUCache = __import__('3-lru_cache').LRUCache
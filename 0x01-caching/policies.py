@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Registry of the eviction policies by short name
+
+The policy modules are numbered task files, so they are imported by
+name with __import__ rather than with an import statement.
+"""
+
+from typing import Dict
+
+POLICIES: Dict[str, str] = {
+    "fifo": "1-fifo_cache.FIFOCache",
+    "lifo": "2-lifo_cache.LIFOCache",
+    "lru": "3-lru_cache.LRUCache",
+    "mru": "4-mru_cache.MRUCache",
+    "lfu": "100-lfu_cache.LFUCache",
+    "tinylfu": "101-tinylfu_cache.TinyLFUCache",
+    "arc": "102-arc_cache.ARCCache",
+}
+
+
+def load_policy(name: str) -> type:
+    """Import the cache class registered for `name`"""
+    try:
+        module, cls = POLICIES[name].rsplit(".", 1)
+    except KeyError:
+        raise ValueError("unknown cache policy {!r}, expected one of {}"
+                         .format(name, ", ".join(POLICIES))) from None
+    return getattr(__import__(module), cls)
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Build the optional _lfu_cache extension next to the modules
+
+    python3 setup.py build_ext --inplace
+
+native_cache falls back to the pure-Python caches when it is not built.
+"""
+
+from setuptools import Extension, setup
+
+setup(
+    name="caching",
+    ext_modules=[Extension("_lfu_cache", ["lfu_cache.c"])],
+)
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Cache shared by every process of a host, in shared memory
+
+    cache = SharedMemoryCache("app-cache", max_items=100000)
+
+Processes opening the same name share one cache, so pre-fork workers
+(gunicorn, uwsgi) no longer keep a copy each. The cache is a file
+mapped into every process, in /dev/shm where there is one, so it
+lives in memory like a POSIX shared memory segment. It holds a
+fixed number of slots, each with room for `slot_bytes` of serialized
+key and value, and an open addressing table from key hash to slot.
+Eviction is CLOCK, an approximation of LRU: a get sets the slot's
+reference bit, and the hand sweeping for a victim clears set bits and
+takes the first slot found clear.
+
+Readers take a shared lock and writers an exclusive one, on that
+file; POSIX record locks are per process, so a thread lock serializes
+the threads of one process on top of it.
+
+Keys are encoded with cache_codec, so they match in every process.
+bytes-like items are stored as they are and come back from get as
+bytes; view() reads them without a copy instead:
+
+    with cache.view("page:/") as page:
+        if page is not None:
+            sock.sendall(page)
+
+Other items are pickled.
+"""
+
+import fcntl
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from base_caching import EVICTED, EXPIRED, BaseCaching, print_discard
+from cache_codec import decode_key, encode_key
+
+SLOT_BYTES = 256
+MAGIC = b"SHC1"
+# multiprocessing.shared_memory is not used: on Python < 3.13 its
+# resource tracker destroys the segment when the process that opened
+# it exits, which defeats a cache outliving its workers
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# Header: magic, capacity, table size, slot bytes, then the mutable
+# clock hand, entry count, tombstones, free list head, slots ever used
+_HEADER = struct.Struct("<4sIII")
+_FIELD = struct.Struct("<i")
+_HAND, _COUNT, _TOMBSTONES, _FREE, _FRESH = 16, 20, 24, 28, 32
+_TABLE_OFFSET = 64
+
+# Slot: used, referenced, item kind, key length, item length (or the
+# next free slot), key hash and deadline (0 for none); then the data
+_SLOT = struct.Struct("<BBBxIIId")
+_RAW, _PICKLED = 1, 2
+
+# Table cells: a slot number, or one of these
+_EMPTY, _DELETED = -1, -2
+
+
+def _encode_item(item: Any) -> Tuple[int, Any]:
+    """(kind, bytes-like) stored for item"""
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return _RAW, memoryview(item).cast("B")
+    return _PICKLED, pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+
+
+class _ProcessLock:
+    """
+    _ProcessLock defines:
+        - a readers/writer lock between processes, on the cache file
+        - a thread lock between the threads of this process
+    """
+    _registry: Dict[str, "_ProcessLock"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.threads = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, create: Optional[bool]) -> "_ProcessLock":
+        """The lock of the file at `path`, one per process.
+
+        Closing any descriptor of a file drops the process's record
+        locks on it, so every cache of one file shares the descriptor.
+        create=True fails if the file exists, create=False if it does
+        not; otherwise it is created if needed.
+        """
+        flags = os.O_RDWR
+        if create is not False:
+            flags |= os.O_CREAT | (os.O_EXCL if create else 0)
+        with cls._registry_lock:
+            lock = cls._registry.get(path)
+            if lock is not None and not create:
+                try:
+                    if os.stat(path).st_ino == os.fstat(lock.fd).st_ino:
+                        return lock
+                except FileNotFoundError:
+                    pass
+            # A file unlinked since: only its mappings keep using it
+            lock = cls._registry[path] = cls(os.open(path, flags, 0o600))
+            return lock
+
+    def acquire(self, exclusive: bool) -> None:
+        """Lock for writing if `exclusive`, else for reading."""
+        self.threads.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX if exclusive
+                        else fcntl.LOCK_SH)
+        except BaseException:
+            self.threads.release()
+            raise
+
+    def release(self) -> None:
+        """Release the lock."""
+        fcntl.lockf(self.fd, fcntl.LOCK_UN)
+        self.threads.release()
+
+
+class _SharedView(Mapping):
+    """ Read-only mapping of a SharedMemoryCache, standing in for
+    cache_data; looking keys up through it is not a use
+    """
+
+    def __init__(self, cache: "SharedMemoryCache") -> None:
+        self._cache = cache
+
+    def __getitem__(self, key: Any) -> Any:
+        item = self._cache._read(key, touch=False)
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._cache._keys())
+
+    def __len__(self) -> int:
+        # Expired entries count until reclaimed, so they are walked
+        return len(self._cache._keys())
+
+
+class SharedMemoryCache(BaseCaching):
+    """
+    SharedMemoryCache defines:
+        - caching system shared between processes, using CLOCK
+    """
+
+    def __init__(self, name: str, max_items: Optional[int] = None,
+                 slot_bytes: Optional[int] = None,
+                 create: Optional[bool] = None,
+                 default_ttl: Optional[float] = None,
+                 listener: Any = print_discard,
+                 stats: bool = False) -> None:
+        """Open the cache `name`, creating it if needed.
+
+        max_items and slot_bytes size a new cache, MAX_ITEMS and
+        SLOT_BYTES by default; opening an existing one with other
+        sizes raises ValueError. create=True fails if the cache
+        exists, create=False if it does not. Listeners are told about
+        the removals made by this process only.
+        """
+        super().__init__(max_items=max_items, default_ttl=default_ttl,
+                         listener=listener, stats=stats)
+        self.name = name
+        self.path = os.path.join(SHARED_DIR, name)
+        self._lock = _ProcessLock.open(self.path, create)
+        self._lock.acquire(exclusive=True)
+        try:
+            self._open(max_items, slot_bytes, create)
+        finally:
+            self._lock.release()
+        self.cache_data = _SharedView(self)
+
+    def _open(self, max_items: Optional[int], slot_bytes: Optional[int],
+              create: Optional[bool]) -> None:
+        """Map the cache file, holding the exclusive lock; an empty
+        file is a new cache, laid out here
+        """
+        capacity = max(self.max_items, 0)
+        size = SLOT_BYTES if slot_bytes is None else slot_bytes
+        table_size = 8
+        while table_size < capacity * 4:
+            table_size <<= 1
+        record = (_SLOT.size + size + 7) & ~7
+        fd = self._lock.fd
+        fresh = os.fstat(fd).st_size == 0
+        if fresh:
+            if create is False:
+                raise FileNotFoundError(self.path)
+            os.ftruncate(fd, _TABLE_OFFSET + ((table_size * 4 + 7) & ~7) +
+                         capacity * record)
+        self._mmap = mmap.mmap(fd, 0)
+        self._buf = buf = memoryview(self._mmap)
+        if fresh:
+            buf[_TABLE_OFFSET:_TABLE_OFFSET + table_size * 4] = (
+                b"\xff" * (table_size * 4))
+            for field in (_HAND, _COUNT, _TOMBSTONES, _FRESH):
+                self._set_field(field, 0)
+            self._set_field(_FREE, -1)
+            # Magic last: a segment without it is not a cache
+            _HEADER.pack_into(buf, 0, MAGIC, capacity, table_size, size)
+        else:
+            magic, capacity, table_size, stored = _HEADER.unpack_from(buf)
+            if magic != MAGIC:
+                self.close()
+                raise ValueError("{!r} is not a cache".format(self.name))
+            if ((max_items is not None and max_items != capacity) or
+                    (slot_bytes is not None and slot_bytes != stored)):
+                self.close()
+                raise ValueError("{!r} holds {} slots of {} bytes".format(
+                    self.name, capacity, stored))
+            size = stored
+            record = (_SLOT.size + size + 7) & ~7
+        self.max_items = capacity
+        self.slot_bytes = size
+        self._record = record
+        self._slots_offset = _TABLE_OFFSET + ((table_size * 4 + 7) & ~7)
+        self._table = buf[_TABLE_OFFSET:
+                          _TABLE_OFFSET + table_size * 4].cast("i")
+
+    def close(self) -> None:
+        """Detach this process from the cache, which stays in place."""
+        for view in (getattr(self, "_table", None), self._buf):
+            if view is not None:
+                view.release()
+        self._table = self._buf = None
+        self._mmap.close()
+
+    def unlink(self) -> None:
+        """Remove the cache file; processes that have it open keep
+        their copy until they close it, new ones start afresh
+        """
+        os.unlink(self.path)
+
+    def put(self, key: Any, item: Any, ttl: Optional[float] = None) -> None:
+        """Add an item in the cache, evicting with the CLOCK hand.
+
+        Raises ValueError, leaving the cache unchanged, if the encoded
+        key and item do not fit in one slot.
+        """
+        if key is None or item is None:
+            return
+        data = encode_key(key)
+        kind, value = _encode_item(item)
+        if self.max_items and len(data) + len(value) > self.slot_bytes:
+            raise ValueError("{!r} takes {} bytes, slots hold {}".format(
+                key, len(data) + len(value), self.slot_bytes))
+        if ttl is None:
+            ttl = self.default_ttl
+        deadline = 0.0 if ttl is None else self.clock() + ttl
+        hashed = zlib.crc32(data)
+        removed: List[Tuple[Any, Any, str]] = []
+        self._lock.acquire(exclusive=True)
+        try:
+            index, slot = self._find(data, hashed)
+            if not self.max_items:
+                # No room at all: the update evicts it
+                if slot >= 0:
+                    self._unlink(index, slot, hashed)
+                removed.append((key, item, EVICTED))
+            else:
+                if slot < 0:
+                    slot = self._allocate(removed)
+                    index, _ = self._find(data, hashed)
+                    if self._table[index] == _DELETED:
+                        self._add_field(_TOMBSTONES, -1)
+                    self._table[index] = slot
+                    self._add_field(_COUNT, 1)
+                self._write(slot, data, hashed, kind, value, deadline)
+        finally:
+            self._lock.release()
+        self._notify(removed)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get an item by key, unless it expired."""
+        return self._read(key, touch=True)
+
+    @contextmanager
+    def view(self, key: Any) -> Iterator[Optional[Any]]:
+        """Get an item by key without copying it out of the cache.
+
+        A bytes-like item is yielded as a read-only memoryview of the
+        shared memory, valid inside the with block only; the block
+        holds the cache's read lock, so it must not write to the cache
+        and should be short. Other items are yielded as get returns
+        them, and None if the key is missing or expired.
+        """
+        data = encode_key(key)
+        hashed = zlib.crc32(data)
+        self._lock.acquire(exclusive=False)
+        try:
+            found = self._locate(data, hashed, touch=True)
+            if found is None:
+                yield None
+            elif found[0] != _RAW:
+                yield pickle.loads(found[1])
+            else:
+                value = found[1].toreadonly()
+                try:
+                    yield value
+                finally:
+                    value.release()
+        finally:
+            self._lock.release()
+
+    def expire(self) -> int:
+        """Remove every entry whose time to live has passed.
+
+        Expired entries are never returned; this reclaims their slots
+        ahead of the CLOCK hand. Returns the number of entries removed.
+        """
+        removed: List[Tuple[Any, Any, str]] = []
+        now = self.clock()
+        self._lock.acquire(exclusive=True)
+        try:
+            for slot in range(self._field(_FRESH)):
+                used, _, _, _, _, hashed, deadline = _SLOT.unpack_from(
+                    self._buf, self._offset(slot))
+                if used and deadline and deadline <= now:
+                    self._evict_slot(slot, hashed, EXPIRED, removed)
+        finally:
+            self._lock.release()
+        self._notify(removed)
+        return len(removed)
+
+    def _read(self, key: Any, touch: bool) -> Optional[Any]:
+        """Copy of the item of key, None if missing or expired."""
+        data = encode_key(key)
+        hashed = zlib.crc32(data)
+        self._lock.acquire(exclusive=False)
+        try:
+            found = self._locate(data, hashed, touch)
+            if found is None:
+                return None
+            kind, value = found
+            return bytes(value) if kind == _RAW else pickle.loads(value)
+        finally:
+            self._lock.release()
+
+    def _locate(self, data: bytes, hashed: int,
+                touch: bool) -> Optional[Tuple[int, memoryview]]:
+        """(kind, stored bytes) of a live key, holding a lock; its
+        reference bit is set if `touch`
+        """
+        _, slot = self._find(data, hashed)
+        if slot < 0:
+            return None
+        offset = self._offset(slot)
+        buf = self._buf
+        (_, referenced, kind, key_length, length, _,
+         deadline) = _SLOT.unpack_from(buf, offset)
+        if deadline and deadline <= self.clock():
+            return None
+        if touch and not referenced:
+            # A lone byte store: harmless under a shared lock
+            buf[offset + 1] = 1
+        start = offset + _SLOT.size + key_length
+        return kind, buf[start:start + length]
+
+    def _keys(self) -> List[Any]:
+        """Snapshot of the live keys."""
+        keys = []
+        now = self.clock()
+        self._lock.acquire(exclusive=False)
+        try:
+            for slot in range(self._field(_FRESH)):
+                offset = self._offset(slot)
+                used, _, _, key_length, _, _, deadline = _SLOT.unpack_from(
+                    self._buf, offset)
+                if used and (not deadline or deadline > now):
+                    start = offset + _SLOT.size
+                    keys.append(decode_key(
+                        bytes(self._buf[start:start + key_length])))
+        finally:
+            self._lock.release()
+        return keys
+
+    def _find(self, data: bytes, hashed: int) -> Tuple[int, int]:
+        """(table index, slot) of the key; slot is -1 if it is absent,
+        and the index then the cell to insert it in
+        """
+        table, buf = self._table, self._buf
+        mask = len(table) - 1
+        index = hashed & mask
+        free = -1
+        while True:
+            slot = table[index]
+            if slot == _EMPTY:
+                return (index if free < 0 else free), -1
+            if slot == _DELETED:
+                if free < 0:
+                    free = index
+            else:
+                offset = self._offset(slot)
+                _, _, _, key_length, _, slot_hash, _ = _SLOT.unpack_from(
+                    buf, offset)
+                start = offset + _SLOT.size
+                if (slot_hash == hashed and key_length == len(data) and
+                        buf[start:start + key_length] == data):
+                    return index, slot
+            index = (index + 1) & mask
+
+    def _allocate(self, removed: List[Tuple[Any, Any, str]]) -> int:
+        """A free slot, evicting the CLOCK victim if there is none."""
+        slot = self._field(_FREE)
+        if slot >= 0:
+            next_free = _SLOT.unpack_from(self._buf, self._offset(slot))[4]
+            self._set_field(_FREE, next_free - 1)
+            return slot
+        slot = self._field(_FRESH)
+        if slot < self.max_items:
+            self._set_field(_FRESH, slot + 1)
+            return slot
+        buf = self._buf
+        hand = self._field(_HAND)
+        now = self.clock()
+        while True:
+            offset = self._offset(hand)
+            _, referenced, _, _, _, hashed, deadline = _SLOT.unpack_from(
+                buf, offset)
+            victim = hand
+            hand = (hand + 1) % self.max_items
+            if deadline and deadline <= now:
+                reason = EXPIRED
+            elif referenced:
+                buf[offset + 1] = 0
+                continue
+            else:
+                reason = EVICTED
+            self._set_field(_HAND, hand)
+            self._evict_slot(victim, hashed, reason, removed)
+            return self._allocate(removed)
+
+    def _evict_slot(self, slot: int, hashed: int, reason: str,
+                    removed: List[Tuple[Any, Any, str]]) -> None:
+        """Remove the entry of slot, recording it for the listeners."""
+        if self.listeners:
+            offset = self._offset(slot)
+            _, _, kind, key_length, length, _, _ = _SLOT.unpack_from(
+                self._buf, offset)
+            start = offset + _SLOT.size
+            key = decode_key(bytes(self._buf[start:start + key_length]))
+            # A copy: the slot is about to be reused
+            value = bytes(self._buf[start + key_length:
+                                    start + key_length + length])
+            removed.append((key, value if kind == _RAW
+                            else pickle.loads(value), reason))
+        table = self._table
+        index = hashed & (len(table) - 1)
+        while table[index] != slot:
+            index = (index + 1) & (len(table) - 1)
+        self._unlink(index, slot, hashed)
+
+    def _unlink(self, index: int, slot: int, hashed: int) -> None:
+        """Free slot, found at index of the table."""
+        self._table[index] = _DELETED
+        # Free slots chain through the length field, which holds the
+        # next free slot plus one, so 0 ends the list
+        _SLOT.pack_into(self._buf, self._offset(slot), 0, 0, 0, 0,
+                        self._field(_FREE) + 1, hashed, 0.0)
+        self._set_field(_FREE, slot)
+        self._add_field(_COUNT, -1)
+        if self._add_field(_TOMBSTONES, 1) > self.max_items:
+            self._rehash()
+
+    def _rehash(self) -> None:
+        """Rebuild the table without its tombstones."""
+        table, buf = self._table, self._buf
+        mask = len(table) - 1
+        for index in range(len(table)):
+            table[index] = _EMPTY
+        for slot in range(self._field(_FRESH)):
+            used, _, _, _, _, hashed, _ = _SLOT.unpack_from(
+                buf, self._offset(slot))
+            if used:
+                index = hashed & mask
+                while table[index] != _EMPTY:
+                    index = (index + 1) & mask
+                table[index] = slot
+        self._set_field(_TOMBSTONES, 0)
+
+    def _write(self, slot: int, data: bytes, hashed: int, kind: int,
+               value: Any, deadline: float) -> None:
+        """Store key and item in slot."""
+        offset = self._offset(slot)
+        _SLOT.pack_into(self._buf, offset, 1, 1, kind, len(data),
+                        len(value), hashed, deadline)
+        start = offset + _SLOT.size
+        self._buf[start:start + len(data)] = data
+        start += len(data)
+        self._buf[start:start + len(value)] = value
+
+    def _notify(self, removed: List[Tuple[Any, Any, str]]) -> None:
+        """Tell the listeners, once the lock is released."""
+        for key, item, reason in removed:
+            for listener in self.listeners:
+                listener(key, item, reason)
+
+    def _offset(self, slot: int) -> int:
+        """Offset of slot in the segment."""
+        return self._slots_offset + slot * self._record
+
+    def _field(self, offset: int) -> int:
+        """Header field at offset."""
+        return _FIELD.unpack_from(self._buf, offset)[0]
+
+    def _set_field(self, offset: int, value: int) -> None:
+        """Set the header field at offset."""
+        _FIELD.pack_into(self._buf, offset, value)
+
+    def _add_field(self, offset: int, delta: int) -> int:
+        """Add delta to the header field at offset, returning it."""
+        value = self._field(offset) + delta
+        self._set_field(offset, value)
+        return value
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Single flight for coroutines: one load per key, however many wait
+
+    flights = SingleFlight()
+    value = await flights.run(key, lambda: fetch(key))
+
+Each load runs in a task of its own, which every caller asking for the
+same key meanwhile awaits. Cancelling a caller therefore never cancels
+the load the others wait for. Tasks belong to one event loop, so loads
+are shared per loop.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    SingleFlight defines:
+        - the task loading each key, shared by every caller until it
+          finishes
+    """
+
+    def __init__(self) -> None:
+        """Start with no load under way."""
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable],
+                          "asyncio.Task"] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def start(self, key: Hashable,
+              load: Callable[[], Awaitable[Any]]) -> "asyncio.Task":
+        """The task loading key, started with load() unless one is
+        under way; nobody needs to await it
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get((loop, key))
+        if task is None:
+            task = loop.create_task(load())
+            self._tasks[loop, key] = task
+            task.add_done_callback(
+                lambda done: self._finished(loop, key, done))
+        return task
+
+    async def run(self, key: Hashable,
+                  load: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the load of key, started with load() if needed.
+
+        Its exception, if any, reaches every caller.
+        """
+        # Shielded: a cancelled caller must not cancel the shared task
+        return await asyncio.shield(self.start(key, load))
+
+    def _finished(self, loop: asyncio.AbstractEventLoop, key: Hashable,
+                  task: "asyncio.Task") -> None:
+        """Forget a finished load."""
+        del self._tasks[loop, key]
+        if not task.cancelled():
+            # Mark it retrieved: there may be no caller left to read it
+            task.exception()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Two-tier cache: any policy in memory, spilling to SQLite on disk
+
+    cache = TieredCache(LRUCache(max_items=1000), "cache.db")
+
+Entries the memory tier (L1) evicts are demoted to the disk tier (L2)
+instead of being lost; a get that misses L1 and hits L2 promotes the
+entry back. The disk tier survives restarts: a new TieredCache on the
+same file starts with the most recently used entries loaded back into
+memory, and close() writes the memory tier down first.
+
+Not thread-safe on its own; wrap it in a ThreadSafeCache.
+"""
+
+import itertools
+import pickle
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from base_caching import (EVICTED, BaseCaching, Items, item_pairs,
+                          print_discard)
+from cache_codec import decode_key, encode_key
+
+# (key, item, wall-clock deadline or None)
+Entry = Tuple[Any, Any, Optional[float]]
+
+
+class SQLiteStore:
+    """
+    SQLiteStore defines:
+        - a persistent key/item store in one SQLite file
+        - least recently used entries dropped beyond max_items
+    """
+
+    def __init__(self, path: str, max_items: Optional[int] = None) -> None:
+        """Open or create the store; max_items bounds it, or None."""
+        self.max_items = max_items
+        self.db = sqlite3.connect(path, isolation_level=None,
+                                  check_same_thread=False)
+        # WAL without a sync per write: a crash may lose the last
+        # demotions, which a cache can afford
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS entries ("
+                        "key BLOB PRIMARY KEY, item BLOB NOT NULL, "
+                        "deadline REAL, used INTEGER NOT NULL"
+                        ") WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_used "
+                        "ON entries (used)")
+        # Keys on disk, so that misses and puts skip the database
+        self._keys = {row[0] for row in
+                      self.db.execute("SELECT key FROM entries")}
+        last = self.db.execute("SELECT MAX(used) FROM entries").fetchone()[0]
+        self._used = itertools.count((last or 0) + 1)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return encode_key(key) in self._keys
+
+    def put(self, key: Any, item: Any,
+            deadline: Optional[float] = None) -> None:
+        """Store item under key, as the most recently used entry."""
+        data = encode_key(key)
+        self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                        (data, pickle.dumps(item, pickle.HIGHEST_PROTOCOL),
+                         deadline, next(self._used)))
+        self._keys.add(data)
+        if self.max_items is not None and len(self._keys) > self.max_items:
+            self._drop(self.db.execute(
+                "SELECT key FROM entries ORDER BY used LIMIT ?",
+                (len(self._keys) - self.max_items,)).fetchall())
+
+    def take(self, key: Any) -> Optional[Tuple[Any, Optional[float]]]:
+        """Remove key and return (item, deadline), None if absent or
+        expired
+        """
+        data = encode_key(key)
+        if data not in self._keys:
+            return None
+        row = self.db.execute("SELECT item, deadline FROM entries "
+                              "WHERE key = ?", (data,)).fetchone()
+        self._drop([(data,)])
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def delete(self, key: Any) -> None:
+        """Remove key, if stored."""
+        data = encode_key(key)
+        if data in self._keys:
+            self._drop([(data,)])
+
+    def expire(self) -> int:
+        """Remove every entry past its deadline; returns how many."""
+        rows = self.db.execute("SELECT key FROM entries WHERE deadline <= ?",
+                               (time.time(),)).fetchall()
+        self._drop(rows)
+        return len(rows)
+
+    def recent(self, count: int) -> List[Entry]:
+        """The `count` most recently used live entries, newest first."""
+        rows = self.db.execute(
+            "SELECT key, item, deadline FROM entries "
+            "WHERE deadline IS NULL OR deadline > ? "
+            "ORDER BY used DESC LIMIT ?", (time.time(), count))
+        return [(decode_key(key), pickle.loads(item), deadline)
+                for key, item, deadline in rows]
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+    def _drop(self, rows: List[Tuple[bytes]]) -> None:
+        """Delete the encoded keys of rows."""
+        if rows:
+            self.db.executemany("DELETE FROM entries WHERE key = ?", rows)
+            self._keys.difference_update(row[0] for row in rows)
+
+
+class TieredCache:
+    """
+    TieredCache defines:
+        - a BaseCaching policy as the memory tier (L1)
+        - a SQLiteStore receiving its evictions as the disk tier (L2)
+    """
+
+    def __init__(self, cache: BaseCaching, path: str,
+                 max_disk_items: Optional[int] = None,
+                 warm: bool = True) -> None:
+        """Put a disk tier behind `cache`, stored at `path`.
+
+        max_disk_items bounds the disk tier, unbounded by default.
+        With `warm`, entries already on disk fill the memory tier, most
+        recently used first.
+
+        The memory tier's default DISCARD printer is removed while the
+        disk tier is attached: its evictions are demoted, not lost.
+        """
+        self.cache = cache
+        self.disk = SQLiteStore(path, max_disk_items)
+        self.promotions = 0
+        self.demotions = 0
+        # Wall-clock deadlines of the memory tier's entries that have
+        # one: the policies keep monotonic ones, meaningless on disk
+        self._deadlines: Dict[Any, float] = {}
+        self._quieted = print_discard in cache.listeners
+        if self._quieted:
+            cache.listeners.remove(print_discard)
+        cache.listeners.append(self._demote)
+        if warm:
+            self.warm()
+
+    @property
+    def cache_data(self) -> Dict[Any, Any]:
+        """Items of the memory tier."""
+        return self.cache.cache_data
+
+    def put(self, key: Any, item: Any, ttl: Optional[float] = None) -> None:
+        """Add an item in the memory tier, replacing any copy on disk."""
+        if ttl is None:
+            ttl = self.cache.default_ttl
+        # Set before the put, which may evict key itself to disk
+        previous = self._deadlines.pop(key, None)
+        if ttl is not None:
+            self._deadlines[key] = time.time() + ttl
+        self.cache.put(key, item, ttl)
+        data = self.cache.cache_data
+        if key not in data:
+            # Ignored, e.g. a falsy item, or demoted right away: either
+            # way the disk holds the right copy, if any
+            self._deadlines.pop(key, None)
+        elif data[key] != item:
+            # Ignored, with the old entry still in memory; compared by
+            # equality, as some memory tiers return copies
+            self._deadlines.pop(key, None)
+            if previous is not None:
+                self._deadlines[key] = previous
+        else:
+            self.disk.delete(key)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get an item by key, promoting it from disk on a memory miss."""
+        item = self.cache.get(key)
+        if item is not None:
+            return item
+        found = self.disk.take(key)
+        if found is None:
+            return None
+        item, deadline = found
+        self.promotions += 1
+        self.put(key, item, None if deadline is None
+                 else deadline - time.time())
+        return item
+
+    def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        """Get the items of the keys found in either tier."""
+        found = {}
+        for key in keys:
+            item = self.get(key)
+            if item is not None:
+                found[key] = item
+        return found
+
+    def put_many(self, items: Items,
+                 ttl: Optional[float] = None) -> Dict[Any, Any]:
+        """Add every pair; returns {}, as evicted entries go to disk."""
+        for key, item in item_pairs(items):
+            self.put(key, item, ttl)
+        return {}
+
+    def expire(self) -> int:
+        """Remove the expired entries of both tiers."""
+        return self.cache.expire() + self.disk.expire()
+
+    def warm(self) -> None:
+        """Load the most recently used entries on disk that fit in the
+        memory tier, keeping their order of use
+
+        Their rows stay on disk, so a crash soon after a restart loses
+        nothing; put, eviction and flush overwrite them later.
+        """
+        for key, item, deadline in reversed(
+                self.disk.recent(self.cache.max_items)):
+            if deadline is None:
+                self._deadlines.pop(key, None)
+            else:
+                self._deadlines[key] = deadline
+            self.cache.put(key, item, None if deadline is None
+                           else deadline - time.time())
+
+    def flush(self) -> None:
+        """Copy the memory tier to disk, so a restart finds it there."""
+        for key, item in list(self.cache.cache_data.items()):
+            self.disk.put(key, item, self._deadlines.get(key))
+
+    def close(self) -> None:
+        """Flush the memory tier and close the disk tier."""
+        self.flush()
+        self.cache.listeners.remove(self._demote)
+        if self._quieted:
+            self.cache.listeners.append(print_discard)
+        self.disk.close()
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the memory tier with the traffic between
+        tiers, None unless the memory tier collects statistics
+        """
+        stats = self.cache.stats()
+        if stats is not None:
+            stats.update(promotions=self.promotions,
+                         demotions=self.demotions,
+                         disk_items=len(self.disk))
+        return stats
+
+    def print_cache(self) -> None:
+        """Print the memory tier and the size of the disk tier."""
+        self.cache.print_cache()
+        print("On disk: {}".format(len(self.disk)))
+
+    def __enter__(self) -> "TieredCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _demote(self, key: Any, item: Any, reason: str) -> None:
+        """Listener of the memory tier: evicted entries go to disk."""
+        deadline = self._deadlines.pop(key, None)
+        if reason == EVICTED and (deadline is None or
+                                  deadline > time.time()):
+            self.demotions += 1
+            self.disk.put(key, item, deadline)
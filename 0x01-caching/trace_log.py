@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Record the gets and puts a cache serves into a compact binary log
+
+    recorder = TraceRecorder(cache, "app.trace")
+    ...
+    recorder.close()
+
+then replay the log against every policy with
+./trace_replay.py --trace app.trace.
+
+Keys are not stored: each distinct key is numbered from 1 in order of
+first use, which is all a replay needs to reproduce hits and misses,
+and keeps both the log small and the keys private. Every operation is
+one varint of (key number << 1 | PUT), so most take one to three
+bytes.
+"""
+
+import threading
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+MAGIC = b"CTRACE1\n"
+GET, PUT = 0, 1
+# Bytes buffered before a write to the file
+BUFFER_BYTES = 1 << 16
+RECORDED = ("get", "put", "get_many", "put_many")
+
+
+def is_log(path: str) -> bool:
+    """True if path holds a log written by TraceRecorder"""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_log(path: str) -> Tuple[List[int], List[bool]]:
+    """
+    Operations of a log, as parallel lists.
+
+    Returns:
+    Tuple[List[int], List[bool]]: Key numbers, and whether each
+        operation was a put rather than a get
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError("{} is not a trace log".format(path))
+    keys: List[int] = []
+    puts: List[bool] = []
+    value = shift = 0
+    for byte in data[len(MAGIC):]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        keys.append(value >> 1)
+        puts.append(bool(value & 1))
+        value = shift = 0
+    return keys, puts
+
+
+class TraceRecorder:
+    """
+    TraceRecorder defines:
+        - a log of every get and put one cache serves, until close
+    """
+
+    def __init__(self, cache: Any, path: str) -> None:
+        """Start logging the operations of `cache` to `path`.
+
+        As with enable_stats, the recording methods are set on this
+        instance only; batch calls log one operation per key.
+        """
+        self.cache = cache
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(MAGIC)
+        self.operations = 0
+        self._ids: Dict[Any, int] = {}
+        self._buffer = bytearray()
+        # Wrapped thread-safe caches are called from many threads
+        self._lock = threading.Lock()
+        # Instance attributes replaced, e.g. by enable_stats, to restore
+        self._saved = {name: cache.__dict__.get(name) for name in RECORDED}
+        cache.get = self._recording(cache.get, GET)
+        cache.put = self._recording(cache.put, PUT)
+        cache.get_many = self._recording_many(cache.get_many, GET)
+        cache.put_many = self._recording_many(cache.put_many, PUT)
+
+    def _log(self, key: Any, op: int) -> None:
+        """Append one operation to the buffer."""
+        with self._lock:
+            number = self._ids.get(key)
+            if number is None:
+                number = self._ids[key] = len(self._ids) + 1
+            value = number << 1 | op
+            buffer = self._buffer
+            while value > 0x7F:
+                buffer.append(value & 0x7F | 0x80)
+                value >>= 7
+            buffer.append(value)
+            self.operations += 1
+            if len(buffer) >= BUFFER_BYTES:
+                self._write()
+
+    def _recording(self, method: Callable, op: int) -> Callable:
+        """Wrap get or put to log its key."""
+        log = self._log
+
+        def recorded(key: Any, *args: Any, **kwargs: Any) -> Any:
+            log(key, op)
+            return method(key, *args, **kwargs)
+        return recorded
+
+    def _recording_many(self, method: Callable, op: int) -> Callable:
+        """Wrap get_many or put_many to log each of its keys."""
+        log = self._log
+
+        def recorded(items: Any, *args: Any, **kwargs: Any) -> Any:
+            if op == PUT:
+                items = list(items.items() if hasattr(items, "items")
+                             else items)
+                for key, _ in items:
+                    log(key, op)
+            else:
+                items = list(items)
+                for key in items:
+                    log(key, op)
+            return method(items, *args, **kwargs)
+        return recorded
+
+    def flush(self) -> None:
+        """Write the buffered operations to the file."""
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        """Write the buffer out; the lock must be held."""
+        self.file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Stop recording, restoring the cache's methods."""
+        for name, method in self._saved.items():
+            if method is None:
+                self.cache.__dict__.pop(name, None)
+            else:
+                setattr(self.cache, name, method)
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc_info: Optional[Any]) -> None:
+        self.close()
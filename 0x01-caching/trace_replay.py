@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Replay access traces against the cache policies and compare hit ratios
+
+In synthetic traces every access is a get, and a miss is followed by a
+put of the key, as a read-through cache would do. The workloads cover
+the cases each policy is known to handle badly. --trace replays a
+file instead: a log written by trace_log.TraceRecorder, whose puts
+are replayed too, or a text file of one key per line. Misses are
+filled in recorded logs as well, so that a log recorded at one
+capacity replays faithfully at any other.
+
+Each policy is replayed at every capacity, giving hit ratio curves
+and throughput. --stack-distance instead computes the LRU hit ratio
+of every capacity at once from a single pass (Mattson's algorithm).
+
+    ./trace_replay.py [--capacity 1000] [--length 200000]
+                      [--capacities 250,500,1000,2000]
+                      [--workloads zipf,scan] [--trace FILE]
+                      [--stack-distance]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from policies import POLICIES, load_policy
+from trace_log import is_log, read_log
+
+# Keys, and which accesses are puts for recorded logs
+Trace = Tuple[List, Optional[List[bool]]]
+
+CAPACITY = 1000
+LENGTH = 200000
+SEED = 0
+
+
+def zipf_keys(rng: random.Random, universe: int, length: int,
+              alpha: float = 0.9) -> List[int]:
+    """`length` keys in 1..universe, key k drawn with weight 1/k^alpha"""
+    weights = itertools.accumulate(1 / rank ** alpha
+                                   for rank in range(1, universe + 1))
+    return rng.choices(range(1, universe + 1), cum_weights=list(weights),
+                       k=length)
+
+
+def zipf_trace(rng: random.Random, capacity: int, length: int) -> List[int]:
+    """Skewed popularity that does not change over time"""
+    return zipf_keys(rng, capacity * 20, length)
+
+
+def scan_trace(rng: random.Random, capacity: int, length: int) -> List[int]:
+    """Zipf traffic interrupted by one-off scans twice the cache size"""
+    hot = zipf_keys(rng, capacity * 20, length)
+    trace: List[int] = []
+    fresh = itertools.count(capacity * 20 + 1)
+    for start in range(0, length, capacity * 4):
+        trace.extend(hot[start:start + capacity * 2])
+        trace.extend(itertools.islice(fresh, capacity * 2))
+    return trace[:length]
+
+
+def shift_trace(rng: random.Random, capacity: int, length: int) -> List[int]:
+    """Zipf traffic whose popular keys change every tenth of the trace"""
+    universe = capacity * 20
+    trace: List[int] = []
+    phase = max(length // 10, 1)
+    for _ in range(0, length, phase):
+        ranking = list(range(1, universe + 1))
+        rng.shuffle(ranking)
+        trace.extend(ranking[rank - 1]
+                     for rank in zipf_keys(rng, universe, phase))
+    return trace[:length]
+
+
+def loop_trace(rng: random.Random, capacity: int, length: int) -> List[int]:
+    """The same keys cycled in order, half again more than fit"""
+    keys = range(1, capacity * 3 // 2 + 1)
+    return list(itertools.islice(itertools.cycle(keys), length))
+
+
+WORKLOADS: Dict[str, Callable[[random.Random, int, int], List[int]]] = {
+    "zipf": zipf_trace,
+    "scan": scan_trace,
+    "shift": shift_trace,
+    "loop": loop_trace,
+}
+
+
+def read_trace(path: str) -> List[str]:
+    """Keys of a trace file, one per line; blank lines are skipped"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def hit_ratio(policy: type, capacity: int, trace: Iterable) -> float:
+    """Fraction of the trace's gets that hit a fresh `policy` cache"""
+    return replay(policy, capacity, (list(trace), None))[0]
+
+
+def replay(policy: type, capacity: int, trace: Trace) -> Tuple[float, float]:
+    """
+    Replay a trace on a fresh `policy` cache of `capacity` entries.
+
+    Every get that misses is followed by a put of the key; the puts of
+    recorded logs are replayed as well.
+
+    Returns:
+    Tuple[float, float]: Fraction of the gets that hit, and operations
+        (gets and puts) per second
+    """
+    keys, puts = trace
+    cache = policy(max_items=capacity, listener=None)
+    get, put = cache.get, cache.put
+    hits = gets = operations = 0
+    start = time.perf_counter()
+    if puts is None:
+        puts = itertools.repeat(False)
+    for key, is_put in zip(keys, puts):
+        operations += 1
+        if is_put:
+            put(key, True)
+        elif get(key) is None:
+            put(key, True)
+            operations += 1
+            gets += 1
+        else:
+            hits += 1
+            gets += 1
+    elapsed = time.perf_counter() - start
+    return (hits / gets if gets else 0.0,
+            operations / elapsed if elapsed else 0.0)
+
+
+def stack_distances(trace: Trace) -> Tuple[Dict[int, int], int]:
+    """
+    LRU stack distance of every get, in one pass over the trace.
+
+    The distance of an access is the number of distinct keys used
+    since the previous access to the same key, so an LRU cache of C
+    entries hits exactly the gets at a distance below C, misses being
+    filled as replay does. A Fenwick
+    tree over time, marking the last use of each key, counts those
+    keys in O(log n).
+
+    Returns:
+    Tuple[Dict[int, int], int]: Gets by distance (first uses have
+        none), and the number of gets
+    """
+    keys, puts = trace
+    size = len(keys)
+    tree = [0] * (size + 1)
+    last: Dict = {}
+    counts: Dict[int, int] = {}
+    gets = 0
+    for now, key in enumerate(keys, 1):
+        previous = last.get(key)
+        if previous is not None:
+            # Keys last used after `previous`: all marks minus those
+            # at or before it
+            before = 0
+            i = previous
+            while i:
+                before += tree[i]
+                i &= i - 1
+            distance = len(last) - before
+            i = previous
+            while i <= size:
+                tree[i] -= 1
+                i += i & -i
+        i = now
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+        last[key] = now
+        if puts is None or not puts[now - 1]:
+            gets += 1
+            if previous is not None:
+                counts[distance] = counts.get(distance, 0) + 1
+    return counts, gets
+
+
+def lru_hit_ratios(trace: Trace,
+                   capacities: Sequence[int]) -> Dict[int, float]:
+    """LRU hit ratio of the trace at each capacity, from one pass"""
+    counts, gets = stack_distances(trace)
+    ratios = {}
+    for capacity in capacities:
+        hits = sum(count for distance, count in counts.items()
+                   if distance < capacity)
+        ratios[capacity] = hits / gets if gets else 0.0
+    return ratios
+
+
+def load_trace(path: str) -> Trace:
+    """A recorded log, or a text file replayed as read-through gets"""
+    if is_log(path):
+        return read_log(path)
+    return read_trace(path), None
+
+
+def print_stack_distance(traces: Dict[str, Trace],
+                         capacities: Optional[List[int]]) -> None:
+    """Print the LRU hit ratio curve of every trace"""
+    print("LRU hit ratio % by stack distance")
+    print("{:<12} {:>9} {:>9}".format("trace", "capacity", "lru"))
+    for label, trace in traces.items():
+        sizes = capacities
+        if sizes is None:
+            # Powers of two up to the number of distinct keys
+            distinct = len(set(trace[0]))
+            sizes = [1 << shift for shift in range(distinct.bit_length())]
+        for capacity, ratio in lru_hit_ratios(trace, sizes).items():
+            print("{:<12} {:>9} {:>9.2f}".format(label[:12], capacity,
+                                                 ratio * 100))
+
+
+def main() -> None:
+    """Print the hit ratio of every policy on every trace"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--capacity", type=int, default=CAPACITY,
+                        help="scale of the synthetic traces, and the "
+                        "cache capacity unless --capacities is given")
+    parser.add_argument("--capacities",
+                        help="comma-separated cache capacities to replay")
+    parser.add_argument("--length", type=int, default=LENGTH)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--policies", default=",".join(POLICIES))
+    parser.add_argument("--trace", action="append", default=[],
+                        help="trace file to replay, may be repeated")
+    parser.add_argument("--stack-distance", action="store_true",
+                        help="LRU hit ratios of all capacities at once")
+    args = parser.parse_args()
+
+    traces: Dict[str, Trace] = {}
+    if args.trace:
+        for path in args.trace:
+            traces[os.path.basename(path)] = load_trace(path)
+    else:
+        for name in args.workloads.split(","):
+            rng = random.Random(SEED)
+            traces[name] = (WORKLOADS[name](rng, args.capacity, args.length),
+                            None)
+    capacities = None
+    if args.capacities:
+        capacities = [int(size) for size in args.capacities.split(",")]
+
+    if args.stack_distance:
+        print_stack_distance(traces, capacities)
+        return
+
+    names = args.policies.split(",")
+    policies = [load_policy(name) for name in names]
+    results = {(label, capacity): [replay(policy, capacity, trace)
+                                   for policy in policies]
+               for label, trace in traces.items()
+               for capacity in capacities or [args.capacity]}
+    header = "{:<12} {:>9}".format("trace", "capacity") + "".join(
+        "{:>9}".format(name) for name in names)
+    print("hit ratio %")
+    print(header)
+    for (label, capacity), runs in results.items():
+        print("{:<12} {:>9}".format(label[:12], capacity) + "".join(
+            "{:>9.2f}".format(ratio * 100) for ratio, _ in runs))
+    print("\nthroughput, thousand ops/s")
+    print(header)
+    for (label, capacity), runs in results.items():
+        print("{:<12} {:>9}".format(label[:12], capacity) + "".join(
+            "{:>9.0f}".format(ops / 1000) for _, ops in runs))
+
+
+if __name__ == "__main__":
+    main()